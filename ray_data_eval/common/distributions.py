@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+class Distribution:
+    """
+    A distribution of task durations or output sizes.
+    """
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+@dataclass
+class Fixed(Distribution):
+    value: float
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return np.full(size, self.value, dtype=float)
+
+
+@dataclass
+class Uniform(Distribution):
+    low: float
+    high: float
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.uniform(self.low, self.high, size)
+
+
+@dataclass
+class LogNormal(Distribution):
+    """
+    Log-normal distribution with the given median and shape (standard deviation of the log).
+    """
+
+    median: float
+    sigma: float
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.lognormal(np.log(self.median), self.sigma, size)
+
+
+@dataclass
+class Zipf(Distribution):
+    """
+    Zipf distribution over 1, 2, ..., multiplied by `scale` and optionally capped at `max_value`.
+    """
+
+    a: float
+    scale: float = 1.0
+    max_value: float | None = None
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        samples = self.scale * rng.zipf(self.a, size).astype(float)
+        if self.max_value is not None:
+            samples = np.minimum(samples, self.max_value)
+        return samples
+
+
+@dataclass
+class Empirical(Distribution):
+    """
+    Resamples measured values, e.g. task durations from a real run.
+    """
+
+    samples: list[float]
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.choice(np.asarray(self.samples, dtype=float), size)
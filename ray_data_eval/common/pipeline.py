@@ -1,24 +1,177 @@
-from dataclasses import dataclass, field
+import math
+from dataclasses import dataclass, field, replace
+from fractions import Fraction
+
+import numpy as np
+
+from ray_data_eval.common.distributions import Distribution
+from ray_data_eval.infra import config
+
+# Tolerance of resource comparisons, so that e.g. 8 tasks with `cpu=0.99` fit on 8 CPUs after
+# rounding errors.
+RESOURCE_EPSILON = 1e-9
 
 
 @dataclass
 class ResourcesSpec:
-    cpu: int = 0
-    gpu: int = 0
+    """
+    The resources of a machine, or the resource vector requested by a task. Tasks may request
+    fractions of a resource, e.g. `cpu=0.99`, or none, e.g. `cpu=0, gpu=1`, and are packed onto
+    machines by resource vector.
+    """
+
+    cpu: int | float = 0
+    gpu: int | float = 0
     num_executors: int = field(init=False)
 
     def __post_init__(self):
-        self.num_executors = self.cpu + self.gpu
+        self.num_executors = math.ceil(self.cpu) + math.ceil(self.gpu)
+
+    def __add__(self, other: "ResourcesSpec") -> "ResourcesSpec":
+        return ResourcesSpec(cpu=self.cpu + other.cpu, gpu=self.gpu + other.gpu)
+
+    def __sub__(self, other: "ResourcesSpec") -> "ResourcesSpec":
+        return ResourcesSpec(cpu=self.cpu - other.cpu, gpu=self.gpu - other.gpu)
+
+
+def get_num_slots(capacity: ResourcesSpec, requests: list[ResourcesSpec]) -> tuple[int, int]:
+    """
+    Returns the number of CPU and GPU task slots of a machine, i.e. how many tasks can run on it
+    at once. Tasks that request a GPU take a GPU slot, other tasks a CPU slot. There is a slot
+    per resource unit, and more if the requests are fractional, e.g. 8 slots for `cpu=0.99` on
+    8 CPUs but 16 for `cpu=0.5`.
+    """
+
+    def get_max_tasks(amount: float, requested: list[int | float]) -> int:
+        num_tasks = [math.floor(amount / r + RESOURCE_EPSILON) for r in requested if r > 0]
+        return max([math.ceil(amount), *num_tasks])
+
+    return (
+        get_max_tasks(capacity.cpu, [r.cpu for r in requests if r.gpu == 0]),
+        get_max_tasks(capacity.gpu, [r.gpu for r in requests]),
+    )
+
+
+@dataclass
+class SpillSpec:
+    """
+    Local disk that buffered data items are spilled to when the buffer is full.
+    """
+
+    # Number of data items that fit on disk.
+    capacity: int
+    # Number of data items written or read per tick.
+    write_bandwidth: float
+    read_bandwidth: float
+    # Ticks before a restore starts reading.
+    restore_latency: float = 0
+
+
+@dataclass
+class ActorPoolSpec:
+    """
+    An operator that runs on a pool of actors, like `map_batches(Classifier, concurrency=(1, 4))`.
+    Each actor holds the resources of one task of the operator from the time it starts until it
+    is stopped, and runs the operator's tasks one at a time once it is ready.
+    """
+
+    min_size: int = 1
+    max_size: int = 1
+    # Ticks between starting an actor and its first task, e.g. to load a model in `__init__`.
+    startup_duration: int | float = 0
+    # Ticks an actor may stay idle before it is stopped, while the pool is above `min_size`.
+    idle_timeout: int | float = math.inf
+
+    def __post_init__(self):
+        assert 0 < self.min_size <= self.max_size, (self.min_size, self.max_size)
+
+
+@dataclass
+class BatchCostSpec:
+    """
+    The duration of a batched launch of an operator, e.g. a GPU model whose inference time grows
+    sublinearly with the batch size. A launch runs a batch of up to `max_batch_size` tasks of
+    the operator in `overhead + per_task_duration * batch_size` ticks.
+    """
+
+    overhead: int | float
+    per_task_duration: int | float
+    max_batch_size: int
+
+    def __post_init__(self):
+        assert self.max_batch_size > 0, self.max_batch_size
+
+    def get_duration(self, batch_size: int) -> int | float:
+        assert 0 < batch_size <= self.max_batch_size, batch_size
+        return self.overhead + self.per_task_duration * batch_size
+
+
+@dataclass
+class NodeSpec:
+    name: str
+    resources: ResourcesSpec
+    # Number of data items the node's object store can hold.
+    object_store_size: int
+
+
+@dataclass
+class ClusterSpec:
+    nodes: list[NodeSpec]
+    # Number of data items per tick that each node can fetch from other nodes.
+    network_bandwidth: float
+    resources: ResourcesSpec = field(init=False)
+    object_store_size: int = field(init=False)
+
+    def __post_init__(self):
+        self.resources = ResourcesSpec(
+            cpu=sum(node.resources.cpu for node in self.nodes),
+            gpu=sum(node.resources.gpu for node in self.nodes),
+        )
+        self.object_store_size = sum(node.object_store_size for node in self.nodes)
+
+
+# Execution slots of the instance types used in `ray_data_eval.infra.config`.
+INSTANCE_RESOURCES = {
+    "g5.xlarge": ResourcesSpec(cpu=4, gpu=1),
+    "m7i.2xlarge": ResourcesSpec(cpu=8),
+}
+# The head node is not part of the configured instances.
+HEAD_INSTANCE_TYPE = "g5.xlarge"
+
+
+def make_cluster(
+    config_name: str, *, object_store_size: int, network_bandwidth: float
+) -> ClusterSpec:
+    """
+    Returns the cluster of a configuration in `ray_data_eval.infra.config`, e.g. "4+4".
+
+    :param config_name: Name of the configuration.
+    :param object_store_size: Object store capacity of each node, in data items.
+    :param network_bandwidth: Number of data items per tick that each node can fetch.
+    """
+    cluster = config.get(config_name).cluster
+    instance_types = [HEAD_INSTANCE_TYPE, *cluster.terraform_instances_map.values()]
+    nodes = [
+        NodeSpec(
+            name=f"node_{i:02d}",
+            resources=INSTANCE_RESOURCES[instance_type],
+            object_store_size=object_store_size,
+        )
+        for i, instance_type in enumerate(instance_types)
+    ]
+    return ClusterSpec(nodes, network_bandwidth)
 
 
 @dataclass
 class TaskSpec:
     id: str
     operator_idx: int
-    duration: int
+    duration: int | float
     input_size: int
     output_size: int
     resources: ResourcesSpec
+    # Ticks before the first output, in environments where tasks stream their outputs.
+    output_delay: int | float = 0
 
 
 @dataclass
@@ -26,13 +179,27 @@ class OperatorSpec:
     name: str
     operator_idx: int
     num_tasks: int
-    duration: int
+    duration: int | float
     input_size: int
     output_size: int
     resources: ResourcesSpec
-    tasks: list[TaskSpec] = field(init=False)
+    # If set, `SchedulingProblem.sample` draws per-task values from these distributions. The
+    # fixed `duration` and `output_size` above are the nominal values used by solvers.
+    duration_distribution: Distribution | None = None
+    output_size_distribution: Distribution | None = None
+    # In environments where tasks stream their outputs, a task yields nothing for
+    # `output_delay` ticks, then its outputs at an even rate until it finishes, i.e.
+    # `output_size / (duration - output_delay)` items per tick.
+    output_delay: int | float = 0
+    # If set, the operator's tasks run on a pool of actors.
+    actor_pool: ActorPoolSpec | None = None
+    # If set, several tasks of the operator may run as one batch, and `duration` is only the
+    # nominal value used by solvers.
+    batch_cost: BatchCostSpec | None = None
+    tasks: list[TaskSpec] = field(init=False, repr=False)
 
     def __post_init__(self):
+        assert 0 <= self.output_delay <= self.duration, (self.name, self.output_delay)
         self.tasks = [
             TaskSpec(
                 self.name + "_" + str(i),
@@ -41,6 +208,7 @@ class OperatorSpec:
                 self.input_size,
                 self.output_size,
                 self.resources,
+                self.output_delay,
             )
             for i in range(self.num_tasks)
         ]
@@ -62,6 +230,7 @@ class SchedulingProblem:
     resources: ResourcesSpec
     time_limit: int
     buffer_size_limit: int
+    spill: SpillSpec | None = None
     num_operators: int = field(init=False)
     tasks: list[TaskSpec] = field(init=False)
     num_total_tasks: int = field(init=False)
@@ -71,13 +240,126 @@ class SchedulingProblem:
         self.tasks = _get_tasks(self.operators)
         self.num_total_tasks = len(self.tasks)
 
+    @property
+    def actor_pools(self) -> dict[int, ActorPoolSpec]:
+        return {op.operator_idx: op.actor_pool for op in self.operators if op.actor_pool}
+
+    @property
+    def batch_costs(self) -> dict[int, BatchCostSpec]:
+        return {op.operator_idx: op.batch_cost for op in self.operators if op.batch_cost}
+
+    def sample(self, seed: int) -> "SchedulingProblem":
+        """
+        Returns a copy of the problem whose task durations and output sizes are drawn from the
+        operator distributions.
+
+        When the total output of an operator changes, the number of tasks of the next operator
+        follows the data: its last task consumes whatever remains.
+        """
+        rng = np.random.default_rng(seed)
+        operators = []
+        num_inputs = None
+        for op in self.operators:
+            num_tasks = op.num_tasks
+            input_sizes = [op.input_size] * num_tasks
+            if num_inputs is not None and op.input_size > 0:
+                num_tasks = math.ceil(num_inputs / op.input_size)
+                input_sizes = [op.input_size] * num_tasks
+                input_sizes[-1] = num_inputs - op.input_size * (num_tasks - 1)
+
+            durations = [op.duration] * num_tasks
+            if op.duration_distribution is not None:
+                durations = op.duration_distribution.sample(rng, num_tasks).tolist()
+                assert all(duration > 0 for duration in durations), op.name
+            output_sizes = [op.output_size] * num_tasks
+            if op.output_size_distribution is not None:
+                samples = op.output_size_distribution.sample(rng, num_tasks)
+                output_sizes = np.maximum(np.rint(samples), 1).astype(int).tolist()
+            if op.output_size_distribution is not None or num_inputs is not None:
+                num_inputs = sum(output_sizes)
+
+            sampled = replace(op, num_tasks=num_tasks)
+            sampled.tasks = [
+                TaskSpec(
+                    f"{op.name}_{i}",
+                    op.operator_idx,
+                    durations[i],
+                    input_sizes[i],
+                    output_sizes[i],
+                    op.resources,
+                    min(op.output_delay, durations[i]),
+                )
+                for i in range(num_tasks)
+            ]
+            operators.append(sampled)
+        return replace(self, operators=operators)
+
+    def fuse(self, groups: list[list[int]]) -> "SchedulingProblem":
+        """
+        Returns the problem with each group of adjacent operators fused into one operator, as
+        Ray Data fuses e.g. `ReadRange->MapBatches(produce)`. A fused task runs the whole group
+        on the inputs of one task of the group's first operator, so the intermediate buffers
+        disappear along with the parallelism between the fused operators.
+
+        :param groups: Operator indices of each group, in order, covering all operators, e.g.
+            `[[0, 1], [2]]`.
+        :raises ValueError: If the groups are not contiguous, if fused operators request
+            different resources, if an actor operator is fused with a downstream operator, if a
+            batched operator or an operator with duration or output size distributions is
+            fused, if the last operator of a group delays its outputs, or if the data of a group
+            does not split evenly over its tasks.
+        """
+        if [op for group in groups for op in group] != list(range(self.num_operators)):
+            raise ValueError(f"Groups {groups} do not cover the operators in order")
+        operators = []
+        for fused_idx, group in enumerate(groups):
+            ops = [self.operators[op] for op in group]
+            first, last = ops[0], ops[-1]
+            if len(ops) == 1:
+                operators.append(replace(first, operator_idx=fused_idx))
+                continue
+            if any(op.resources != first.resources for op in ops):
+                raise ValueError(f"Cannot fuse {[op.name for op in ops]}: different resources")
+            if any(op.actor_pool is not None for op in ops[:-1]):
+                # As in Ray Data, tasks fuse into a downstream actor operator but not after one.
+                raise ValueError(f"Cannot fuse {[op.name for op in ops]}: actor pool upstream")
+            if any(op.batch_cost is not None for op in ops):
+                raise ValueError(f"Cannot fuse {[op.name for op in ops]}: batched operator")
+            if any(
+                op.duration_distribution is not None or op.output_size_distribution is not None
+                for op in ops
+            ):
+                raise ValueError(f"Cannot fuse {[op.name for op in ops]}: distributions")
+            # The outputs of the other operators stay inside the fused task, so only the delay
+            # of the last one matters.
+            if last.output_delay != 0:
+                raise ValueError(f"Cannot fuse {[op.name for op in ops]}: output delay")
+            num_tasks = first.num_tasks
+            duration = Fraction(sum(op.duration * op.num_tasks for op in ops), num_tasks)
+            output_size = Fraction(last.output_size * last.num_tasks, num_tasks)
+            if output_size.denominator != 1:
+                raise ValueError(f"Cannot fuse {[op.name for op in ops]}: uneven outputs")
+            operators.append(
+                OperatorSpec(
+                    name="->".join(op.name for op in ops),
+                    operator_idx=fused_idx,
+                    num_tasks=num_tasks,
+                    duration=int(duration) if duration.denominator == 1 else float(duration),
+                    input_size=first.input_size,
+                    output_size=int(output_size),
+                    resources=first.resources,
+                    actor_pool=last.actor_pool,
+                )
+            )
+        return replace(self, operators=operators)
+
 
 def make_producer_consumer_problem(
     name: str = "producer_consumer",
     num_producers: int = 1,
     num_consumers: int = 1,
-    producer_time: int = 1,
-    consumer_time: int = 1,
+    producer_time: float = 1,
+    consumer_time: float = 1,
     producer_output_size: int = 1,
     consumer_input_size: int = 1,
     num_execution_slots: int = 1,
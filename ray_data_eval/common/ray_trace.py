@@ -0,0 +1,170 @@
+"""
+Builds `SchedulingProblem`s from the `ray.timeline()` Chrome traces dumped by the pipelines in
+this repo, optionally refined with the output of `ds.stats()`.
+"""
+
+import itertools
+import json
+import math
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from ray_data_eval.common.distributions import Empirical
+from ray_data_eval.common.pipeline import OperatorSpec, ResourcesSpec, SchedulingProblem
+
+# Ray Data tasks, e.g. "task::MapBatches(produce)" or "task::ReadRange->MapBatches(produce)".
+TASK_EVENT_PATTERN = r"^task::(?P<operator>.*(Read|Map|Filter|Write).*)$"
+
+_STATS_OPERATOR_PATTERN = re.compile(
+    r"^Operator \d+ (?P<operator>.+?): (?P<tasks>\d+) tasks executed, "
+    r"(?P<blocks>\d+) blocks produced"
+)
+
+# Trace events with a zero duration would finish instantly in the simulator.
+_MIN_DURATION_TICKS = 1e-3
+
+
+@dataclass
+class TraceTask:
+    operator: str
+    # In seconds since the start of the trace.
+    start: float
+    duration: float
+    node: str
+
+
+@dataclass
+class OperatorStats:
+    num_tasks: int
+    num_blocks: int
+
+
+def load_ray_timeline(path: str, pattern: str = TASK_EVENT_PATTERN) -> list[TraceTask]:
+    """
+    Returns the tasks in a `ray.timeline()` trace whose category matches `pattern`, which must
+    have an `operator` group.
+    """
+    with open(path) as f:
+        events = json.load(f)
+    regex = re.compile(pattern)
+    tasks = []
+    for event in events:
+        match = regex.match(event.get("cat", ""))
+        if match is None or event.get("ph") != "X":
+            continue
+        tasks.append(
+            TraceTask(
+                operator=match.group("operator"),
+                start=event["ts"] / 1e6,
+                duration=event["dur"] / 1e6,
+                node=str(event.get("pid", "")),
+            )
+        )
+    if tasks:
+        start = min(task.start for task in tasks)
+        for task in tasks:
+            task.start -= start
+    return tasks
+
+
+def parse_ds_stats(text: str) -> dict[str, OperatorStats]:
+    """
+    Returns the number of tasks and output blocks of each operator in `ds.stats()` output.
+    """
+    stats = {}
+    for line in text.splitlines():
+        match = _STATS_OPERATOR_PATTERN.match(line.strip())
+        if match is not None:
+            stats[match.group("operator")] = OperatorStats(
+                num_tasks=int(match.group("tasks")),
+                num_blocks=int(match.group("blocks")),
+            )
+    return stats
+
+
+def get_wall_time(tasks: list[TraceTask]) -> float:
+    return max(task.start + task.duration for task in tasks) - min(task.start for task in tasks)
+
+
+def _get_max_concurrency(tasks: list[TraceTask]) -> int:
+    events = sorted(
+        [(task.start, 1) for task in tasks] + [(task.start + task.duration, -1) for task in tasks]
+    )
+    # Ends sort before starts at the same time, so back-to-back tasks share a slot.
+    return max(itertools.accumulate(delta for _, delta in events), default=0)
+
+
+def make_problem_from_trace(
+    tasks: list[TraceTask],
+    *,
+    name: str = "trace",
+    stats: dict[str, OperatorStats] | None = None,
+    tick_seconds: float = 1.0,
+    gpu_operators: list[str] = (),
+    buffer_size_limit: int | None = None,
+) -> SchedulingProblem:
+    """
+    Fits a linear pipeline to the traced tasks. Operators are ordered by their first task. Each
+    data item is one block.
+
+    :param tasks: Tasks from `load_ray_timeline`.
+    :param name: Name of the problem.
+    :param stats: Operator stats from `parse_ds_stats`. Without them, each task outputs just
+        enough blocks for every task of the next operator to get one.
+    :param tick_seconds: Length of a tick in seconds.
+    :param gpu_operators: Operators whose name contains any of these strings run on GPUs.
+    :param buffer_size_limit: Buffer size in blocks. Defaults to the total number of blocks,
+        i.e. no backpressure.
+    """
+    by_operator: dict[str, list[TraceTask]] = {}
+    for task in sorted(tasks, key=lambda task: task.start):
+        by_operator.setdefault(task.operator, []).append(task)
+    stats = stats or {}
+
+    def is_gpu(operator: str) -> bool:
+        return any(gpu_operator in operator for gpu_operator in gpu_operators)
+
+    names = list(by_operator)
+    operators = []
+    num_inputs = 0
+    for idx, operator in enumerate(names):
+        num_tasks = len(by_operator[operator])
+        durations = [
+            max(task.duration / tick_seconds, _MIN_DURATION_TICKS) for task in by_operator[operator]
+        ]
+        output_size = 0
+        if idx + 1 < len(names):
+            if operator in stats:
+                output_size = max(1, round(stats[operator].num_blocks / num_tasks))
+            else:
+                output_size = math.ceil(len(by_operator[names[idx + 1]]) / num_tasks)
+        # Rounded down so that upstream operators produce enough items.
+        input_size = max(1, num_inputs // num_tasks) if idx > 0 else 0
+        operators.append(
+            OperatorSpec(
+                name=operator,
+                operator_idx=idx,
+                num_tasks=num_tasks,
+                duration=max(1, round(float(np.median(durations)))),
+                input_size=input_size,
+                output_size=output_size,
+                resources=ResourcesSpec(gpu=1) if is_gpu(operator) else ResourcesSpec(cpu=1),
+                duration_distribution=Empirical(durations),
+            )
+        )
+        num_inputs = num_tasks * output_size
+
+    gpu_tasks = [task for task in tasks if is_gpu(task.operator)]
+    cpu_tasks = [task for task in tasks if not is_gpu(task.operator)]
+    total_output_size = sum(op.num_tasks * op.output_size for op in operators)
+    return SchedulingProblem(
+        operators,
+        name=name,
+        resources=ResourcesSpec(
+            cpu=_get_max_concurrency(cpu_tasks), gpu=_get_max_concurrency(gpu_tasks)
+        ),
+        time_limit=math.ceil(get_wall_time(tasks) / tick_seconds) * 10,
+        buffer_size_limit=buffer_size_limit or total_output_size,
+    )
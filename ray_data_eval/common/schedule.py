@@ -0,0 +1,209 @@
+"""
+Schedules of a `SchedulingProblem`, as found by the solvers or run by the simulator, in one
+format that can be printed, exported to Chrome traces or Parquet, replayed in the simulator
+with `ReplayPolicy`, and diffed against each other.
+"""
+
+import json
+import math
+from dataclasses import asdict, dataclass, field
+
+from ray_data_eval.common.pipeline import TaskSpec
+
+Tick = int | float
+
+
+@dataclass
+class ScheduledTask:
+    id: str
+    operator_idx: int
+    # Index of the executor in `Schedule.executors`.
+    executor: int
+    # The task runs from tick `start` and its outputs are in the buffer from tick `end`.
+    start: Tick
+    end: Tick
+
+
+@dataclass
+class Schedule:
+    # Name of the problem.
+    problem: str
+    # Names of the executors, e.g. "CPU0", in the order of the simulator and the solvers.
+    executors: list[str]
+    # Names of the operators.
+    operators: list[str]
+    # Tasks that finished, in start order.
+    tasks: list[ScheduledTask]
+    # Size of the output buffer of each operator but the last, at ticks 0 to `makespan`.
+    buffer_levels: list[list[int]]
+    # Size of the outputs of each operator but the last not claimed by a consumer yet.
+    buffer_to_consume_levels: list[list[int]]
+    # The objective: the tick at which the last task finishes.
+    makespan: Tick
+    # Statistics of the solver or simulator that found the schedule, e.g. its status.
+    stats: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.tasks = sorted(self.tasks, key=lambda task: (task.start, task.executor))
+
+    def diff(
+        self, other: "Schedule"
+    ) -> list[tuple[str, ScheduledTask | None, ScheduledTask | None]]:
+        """
+        Returns the tasks that start or end at different ticks in the two schedules, or that
+        only one schedule runs, with their entries in this schedule and in `other`. Executors
+        are ignored, since executors of the same resource are interchangeable.
+        """
+        tasks = {task.id: task for task in self.tasks}
+        other_tasks = {task.id: task for task in other.tasks}
+        ret = []
+        for tid in dict.fromkeys([*tasks, *other_tasks]):
+            task, other_task = tasks.get(tid), other_tasks.get(tid)
+            if (
+                task is None
+                or other_task is None
+                or (task.start, task.end) != (other_task.start, other_task.end)
+            ):
+                ret.append((tid, task, other_task))
+        return ret
+
+    def get_task_rows(self) -> list[dict]:
+        return [
+            {"problem": self.problem, **asdict(task), "executor": self.executors[task.executor]}
+            for task in self.tasks
+        ]
+
+    def get_buffer_rows(self) -> list[dict]:
+        return [
+            {
+                "problem": self.problem,
+                "operator": self.operators[o],
+                "tick": t,
+                "buffer": level,
+                "buffer_to_consume": self.buffer_to_consume_levels[o][t],
+            }
+            for o, levels in enumerate(self.buffer_levels)
+            for t, level in enumerate(levels)
+        ]
+
+    def to_chrome_trace(self, path: str, tick_seconds: float = 0.5):
+        """
+        Writes the schedule as a Chrome trace, viewable in `chrome://tracing` or Perfetto: one
+        row per executor with the tasks it runs, and counters of the buffer levels.
+
+        :param tick_seconds: Duration of a tick in the trace.
+        """
+        us_per_tick = tick_seconds * 1e6
+        events = [
+            {
+                "cat": "task",
+                "name": task.id,
+                "pid": self.problem,
+                "tid": self.executors[task.executor],
+                "ts": task.start * us_per_tick,
+                "dur": (task.end - task.start) * us_per_tick,
+                "ph": "X",
+                "args": {"operator": self.operators[task.operator_idx]},
+            }
+            for task in self.tasks
+        ]
+        for name, levels in [
+            ("buffer", self.buffer_levels),
+            ("buffer_to_consume", self.buffer_to_consume_levels),
+        ]:
+            for t in range(len(levels[0]) if levels else 0):
+                events.append(
+                    {
+                        "name": name,
+                        "pid": self.problem,
+                        "ts": t * us_per_tick,
+                        "ph": "C",
+                        "args": {self.operators[o]: levels[o][t] for o in range(len(levels))},
+                    }
+                )
+        with open(path, "w") as f:
+            json.dump(events, f)
+
+    def to_parquet(self, path: str, buffer_path: str | None = None):
+        """
+        Writes one row per task to `path`, and if set, one row per operator and tick with the
+        buffer levels to `buffer_path`. Requires pyarrow.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.Table.from_pylist(self.get_task_rows()), path)
+        if buffer_path is not None:
+            pq.write_table(pa.Table.from_pylist(self.get_buffer_rows()), buffer_path)
+
+    def print(self):
+        """
+        Prints the schedule as a table of executors and buffer levels by tick.
+        """
+        max_time = math.ceil(self.makespan)
+        grid = [[None] * max_time for _ in self.executors]
+        for task in self.tasks:
+            for t in range(math.floor(task.start), math.ceil(task.end)):
+                grid[task.executor][t] = task.id
+        separator_line = "++" + "-" * (max_time * 6 + 7) + "++"
+        print(separator_line)
+        for name, row in zip(self.executors, grid, strict=True):
+            print(f"|| {name} ||", end="")
+            for item in row:
+                print("     |" if item is None else f" {item:<3} |", end="")
+            print("|")
+        print(separator_line)
+        for prefix, levels in [
+            ("buf", self.buffer_levels),
+            ("btc", self.buffer_to_consume_levels),
+        ]:
+            for o in range(len(levels)):
+                print(f"|| {prefix}{self.operators[o]} ||", end="")
+                for t in range(max_time + 1):
+                    print(f" {levels[o][t]:<3} |", end="")
+                print()
+            print(separator_line)
+        print("|| time ||", end="")
+        for t in range(max_time):
+            print(f" {t:<3} |", end="")
+        print("|")
+        print(separator_line)
+        print("Total Run Time =", self.makespan)
+
+
+def get_buffer_levels(
+    tasks: list[TaskSpec], scheduled: list[ScheduledTask], num_operators: int, makespan: Tick
+) -> tuple[list[list[int]], list[list[int]]]:
+    """
+    Returns the buffer and buffer to consume levels of a schedule, as the solvers count them: a
+    task claims its inputs when it starts, and removes them and adds its outputs when it ends.
+
+    :param tasks: Specs of the scheduled tasks, for their input and output sizes.
+    """
+    specs = {task.id: task for task in tasks}
+    num_ticks = math.ceil(makespan) + 1
+    increase, to_consume_decrease, decrease = (
+        [[0] * num_ticks for _ in range(num_operators - 1)] for _ in range(3)
+    )
+    for task in scheduled:
+        spec = specs[task.id]
+        end = math.ceil(task.end)
+        if task.operator_idx < num_operators - 1 and end < num_ticks:
+            increase[task.operator_idx][end] += spec.output_size
+        if task.operator_idx > 0:
+            to_consume_decrease[task.operator_idx - 1][math.floor(task.start) + 1] += (
+                spec.input_size
+            )
+            if end < num_ticks:
+                decrease[task.operator_idx - 1][end] += spec.input_size
+    buffer_levels, buffer_to_consume_levels = [], []
+    for o in range(num_operators - 1):
+        buffer, buffer_to_consume = [0], [0]
+        for t in range(1, num_ticks):
+            buffer.append(buffer[-1] + increase[o][t] - decrease[o][t])
+            buffer_to_consume.append(
+                buffer_to_consume[-1] + increase[o][t] - to_consume_decrease[o][t]
+            )
+        buffer_levels.append(buffer)
+        buffer_to_consume_levels.append(buffer_to_consume)
+    return buffer_levels, buffer_to_consume_levels
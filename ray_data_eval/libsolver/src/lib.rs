@@ -2,22 +2,84 @@ mod solver;
 mod types;
 
 use pyo3::prelude::*;
+use pyo3::types::PyDict;
+use std::time::Instant;
 
 fn init_logging() {
-    env_logger::Builder::from_default_env()
+    // `solve` may be called several times, but the logger can only be set once.
+    let _ = env_logger::Builder::from_default_env()
         .format_timestamp(Some(env_logger::fmt::TimestampPrecision::Millis))
-        .init();
+        .try_init();
 }
 
+// Returns the best schedule as a `ray_data_eval.common.schedule.Schedule`, or None if no
+// schedule fits in the time limit.
 #[pyfunction]
-fn solve(problem: types::SchedulingProblem) -> PyResult<()> {
+fn solve(py: Python<'_>, problem: types::SchedulingProblem) -> PyResult<PyObject> {
     init_logging();
-    solver::solve(&problem);
-    Ok(())
+    let start = Instant::now();
+    let result = solver::solve(&problem);
+    let solve_seconds = start.elapsed().as_secs_f64();
+    let Some(solution) = result.best_solution else {
+        return Ok(py.None());
+    };
+
+    let module = py.import("ray_data_eval.common.schedule")?;
+    let scheduled_task_cls = module.getattr("ScheduledTask")?;
+    let tasks = solution
+        .state
+        .get_scheduled_tasks()
+        .into_iter()
+        .map(|task| {
+            scheduled_task_cls.call1((
+                task.id,
+                task.operator_idx,
+                task.executor,
+                task.start,
+                task.end,
+            ))
+        })
+        .collect::<PyResult<Vec<_>>>()?;
+    let (buffer_levels, buffer_to_consume_levels) = solution.state.get_buffer_levels();
+
+    let stats = PyDict::new(py);
+    stats.set_item("status", "Optimal Solution Found")?;
+    stats.set_item("solve_seconds", solve_seconds)?;
+    stats.set_item("num_states_visited", result.num_states_visited)?;
+    stats.set_item("num_equivalent_solutions", result.num_equivalent_solutions)?;
+
+    let kwargs = PyDict::new(py);
+    kwargs.set_item("problem", &problem.name)?;
+    kwargs.set_item("executors", solution.state.get_executor_names())?;
+    kwargs.set_item(
+        "operators",
+        problem
+            .operators
+            .iter()
+            .map(|op| op.name.clone())
+            .collect::<Vec<_>>(),
+    )?;
+    kwargs.set_item("tasks", tasks)?;
+    kwargs.set_item("buffer_levels", buffer_levels)?;
+    kwargs.set_item("buffer_to_consume_levels", buffer_to_consume_levels)?;
+    kwargs.set_item("makespan", solution.total_time)?;
+    kwargs.set_item("stats", stats)?;
+    let schedule = module.getattr("Schedule")?.call((), Some(kwargs))?;
+    Ok(schedule.to_object(py))
+}
+
+// Returns the number of CPU and GPU task slots of a machine, as the solver counts them.
+#[pyfunction]
+fn get_num_slots(
+    capacity: types::ResourcesSpec,
+    requests: Vec<types::ResourcesSpec>,
+) -> (usize, usize) {
+    types::get_num_slots(&capacity, &requests)
 }
 
 #[pymodule]
 fn libsolver(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(solve, m)?)?;
+    m.add_function(wrap_pyfunction!(get_num_slots, m)?)?;
     Ok(())
 }
@@ -14,11 +14,7 @@ fn main() {
     init_logging();
     let test_problem = SchedulingProblem::new(
         "test_problem".to_string(),
-        ResourcesSpec {
-            cpu: 3,
-            gpu: 0,
-            num_executors: 3,
-        },
+        ResourcesSpec::new(3.0, 0.0),
         15,
         4,
         vec![
@@ -29,11 +25,7 @@ fn main() {
                 1,
                 0,
                 1,
-                ResourcesSpec {
-                    cpu: 1,
-                    gpu: 0,
-                    num_executors: 1,
-                },
+                ResourcesSpec::new(1.0, 0.0),
             ),
             OperatorSpec::new(
                 "C".to_string(),
@@ -42,21 +34,13 @@ fn main() {
                 2,
                 1,
                 0,
-                ResourcesSpec {
-                    cpu: 1,
-                    gpu: 0,
-                    num_executors: 1,
-                },
+                ResourcesSpec::new(1.0, 0.0),
             ),
         ],
     );
     let training_problem = SchedulingProblem::new(
         "training_problem".to_string(),
-        ResourcesSpec {
-            cpu: 3,
-            gpu: 1,
-            num_executors: 4,
-        },
+        ResourcesSpec::new(3.0, 1.0),
         15,
         4,
         vec![
@@ -67,11 +51,7 @@ fn main() {
                 1,
                 0,
                 1,
-                ResourcesSpec {
-                    cpu: 1,
-                    gpu: 0,
-                    num_executors: 1,
-                },
+                ResourcesSpec::new(1.0, 0.0),
             ),
             OperatorSpec::new(
                 "C".to_string(),
@@ -80,11 +60,7 @@ fn main() {
                 2,
                 1,
                 1,
-                ResourcesSpec {
-                    cpu: 1,
-                    gpu: 0,
-                    num_executors: 1,
-                },
+                ResourcesSpec::new(1.0, 0.0),
             ),
             OperatorSpec::new(
                 "T".to_string(),
@@ -93,11 +69,7 @@ fn main() {
                 1,
                 2,
                 0,
-                ResourcesSpec {
-                    cpu: 0,
-                    gpu: 1,
-                    num_executors: 1,
-                },
+                ResourcesSpec::new(0.0, 1.0),
             ),
         ],
     );
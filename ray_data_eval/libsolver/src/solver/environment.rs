@@ -1,8 +1,3 @@
-use serde::{Deserialize, Serialize};
-use serde_json;
-use std::collections::HashMap;
-use std::fs::File;
-use std::io::Write;
 use std::{hash::Hash, sync::Arc};
 
 use crate::types::*;
@@ -13,8 +8,6 @@ use std::hash::Hasher;
 type OperatorIndex = usize;
 type Tick = u32;
 
-const MICROSECS_PER_TICK: u64 = 500_000;
-
 #[derive(Debug, Clone)]
 pub struct Solution {
     pub total_time: u32,
@@ -29,17 +22,15 @@ pub struct Buffer {
     consumable_timeline: Vec<usize>,
 }
 
-#[derive(Debug, Clone, Serialize)]
-struct TraceEvent {
-    cat: String,
-    name: String,
-    pid: String,
-    tid: String,
-    ts: u64,
-    dur: u64,
-    ph: String,
-    cname: String,
-    args: Option<HashMap<String, String>>,
+// A task of a solution, like `ScheduledTask` in `ray_data_eval.common.schedule`.
+#[derive(Debug, Clone)]
+pub struct ScheduledTask {
+    pub id: String,
+    pub operator_idx: OperatorIndex,
+    // Index of the executor in `Environment::get_executor_names`.
+    pub executor: usize,
+    pub start: Tick,
+    pub end: Tick,
 }
 
 impl PartialEq for Buffer {
@@ -97,6 +88,11 @@ impl Buffer {
     }
 }
 
+// Returns the sizes in a buffer timeline from tick 0, when buffers are empty.
+fn get_levels(timeline: &Vec<usize>) -> Vec<usize> {
+    std::iter::once(0).chain(timeline.iter().cloned()).collect()
+}
+
 #[derive(Debug, Clone)]
 struct OperatorState {
     num_tasks: usize,
@@ -179,9 +175,8 @@ struct Executor {
     pub resource: Resource,
     running_task: Option<RunningTask>,
     timeline: String,
-    current_time: u64,
-    timeline_json: Vec<TraceEvent>,
-    color_map: HashMap<String, String>,
+    // Tasks that finished on this executor, with the tick they finished at.
+    finished_tasks: Vec<(RunningTask, Tick)>,
 }
 
 impl PartialEq for Executor {
@@ -216,41 +211,6 @@ fn try_finishing_running_task(
     true
 }
 
-fn create_event_color_map() -> HashMap<String, String> {
-    let mut map = HashMap::new();
-    map.insert("P".to_string(), "rail_response".to_string());
-    map.insert("C".to_string(), "cq_build_passed".to_string());
-    map.insert("I".to_string(), "rail_load".to_string());
-    map.insert("T".to_string(), "cq_build_failed".to_string());
-    map
-}
-
-impl TraceEvent {
-    pub fn new(
-        cat: String,
-        name: String,
-        pid: String,
-        tid: String,
-        ts: u64,
-        dur: u64,
-        ph: String,
-        cname: String,
-        args: Option<HashMap<String, String>>,
-    ) -> Self {
-        Self {
-            cat,
-            name,
-            pid,
-            tid,
-            ts,
-            dur,
-            ph,
-            cname,
-            args,
-        }
-    }
-}
-
 impl Executor {
     pub fn new(name: String, resource: Resource) -> Self {
         Self {
@@ -258,13 +218,11 @@ impl Executor {
             resource,
             running_task: None,
             timeline: String::new(),
-            current_time: 0,
-            timeline_json: Vec::new(),
-            color_map: create_event_color_map(),
+            finished_tasks: Vec::new(),
         }
     }
 
-    pub fn tick(&mut self, _tick: Tick, buffers: &mut Vec<Buffer>) -> i32 {
+    pub fn tick(&mut self, tick: Tick, buffers: &mut Vec<Buffer>) -> i32 {
         self.push_timeline_item();
         if let Some(task) = &mut self.running_task {
             task.remaining_ticks -= 1;
@@ -276,7 +234,9 @@ impl Executor {
                 };
                 let can_finish = try_finishing_running_task(task, input_buffer, output_buffer);
                 if can_finish {
-                    self.running_task = None;
+                    if let Some(task) = self.running_task.take() {
+                        self.finished_tasks.push((task, tick));
+                    }
                     1
                 } else {
                     -1
@@ -290,9 +250,8 @@ impl Executor {
     }
 
     pub fn can_start_task(&self, task: &TaskSpec, input_buffer: &Option<&mut Buffer>) -> bool {
-        if task.resources.cpu > 0 && self.resource != Resource::CPU {
-            false
-        } else if task.resources.gpu > 0 && self.resource != Resource::GPU {
+        let slot_resource = task.resources.get_slot_resource();
+        if slot_resource.is_some() && slot_resource != Some(self.resource.clone()) {
             false
         } else if let Some(_) = &self.running_task {
             false
@@ -331,32 +290,11 @@ impl Executor {
             if task.remaining_ticks > 0 {
                 self.timeline.push_str(&task.spec.id);
                 self.timeline.push_str("  ");
-
-                if task.remaining_ticks == task.spec.duration as i32 {
-                    let dur_time = (task.spec.duration as u64) * MICROSECS_PER_TICK;
-                    let event = TraceEvent::new(
-                        "task".to_string(),
-                        task.spec.id.clone(),
-                        "1".to_string(),
-                        self.name.clone(),
-                        self.current_time,
-                        dur_time,
-                        "X".to_string(),
-                        self.color_map
-                            .get(&task.spec.id)
-                            .unwrap_or(&"olive".to_string())
-                            .clone(),
-                        None,
-                    );
-                    self.current_time += dur_time;
-                    self.timeline_json.push(event);
-                }
             } else {
                 self.timeline.push_str("!  ");
             }
         } else {
             self.timeline.push_str("   ");
-            self.current_time += MICROSECS_PER_TICK;
         }
     }
 }
@@ -364,6 +302,8 @@ impl Executor {
 #[derive(Debug, Clone)]
 pub struct Environment {
     executors: Vec<Executor>,
+    // Resources shared by the executors, which are task slots.
+    capacity: ResourcesSpec,
     buffers: Vec<Buffer>,
     operator_specs: Arc<Vec<OperatorSpec>>,
     operator_states: Vec<OperatorState>,
@@ -435,8 +375,8 @@ fn get_action_sets_by_resource(
         .iter()
         .zip(operator_states.iter())
         .filter(|(op, state)| {
-            (op.resources.cpu > 0 && resource == Resource::CPU
-                || op.resources.gpu > 0 && resource == Resource::GPU)
+            // Operators that run on any slot are started on CPU slots.
+            op.resources.get_slot_resource().unwrap_or(Resource::CPU) == resource
                 && !state.is_finished()
         })
         .map(|(spec, _)| spec.operator_idx)
@@ -456,13 +396,16 @@ impl Environment {
         time_limit: Tick,
         buffer_size_limit: usize,
     ) -> Self {
+        let requests: Vec<_> = tasks.iter().map(|task| task.resources.clone()).collect();
+        let (num_cpu_slots, num_gpu_slots) = get_num_slots(resources, &requests);
         Self {
-            executors: (0..resources.cpu)
+            executors: (0..num_cpu_slots)
                 .map(|i| Executor::new(format!("CPU{}", i), Resource::CPU))
                 .chain(
-                    (0..resources.gpu).map(|i| Executor::new(format!("GPU{}", i), Resource::GPU)),
+                    (0..num_gpu_slots).map(|i| Executor::new(format!("GPU{}", i), Resource::GPU)),
                 )
                 .collect(),
+            capacity: resources.clone(),
             buffers: operators.iter().map(|_| Buffer::new()).collect(),
             operator_specs: Arc::new(operators.clone()),
             operator_states: operators
@@ -497,8 +440,7 @@ impl Environment {
             .iter()
             .zip(self.operator_states.iter())
             .filter(|(spec, _)| {
-                spec.resources.cpu > 0 && *resource == Resource::CPU
-                    || spec.resources.gpu > 0 && *resource == Resource::GPU
+                spec.resources.get_slot_resource().unwrap_or(Resource::CPU) == *resource
             })
             .map(|(spec, state)| state.num_tasks_remaining() * spec.duration)
             .sum()
@@ -632,8 +574,26 @@ impl Environment {
         }
     }
 
+    // Returns whether the request of `task` fits in the resources left by the running tasks.
+    fn fits(&self, task: &TaskSpec) -> bool {
+        let (cpu, gpu) = self
+            .executors
+            .iter()
+            .filter_map(|executor| executor.running_task.as_ref())
+            .fold(
+                (task.resources.cpu, task.resources.gpu),
+                |(cpu, gpu), running| {
+                    (
+                        cpu + running.spec.resources.cpu,
+                        gpu + running.spec.resources.gpu,
+                    )
+                },
+            );
+        cpu <= self.capacity.cpu + RESOURCE_EPSILON && gpu <= self.capacity.gpu + RESOURCE_EPSILON
+    }
+
     fn start_task_on_any_executor(&mut self, task: &TaskSpec) -> bool {
-        if !self.check_task_input(task) {
+        if !self.check_task_input(task) || !self.fits(task) {
             return false;
         }
         for i in 0..self.executors.len() {
@@ -644,19 +604,49 @@ impl Environment {
         false
     }
 
-    fn collect_events_from_all_executors(&self) -> Vec<TraceEvent> {
-        let mut all_events = Vec::new();
-        for executor in self.executors.iter() {
-            all_events.extend(executor.timeline_json.clone());
-        }
-        all_events
+    pub fn get_executor_names(&self) -> Vec<String> {
+        self.executors
+            .iter()
+            .map(|executor| executor.name.clone())
+            .collect()
     }
 
-    fn write_all_events_to_json(&self) {
-        let all_events = self.collect_events_from_all_executors();
-        let json = serde_json::to_string(&all_events).unwrap();
-        let mut file = File::create("output.json").unwrap();
-        file.write_all(json.as_bytes()).unwrap();
+    // Returns the tasks that finished, in start order.
+    pub fn get_scheduled_tasks(&self) -> Vec<ScheduledTask> {
+        self.executors
+            .iter()
+            .enumerate()
+            .flat_map(|(executor_idx, executor)| {
+                executor
+                    .finished_tasks
+                    .iter()
+                    .map(move |(task, finished_at)| ScheduledTask {
+                        id: task.spec.id.clone(),
+                        operator_idx: task.spec.operator_idx,
+                        executor: executor_idx,
+                        start: task.started_at,
+                        end: *finished_at,
+                    })
+            })
+            .sorted_by_key(|task| (task.start, task.executor))
+            .collect()
+    }
+
+    // Returns the buffer and buffer to consume sizes of each operator but the last, from tick 0
+    // to the current tick.
+    pub fn get_buffer_levels(&self) -> (Vec<Vec<usize>>, Vec<Vec<usize>>) {
+        // The last operator has no output buffer.
+        let buffers = &self.buffers[..self.buffers.len().saturating_sub(1)];
+        (
+            buffers
+                .iter()
+                .map(|buffer| get_levels(&buffer.timeline))
+                .collect(),
+            buffers
+                .iter()
+                .map(|buffer| get_levels(&buffer.consumable_timeline))
+                .collect(),
+        )
     }
 
     pub fn print(&self) {
@@ -668,7 +658,6 @@ impl Environment {
             info!("{:?}", buffer.consumable_timeline);
         }
         info!("");
-        self.write_all_events_to_json();
     }
 
     pub fn get_fingerprint(&self) -> u64 {
@@ -4,7 +4,14 @@ use crate::solver::environment::*;
 use crate::types::*;
 use log::info;
 
-pub fn solve(problem: &SchedulingProblem) {
+pub struct SolveResult {
+    pub best_solution: Option<Solution>,
+    pub num_states_visited: usize,
+    // Number of solutions as fast as the best one.
+    pub num_equivalent_solutions: usize,
+}
+
+pub fn solve(problem: &SchedulingProblem) -> SolveResult {
     info!("Solving problem: {}", problem.name);
     let mut heap = std::collections::BinaryHeap::new();
     let mut best_solution: Option<Solution> = None;
@@ -59,7 +66,7 @@ pub fn solve(problem: &SchedulingProblem) {
         }
     }
     info!("Total unique states visited: {}", visited.len());
-    if let Some(solution) = best_solution {
+    if let Some(solution) = &best_solution {
         info!("Best solution: {:?}", solution.total_time);
         solution.state.print();
         info!(
@@ -72,4 +79,9 @@ pub fn solve(problem: &SchedulingProblem) {
     } else {
         info!("No solution found");
     }
+    SolveResult {
+        best_solution,
+        num_states_visited: visited.len(),
+        num_equivalent_solutions: best_solution_set.len(),
+    }
 }
@@ -8,13 +8,71 @@ pub enum Resource {
     GPU,
 }
 
-#[derive(Debug, Clone, PartialEq, Eq, Hash, FromPyObject)]
+// Tolerance of resource comparisons, as in `ray_data_eval.common.pipeline`.
+pub const RESOURCE_EPSILON: f64 = 1e-9;
+
+// Resources of a machine, or requested by a task. Requests may be fractional, e.g. `cpu: 0.99`.
+#[derive(Debug, Clone, FromPyObject)]
 pub struct ResourcesSpec {
-    pub cpu: i32,
-    pub gpu: i32,
+    pub cpu: f64,
+    pub gpu: f64,
     pub num_executors: i32,
 }
 
+impl PartialEq for ResourcesSpec {
+    fn eq(&self, other: &Self) -> bool {
+        self.cpu.to_bits() == other.cpu.to_bits() && self.gpu.to_bits() == other.gpu.to_bits()
+    }
+}
+
+impl Eq for ResourcesSpec {}
+
+impl std::hash::Hash for ResourcesSpec {
+    fn hash<H: std::hash::Hasher>(&self, state: &mut H) {
+        self.cpu.to_bits().hash(state);
+        self.gpu.to_bits().hash(state);
+    }
+}
+
+impl ResourcesSpec {
+    pub fn new(cpu: f64, gpu: f64) -> Self {
+        ResourcesSpec {
+            cpu,
+            gpu,
+            num_executors: (cpu.ceil() + gpu.ceil()) as i32,
+        }
+    }
+
+    // The type of executor slot that a task with this request runs on, or None for any slot.
+    pub fn get_slot_resource(&self) -> Option<Resource> {
+        if self.gpu > 0.0 {
+            Some(Resource::GPU)
+        } else if self.cpu > 0.0 {
+            Some(Resource::CPU)
+        } else {
+            None
+        }
+    }
+}
+
+// Returns the number of CPU and GPU task slots of a machine, like `get_num_slots` in
+// `ray_data_eval.common.pipeline`.
+pub fn get_num_slots(capacity: &ResourcesSpec, requests: &[ResourcesSpec]) -> (usize, usize) {
+    fn get_max_tasks(amount: f64, requested: impl Iterator<Item = f64>) -> usize {
+        requested
+            .filter(|r| *r > 0.0)
+            .map(|r| (amount / r + RESOURCE_EPSILON).floor() as usize)
+            .fold(amount.ceil() as usize, usize::max)
+    }
+    (
+        get_max_tasks(
+            capacity.cpu,
+            requests.iter().filter(|r| r.gpu == 0.0).map(|r| r.cpu),
+        ),
+        get_max_tasks(capacity.gpu, requests.iter().map(|r| r.gpu)),
+    )
+}
+
 #[derive(Debug, Clone, Hash, PartialEq, Eq, FromPyObject)]
 pub struct TaskSpec {
     pub id: String,
@@ -4,8 +4,10 @@ from ray_data_eval.common.pipeline import three_stage_problem as problem
 import time
 
 start_time = time.time()
-libsolver.solve(problem)
+schedule = libsolver.solve(problem)
 end_time = time.time()
 
 execution_time = end_time - start_time
 print(f"Execution time: {execution_time} seconds")
+schedule.print()
+schedule.to_chrome_trace("output.json")
@@ -0,0 +1,104 @@
+"""
+Benchmark of `steal_map` on the skewed workload of `skew.py`: item i costs i + 1 units of work,
+so with contiguous partitions the last task is the straggler that sets the job's latency.
+
+Ray cluster setting:
+
+ray stop -f && ray start --head --num-cpus=8
+"""
+
+import argparse
+import time
+
+import numpy as np
+import ray
+
+from ray_data_eval.nanobenchmarks.steal_map import StealMapController
+
+DATA_SIZE = 1000 * 200
+
+
+def gen_data(i: int) -> int:
+    data = sum(np.random.rand(DATA_SIZE) for _ in range(i + 1))
+    return data.nbytes
+
+
+@ray.remote
+def map_partition(items: list) -> list:
+    return [gen_data(i) for i in items]
+
+
+def run_baseline(items: list, num_tasks: int) -> tuple[float, list[float]]:
+    """
+    Returns the makespan and the latency of every partition with one plain task per partition.
+    """
+    start = time.perf_counter()
+    refs = [map_partition.remote(list(chunk)) for chunk in np.array_split(items, num_tasks)]
+    latencies = [0.0] * len(refs)
+    pending = list(refs)
+    while pending:
+        ready, pending = ray.wait(pending, num_returns=1)
+        latencies[refs.index(ready[0])] = time.perf_counter() - start
+    ray.get(refs)
+    return time.perf_counter() - start, latencies
+
+
+def run_steal_map(items: list, num_tasks: int, **kwargs) -> tuple[float, list[float], int]:
+    """
+    Returns the makespan, the latency of every partition and the number of steals.
+    """
+    start = time.perf_counter()
+    controller = StealMapController(gen_data, items, num_tasks=num_tasks, **kwargs)
+    controller.run()
+    makespan = time.perf_counter() - start
+    latencies = [partition.finished_at - start for partition in controller.partitions]
+    return makespan, latencies, controller.num_steals
+
+
+def print_stats(name: str, makespans: list[float], latencies: list[float]):
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    print(
+        f"{name}: makespan {np.mean(makespans):.2f}s (+/- {np.std(makespans):.2f}s)",
+        f"partition latency p50 {p50:.2f}s p90 {p90:.2f}s p99 {p99:.2f}s",
+    )
+
+
+def main(args):
+    ray.init("auto")
+    items = list(range(args.size))
+
+    baseline_makespans, baseline_latencies = [], []
+    steal_makespans, steal_latencies, num_steals = [], [], []
+    for trial in range(args.num_trials):
+        makespan, latencies = run_baseline(items, args.num_tasks)
+        baseline_makespans.append(makespan)
+        baseline_latencies.extend(latencies)
+        makespan, latencies, steals = run_steal_map(
+            items,
+            args.num_tasks,
+            straggler_ratio=args.straggler_ratio,
+            poll_interval=args.poll_interval,
+        )
+        steal_makespans.append(makespan)
+        steal_latencies.extend(latencies)
+        num_steals.append(steals)
+        print(f"Trial {trial}: {baseline_makespans[-1]:.2f}s -> {makespan:.2f}s, {steals} steals")
+
+    print_stats("baseline", baseline_makespans, baseline_latencies)
+    print_stats("steal_map", steal_makespans, steal_latencies)
+    print(
+        f"Makespan reduction: {1 - np.mean(steal_makespans) / np.mean(baseline_makespans):.1%}",
+        f"with {np.mean(num_steals):.1f} steals per run",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare work stealing with one task per partition on a skewed map."
+    )
+    parser.add_argument("--size", type=int, default=100, help="Number of items")
+    parser.add_argument("--num-tasks", type=int, default=4, help="Number of partitions")
+    parser.add_argument("--num-trials", type=int, default=3)
+    parser.add_argument("--straggler-ratio", type=float, default=2.0)
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="Seconds")
+    main(parser.parse_args())
@@ -0,0 +1,232 @@
+"""
+Straggler mitigation by work stealing, as proposed in `test_skew_handling.py`.
+
+`steal_map(fn, inputs)` splits the inputs into contiguous partitions and maps each partition in a
+streaming Ray task that yields one output per input, i.e. nano-batches of one item. A central
+controller consumes the outputs and estimates the progress of every task from the time between
+its outputs. Once a task is done and frees a worker, the controller picks the partition whose
+task is slowest, if it is more than `straggler_ratio` times slower than the others, and launches
+a stealing task that maps the rest of the partition in reverse order. The controller merges the
+outputs of both tasks until they meet, then cancels whichever is still running. Tasks never
+need to be told what to skip, so the only messages sent to workers are cancellations.
+
+`fn` must map every input independently of the others, which holds for map tasks but not e.g.
+for reducers.
+"""
+
+import itertools
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import ray
+
+
+@ray.remote(num_returns="streaming")
+def _map_partition(fn: Callable, items: list, reverse: bool):
+    for item in reversed(items) if reverse else items:
+        yield fn(item)
+
+
+@dataclass
+class Partition:
+    # Inputs [start, end) of `steal_map`.
+    start: int
+    end: int
+    started_at: float
+    # Outputs received from the task that maps the partition in order, and from the task that
+    # steals it in reverse order.
+    num_forward: int = 0
+    num_backward: int = 0
+    # Time of the first output of the forward task, before which the task may still be waiting
+    # for a worker.
+    first_output_at: float | None = None
+    stolen_at: float | None = None
+    finished_at: float | None = None
+    # Streaming generators of the tasks that are still running.
+    generators: list = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+    @property
+    def num_remaining(self) -> int:
+        return self.size - self.num_forward - self.num_backward
+
+    def get_seconds_per_item(self, now: float) -> float | None:
+        """
+        Returns the average time between outputs of the forward task, or None before its first
+        output, since a task that has not started yet is not slow. Until the next output, this
+        is a lower bound, so that a task stuck on an item is also a straggler.
+        """
+        if self.first_output_at is None:
+            return None
+        end = now if self.finished_at is None else self.finished_at
+        return (end - self.first_output_at) / max(self.num_forward - 1, 1)
+
+
+class StealMapController:
+    """
+    Runs `steal_map`, and keeps the timing of every partition for benchmarks.
+    """
+
+    def __init__(
+        self,
+        fn: Callable,
+        inputs: list,
+        *,
+        num_tasks: int,
+        straggler_ratio: float = 2.0,
+        min_items_to_steal: int = 2,
+        poll_interval: float = 0.1,
+        remote_args: dict | None = None,
+    ):
+        """
+        :param fn: Function applied to every input.
+        :param inputs: Inputs, split into `num_tasks` contiguous partitions.
+        :param num_tasks: Number of partitions, which is also the number of tasks that run at
+            once: a stealing task only starts once another task is done.
+        :param straggler_ratio: A task is a straggler if its time per output is more than this
+            many times the average of the other tasks.
+        :param min_items_to_steal: Partitions with fewer inputs left are not stolen.
+        :param poll_interval: Seconds between straggler checks while no output arrives.
+        :param remote_args: Options of the map tasks, e.g. `{"num_cpus": 1}`.
+        """
+        self.fn = fn
+        self.inputs = inputs
+        self.num_tasks = num_tasks
+        self.straggler_ratio = straggler_ratio
+        self.min_items_to_steal = min_items_to_steal
+        self.poll_interval = poll_interval
+        self.remote_args = remote_args or {}
+        self.partitions: list[Partition] = []
+        self.num_steals = 0
+        self._outputs: list[ray.ObjectRef | None] = [None] * len(inputs)
+        # The partition of each running generator, and whether it runs in reverse.
+        self._generators: dict[Any, tuple[Partition, bool]] = {}
+
+    def _launch(self, partition: Partition, reverse: bool):
+        # The stealing task only gets the inputs that the forward task has not mapped yet.
+        items = self.inputs[partition.start + partition.num_forward : partition.end]
+        generator = _map_partition.options(**self.remote_args).remote(self.fn, items, reverse)
+        partition.generators.append(generator)
+        self._generators[generator] = (partition, reverse)
+
+    def _finish(self, partition: Partition, now: float):
+        partition.finished_at = now
+        for generator in partition.generators:
+            if generator in self._generators:
+                del self._generators[generator]
+                ray.cancel(generator)
+        partition.generators = []
+
+    def _on_output(self, generator, ref: ray.ObjectRef, now: float):
+        partition, reverse = self._generators[generator]
+        if reverse:
+            idx = partition.end - 1 - partition.num_backward
+            partition.num_backward += 1
+        else:
+            idx = partition.start + partition.num_forward
+            if partition.num_forward == 0:
+                partition.first_output_at = now
+            partition.num_forward += 1
+        self._outputs[idx] = ref
+        if partition.num_remaining == 0:
+            logging.info(f"Partition [{partition.start}, {partition.end}) is done")
+            self._finish(partition, now)
+
+    def _get_straggler(self, now: float) -> Partition | None:
+        """
+        Returns the slowest partition that is worth stealing, or None if no task is a straggler.
+        """
+        # Partitions without outputs yet are neither compared nor stolen.
+        rates = {
+            id(partition): rate
+            for partition in self.partitions
+            if (rate := partition.get_seconds_per_item(now)) is not None
+        }
+        # Right after its first output, a task looks infinitely fast, so tasks are only
+        # compared with the tasks that have produced at least two outputs.
+        measured = {
+            id(partition): rates[id(partition)]
+            for partition in self.partitions
+            if partition.num_forward >= 2
+        }
+
+        def is_straggler(partition: Partition) -> bool:
+            others = [rate for pid, rate in measured.items() if pid != id(partition)]
+            return bool(others) and rates[id(partition)] > self.straggler_ratio * np.mean(others)
+
+        candidates = [
+            partition
+            for partition in self.partitions
+            if id(partition) in rates
+            and partition.finished_at is None
+            and partition.stolen_at is None
+            and partition.num_remaining >= self.min_items_to_steal
+            and is_straggler(partition)
+        ]
+        return max(
+            candidates,
+            key=lambda partition: rates[id(partition)] * partition.num_remaining,
+            default=None,
+        )
+
+    def _maybe_steal(self, now: float):
+        while len(self._generators) < self.num_tasks:
+            straggler = self._get_straggler(now)
+            if straggler is None:
+                return
+            logging.info(
+                f"Stealing {straggler.num_remaining} items of partition "
+                f"[{straggler.start}, {straggler.end}) in reverse"
+            )
+            straggler.stolen_at = now
+            self.num_steals += 1
+            self._launch(straggler, reverse=True)
+
+    def run(self) -> list:
+        """
+        Returns the outputs of `fn`, in input order.
+        """
+        start = time.perf_counter()
+        bounds = np.linspace(0, len(self.inputs), self.num_tasks + 1).astype(int)
+        for lo, hi in itertools.pairwise(bounds):
+            if hi > lo:
+                partition = Partition(start=lo, end=hi, started_at=time.perf_counter())
+                self.partitions.append(partition)
+                self._launch(partition, reverse=False)
+
+        while self._generators:
+            ready, _ = ray.wait(list(self._generators), num_returns=1, timeout=self.poll_interval)
+            now = time.perf_counter()
+            for generator in ready:
+                if generator not in self._generators:
+                    # Cancelled while handling another output.
+                    continue
+                try:
+                    ref = next(generator)
+                except StopIteration:
+                    del self._generators[generator]
+                    continue
+                self._on_output(generator, ref, now)
+            self._maybe_steal(now)
+
+        assert all(ref is not None for ref in self._outputs)
+        logging.info(
+            f"Mapped {len(self.inputs)} items in {time.perf_counter() - start:.2f}s "
+            f"with {self.num_steals} steals"
+        )
+        return ray.get(self._outputs)
+
+
+def steal_map(fn: Callable, inputs: list, *, num_tasks: int, **kwargs) -> list:
+    """
+    Returns `[fn(x) for x in inputs]`, computed by `num_tasks` Ray tasks with work stealing from
+    stragglers. See `StealMapController` for the options.
+    """
+    return StealMapController(fn, inputs, num_tasks=num_tasks, **kwargs).run()
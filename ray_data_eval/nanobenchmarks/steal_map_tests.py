@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+ray = pytest.importorskip("ray")
+steal_map = pytest.importorskip("ray_data_eval.nanobenchmarks.steal_map")
+
+
+@pytest.fixture(scope="module")
+def ray_cluster():
+    ray.init(num_cpus=2)
+    yield
+    ray.shutdown()
+
+
+def test_steal_map(ray_cluster):
+    num_items = 40
+
+    # Defined here so that it is pickled by value: workers cannot import this module.
+    def sleep_and_double(i: int) -> int:
+        # The second half of the inputs is 10 times slower, so the second task is a straggler.
+        time.sleep(0.1 if i >= num_items // 2 else 0.01)
+        return 2 * i
+
+    controller = steal_map.StealMapController(sleep_and_double, list(range(num_items)), num_tasks=2)
+    assert controller.run() == [2 * i for i in range(num_items)]
+    assert controller.num_steals >= 1
+    fast, slow = controller.partitions
+    assert fast.stolen_at is None
+    assert slow.stolen_at is not None and slow.num_backward > 0
+
+
+def test_steal_map_queued_tasks(ray_cluster):
+    def sleep_and_double(i: int) -> int:
+        time.sleep(0.05)
+        return 2 * i
+
+    # Twice as many tasks as CPUs: the tasks that wait for a worker are not stragglers. They
+    # would be many times slower than the others if the wait counted, so a high ratio only
+    # ignores the jitter of the first outputs.
+    controller = steal_map.StealMapController(
+        sleep_and_double, list(range(40)), num_tasks=4, straggler_ratio=4
+    )
+    assert controller.run() == [2 * i for i in range(40)]
+    assert controller.num_steals == 0
@@ -0,0 +1,116 @@
+import argparse
+import itertools
+import logging
+
+from ray_data_eval.common.pipeline import (
+    ActorPoolSpec,
+    OperatorSpec,
+    ResourcesSpec,
+    SchedulingProblem,
+)
+from ray_data_eval.simulator.policies import ActorPoolAutoscalingPolicy
+from ray_data_eval.simulator.sweep import SweepJob, run_sweep
+
+
+def make_inference_problem(
+    *,
+    num_cpus: int,
+    num_gpus: int,
+    num_batches: int,
+    preprocess_duration: int,
+    inference_duration: int,
+    actor_pool: ActorPoolSpec,
+    buffer_size_limit: int,
+) -> SchedulingProblem:
+    """
+    The batch inference workloads of this repo: CPU tasks that read and preprocess a batch each,
+    and a GPU model, e.g. `Classifier`, that runs on a pool of actors.
+    """
+    return SchedulingProblem(
+        [
+            OperatorSpec(
+                name="P",
+                operator_idx=0,
+                num_tasks=num_batches,
+                duration=preprocess_duration,
+                input_size=0,
+                output_size=1,
+                resources=ResourcesSpec(cpu=1),
+            ),
+            OperatorSpec(
+                name="I",
+                operator_idx=1,
+                num_tasks=num_batches,
+                duration=inference_duration,
+                input_size=1,
+                output_size=0,
+                resources=ResourcesSpec(gpu=1),
+                actor_pool=actor_pool,
+            ),
+        ],
+        name="inference",
+        resources=ResourcesSpec(cpu=num_cpus, gpu=num_gpus),
+        time_limit=num_batches * (preprocess_duration + inference_duration)
+        + actor_pool.startup_duration,
+        buffer_size_limit=buffer_size_limit,
+    )
+
+
+def main(args):
+    logging.disable(logging.CRITICAL)
+    configs = [
+        (min_size, max_size, startup_duration)
+        for min_size, max_size, startup_duration in itertools.product(
+            args.min_sizes, args.max_sizes, args.startup_durations
+        )
+        if min_size <= max_size
+    ]
+    jobs = [
+        SweepJob(
+            make_inference_problem(
+                num_cpus=args.num_cpus,
+                num_gpus=args.num_gpus,
+                num_batches=args.num_batches,
+                preprocess_duration=args.preprocess_duration,
+                inference_duration=args.inference_duration,
+                actor_pool=ActorPoolSpec(
+                    min_size=min_size,
+                    max_size=max_size,
+                    startup_duration=startup_duration,
+                    idle_timeout=args.idle_timeout,
+                ),
+                buffer_size_limit=args.buffer_size_limit,
+            ),
+            ActorPoolAutoscalingPolicy,
+        )
+        for min_size, max_size, startup_duration in configs
+    ]
+    rows = run_sweep(jobs, cache_dir=args.cache_dir, num_workers=args.num_workers)
+    for (min_size, max_size, startup_duration), row in zip(configs, rows, strict=True):
+        print(
+            f"concurrency=({min_size}, {max_size})",
+            f"startup={startup_duration}",
+            "Finished" if row["finished"] else "Not finished",
+            row["makespan"],
+            f"actor_ticks_wasted={row['actor_ticks_wasted']}",
+            f"time_to_first_output={row['time_to_first_output']}",
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Size the actor pool of a batch inference job in the simulator."
+    )
+    parser.add_argument("--num-cpus", type=int, default=8)
+    parser.add_argument("--num-gpus", type=int, default=4)
+    parser.add_argument("--num-batches", type=int, default=32)
+    parser.add_argument("--preprocess-duration", type=int, default=2, help="Ticks per batch")
+    parser.add_argument("--inference-duration", type=int, default=1, help="Ticks per batch")
+    parser.add_argument("--buffer-size-limit", type=int, default=16)
+    parser.add_argument("--min-sizes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--max-sizes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--startup-durations", type=float, nargs="+", default=[0, 5, 10])
+    parser.add_argument("--idle-timeout", type=float, default=5, help="Ticks")
+    parser.add_argument("--cache-dir", help="Directory of cached simulation results")
+    parser.add_argument("--num-workers", type=int)
+    main(parser.parse_args())
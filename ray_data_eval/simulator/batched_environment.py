@@ -0,0 +1,403 @@
+import dataclasses
+import itertools
+import logging
+
+import numpy as np
+
+from ray_data_eval.common.pipeline import (
+    OperatorSpec,
+    ResourcesSpec,
+    SchedulingProblem,
+    e2e_problem3,
+)
+from ray_data_eval.simulator.environment import SchedulingPolicy
+from ray_data_eval.simulator.policies import (
+    ConcurrencyCapPolicy,
+    DelayPolicy,
+    GreedyPolicy,
+    GreedyWithBufferPolicy,
+)
+
+# Resource types of operators and executors.
+_CPU = 0
+_GPU = 1
+_ANY = 2
+_NO_EXECUTOR = -1
+
+_IDLE = -1
+_UNLIMITED = np.iinfo(np.int64).max
+
+
+def _get_resource_type(resources: ResourcesSpec) -> int:
+    # Each task takes a whole executor; resource vectors are not packed.
+    assert (resources.cpu, resources.gpu) in [(0, 0), (1, 0), (0, 1)], resources
+    if resources.cpu > 0:
+        return _CPU
+    if resources.gpu > 0:
+        return _GPU
+    return _ANY
+
+
+def _assert_supported(problem: SchedulingProblem):
+    # The batched engine only simulates the nominal operator fields, on whole executors.
+    assert problem.spill is None, problem.name
+    assert all(
+        amount == int(amount) for amount in (problem.resources.cpu, problem.resources.gpu)
+    ), (problem.name, problem.resources)
+    for op in problem.operators:
+        assert op.duration == int(op.duration), (problem.name, op.name, op.duration)
+        assert op.duration_distribution is None and op.output_size_distribution is None, (
+            problem.name,
+            op.name,
+        )
+        assert op.output_delay == 0, (problem.name, op.name)
+        assert op.actor_pool is None and op.batch_cost is None, (problem.name, op.name)
+    # Tasks edited after the operators were built, e.g. by `SchedulingProblem.sample`.
+    nominal = dataclasses.replace(
+        problem, operators=[dataclasses.replace(op) for op in problem.operators]
+    )
+    assert problem.tasks == nominal.tasks, problem.name
+
+
+class BatchedSchedulingPolicy:
+    """
+    Vectorized version of a rule-based `SchedulingPolicy`, applied to a subset of the scenarios
+    of a `BatchedExecutionEnvironment`.
+    """
+
+    def __init__(self, env: "BatchedExecutionEnvironment", scenarios: np.ndarray):
+        self.scenarios = scenarios
+
+    def get_start_limit(self, env: "BatchedExecutionEnvironment", op: int) -> np.ndarray:
+        """
+        Called once per operator per tick, downstream operators first. Returns the maximum
+        number of tasks of `op` to start in each scenario.
+        """
+        return np.full(len(self.scenarios), _UNLIMITED)
+
+    def on_tasks_started(self, env: "BatchedExecutionEnvironment", op: int, num_started):
+        pass
+
+    def on_tasks_finished(self, env: "BatchedExecutionEnvironment", ops, finished):
+        """
+        `ops` holds the operator of one task per scenario, `finished` whether it finished.
+        """
+
+
+class BatchedGreedyPolicy(BatchedSchedulingPolicy):
+    pass
+
+
+class BatchedGreedyWithBufferPolicy(BatchedSchedulingPolicy):
+    def __init__(self, env: "BatchedExecutionEnvironment", scenarios: np.ndarray):
+        super().__init__(env, scenarios)
+        self._cumulative_output_size = np.zeros(len(scenarios), dtype=np.int64)
+
+    def get_start_limit(self, env: "BatchedExecutionEnvironment", op: int) -> np.ndarray:
+        s = self.scenarios
+        output_size = env.output_size[s, op]
+        net_output_size = output_size - env.input_size[s, op]
+        # Each start adds `output_size`, and is only allowed if `net_output_size` still fits.
+        room = env.buffer_size_limit[s] - self._cumulative_output_size - net_output_size
+        num_allowed = np.where(room >= 0, room // np.maximum(output_size, 1) + 1, 0)
+        return np.where(net_output_size > 0, num_allowed, _UNLIMITED)
+
+    def on_tasks_started(self, env: "BatchedExecutionEnvironment", op: int, num_started):
+        self._cumulative_output_size += num_started * env.output_size[self.scenarios, op]
+
+    def on_tasks_finished(self, env: "BatchedExecutionEnvironment", ops, finished):
+        s = self.scenarios
+        self._cumulative_output_size -= np.where(finished, env.input_size[s, ops], 0)
+
+
+class BatchedConcurrencyCapPolicy(BatchedSchedulingPolicy):
+    def __init__(self, env: "BatchedExecutionEnvironment", scenarios: np.ndarray):
+        super().__init__(env, scenarios)
+        self.max_first_op_num_tasks = env.buffer_size_limit[scenarios] / env.output_size[
+            scenarios, 0
+        ].astype(float)
+
+    def get_start_limit(self, env: "BatchedExecutionEnvironment", op: int) -> np.ndarray:
+        if op != 0:
+            return super().get_start_limit(env, op)
+        num_running = env.num_running[self.scenarios, 0]
+        return np.maximum(np.ceil(self.max_first_op_num_tasks - num_running), 0).astype(np.int64)
+
+
+class BatchedDelayPolicy(BatchedSchedulingPolicy):
+    def __init__(self, env: "BatchedExecutionEnvironment", scenarios: np.ndarray):
+        super().__init__(env, scenarios)
+        self._delays = np.full((len(scenarios), env.num_executors.max()), np.inf)
+        for i, s in enumerate(scenarios):
+            max_first_op_num_tasks = env.buffer_size_limit[s] / env.output_size[s, 0]
+            self._delays[i, : env.num_executors[s]] = sorted(
+                j % max_first_op_num_tasks for j in range(env.num_executors[s])
+            )
+        self._num_delays = env.num_executors[scenarios].copy()
+        self._next_delay_idx = np.zeros(len(scenarios), dtype=np.int64)
+
+    def get_start_limit(self, env: "BatchedExecutionEnvironment", op: int) -> np.ndarray:
+        if op != 0:
+            return super().get_start_limit(env, op)
+        # Every pending task pops a delay that has passed, and tries to start. Tasks are only
+        # held back while some delays have not passed yet.
+        num_pending = env.num_pending[self.scenarios, 0]
+        num_passed = (self._delays <= env.current_tick).sum(axis=1) - self._next_delay_idx
+        num_passed = np.maximum(num_passed, 0)
+        num_popped = np.minimum(num_pending, num_passed)
+        self._next_delay_idx += num_popped
+        exhausted = self._next_delay_idx == self._num_delays
+        return np.where(exhausted, num_pending, num_popped)
+
+
+BATCHED_POLICIES: dict[type[SchedulingPolicy], type[BatchedSchedulingPolicy]] = {
+    GreedyPolicy: BatchedGreedyPolicy,
+    GreedyWithBufferPolicy: BatchedGreedyWithBufferPolicy,
+    ConcurrencyCapPolicy: BatchedConcurrencyCapPolicy,
+    DelayPolicy: BatchedDelayPolicy,
+}
+
+
+class BatchedExecutionEnvironment:
+    """
+    Simulates many scheduling problems at once, each with its own policy.
+
+    The state is kept as NumPy arrays with a leading scenario dimension: the running operator
+    and remaining ticks of every executor, per-operator task counts, and buffer levels. All
+    scenarios advance one tick together, following the same rules as `ExecutionEnvironment`,
+    so the results match the object simulator for the supported policies (`BATCHED_POLICIES`).
+    All problems must have the same number of operators, integer task durations and machine
+    resources, and no spill tier. Only the nominal operator fields are simulated: distributions,
+    output delays, actor pools, batching and edited task lists are not supported.
+    """
+
+    def __init__(
+        self,
+        problems: list[SchedulingProblem],
+        policies: list[type[SchedulingPolicy]] | type[SchedulingPolicy],
+    ):
+        if not isinstance(policies, list):
+            policies = [policies] * len(problems)
+        assert len(problems) == len(policies), (len(problems), len(policies))
+        num_operators = {problem.num_operators for problem in problems}
+        assert len(num_operators) == 1, num_operators
+        for problem in problems:
+            _assert_supported(problem)
+
+        self.problems = problems
+        self.num_scenarios = len(problems)
+        self.num_operators = num_operators.pop()
+
+        def _operator_array(attr: str) -> np.ndarray:
+            return np.array(
+                [[getattr(op, attr) for op in problem.operators] for problem in problems],
+                dtype=np.int64,
+            )
+
+        self.num_tasks = _operator_array("num_tasks")
+        self.duration = _operator_array("duration")
+        self.input_size = _operator_array("input_size")
+        self.output_size = _operator_array("output_size")
+        self.resource_type = np.array(
+            [[_get_resource_type(op.resources) for op in problem.operators] for problem in problems]
+        )
+        self.buffer_size_limit = np.array([p.buffer_size_limit for p in problems], dtype=np.int64)
+        self.time_limit = np.array([p.time_limit for p in problems], dtype=np.int64)
+        self.num_executors = np.array([p.resources.num_executors for p in problems])
+
+        shape = (self.num_scenarios, self.num_executors.max())
+        self.executor_resource = np.full(shape, _NO_EXECUTOR)
+        for s, problem in enumerate(problems):
+            cpu, gpu = int(problem.resources.cpu), int(problem.resources.gpu)
+            self.executor_resource[s, :cpu] = _CPU
+            self.executor_resource[s, cpu : cpu + gpu] = _GPU
+
+        # Executor state.
+        self.executor_op = np.full(shape, _IDLE)
+        self.remaining_ticks = np.zeros(shape, dtype=np.int64)
+        self.executor_blocked = np.zeros(shape, dtype=bool)
+        # Operator state.
+        self.num_pending = self.num_tasks.copy()
+        self.num_running = np.zeros_like(self.num_tasks)
+        self.num_pending_output = np.zeros_like(self.num_tasks)
+        self.num_finished = np.zeros_like(self.num_tasks)
+        # Buffer state. Consumable items are indexed by their producing operator.
+        self.buffer_size = np.zeros(self.num_scenarios, dtype=np.int64)
+        self.num_consumable = np.zeros_like(self.num_tasks)
+        # Metrics.
+        self.current_tick = 0
+        self.finished_at = np.full(self.num_scenarios, -1)
+        self.peak_buffer_size = np.zeros(self.num_scenarios, dtype=np.int64)
+        self.busy_executor_ticks = np.zeros(self.num_scenarios, dtype=np.int64)
+
+        self._policies = []
+        for policy_cls in dict.fromkeys(policies):
+            if policy_cls not in BATCHED_POLICIES:
+                raise NotImplementedError(f"{policy_cls.__name__} has no batched version")
+            scenarios = np.array([s for s, p in enumerate(policies) if p is policy_cls])
+            self._policies.append(BATCHED_POLICIES[policy_cls](self, scenarios))
+
+    def __repr__(self):
+        return f"BatchedExecutionEnvironment({self.num_scenarios})@{self.current_tick}"
+
+    def _get_active_scenarios(self) -> np.ndarray:
+        return (self.finished_at < 0) & (self.current_tick < self.time_limit)
+
+    def _start_tasks(self, active: np.ndarray):
+        rows = np.arange(self.num_scenarios)
+        # Downstream operators first, in the order of `SchedulingProblem.tasks`.
+        for op in reversed(range(self.num_operators)):
+            resource_type = self.resource_type[:, op, None]
+            free = (self.executor_op == _IDLE) & (
+                (self.executor_resource == resource_type)
+                | ((resource_type == _ANY) & (self.executor_resource != _NO_EXECUTOR))
+            )
+            num_started = np.where(active, self.num_pending[:, op], 0)
+            num_started = np.minimum(num_started, free.sum(axis=1))
+            if op > 0:
+                input_size = self.input_size[:, op]
+                num_inputs = self.num_consumable[:, op - 1] // np.maximum(input_size, 1)
+                num_started = np.where(
+                    input_size > 0, np.minimum(num_started, num_inputs), num_started
+                )
+            for policy in self._policies:
+                s = policy.scenarios
+                num_started[s] = np.minimum(num_started[s], policy.get_start_limit(self, op))
+            # Take the first free executors, like `start_task_on_any_executor`.
+            started = free & (np.cumsum(free, axis=1) <= num_started[:, None])
+            self.executor_op[started] = op
+            self.remaining_ticks[started] = np.broadcast_to(
+                self.duration[:, op, None], started.shape
+            )[started]
+            self.num_pending[:, op] -= num_started
+            self.num_running[:, op] += num_started
+            if op > 0:
+                self.num_consumable[rows, op - 1] -= num_started * self.input_size[:, op]
+            for policy in self._policies:
+                policy.on_tasks_started(self, op, num_started[policy.scenarios])
+
+    def _tick_executors(self, active: np.ndarray):
+        rows = np.arange(self.num_scenarios)
+        running = (self.executor_op != _IDLE) & active[:, None]
+        self.busy_executor_ticks += (running & ~self.executor_blocked).sum(axis=1)
+        self.remaining_ticks[running] -= 1
+        done = running & (self.remaining_ticks <= 0)
+        ops = np.maximum(self.executor_op, 0)
+        input_size = np.take_along_axis(self.input_size, ops, axis=1)
+        output_size = np.take_along_axis(self.output_size, ops, axis=1)
+        # Same order as `ExecutionEnvironment._get_executors_sorted`.
+        index = np.broadcast_to(np.arange(done.shape[1]), done.shape)
+        order = np.lexsort((index, self.remaining_ticks, output_size - input_size, ~done), axis=1)
+        for k in range(done.shape[1]):
+            e = order[:, k]
+            trying = done[rows, e]
+            if not trying.any():
+                break
+            op = ops[rows, e]
+            inp, out = input_size[rows, e], output_size[rows, e]
+            available = self.buffer_size_limit - self.buffer_size
+            finished = trying & ((out == 0) | (available >= out - inp))
+            newly_blocked = trying & ~finished & ~self.executor_blocked[rows, e]
+            was_blocked = finished & self.executor_blocked[rows, e]
+
+            self.buffer_size += np.where(finished, out - inp, 0)
+            self.num_consumable[rows, op] += np.where(finished, out, 0)
+            self.num_running[rows, op] -= newly_blocked | (finished & ~was_blocked)
+            self.num_pending_output[rows, op] += newly_blocked
+            self.num_pending_output[rows, op] -= was_blocked
+            self.num_finished[rows, op] += finished
+            self.executor_blocked[rows, e] = trying & ~finished
+            self.executor_op[rows[finished], e[finished]] = _IDLE
+            for policy in self._policies:
+                s = policy.scenarios
+                policy.on_tasks_finished(self, op[s], finished[s])
+
+    def tick(self):
+        active = self._get_active_scenarios()
+        self._start_tasks(active)
+        self.current_tick += 1
+        self._tick_executors(active)
+        self.peak_buffer_size = np.maximum(self.peak_buffer_size, self.buffer_size)
+        all_finished = (self.num_finished == self.num_tasks).all(axis=1)
+        self.finished_at[active & all_finished] = self.current_tick
+
+    def run(self) -> np.ndarray:
+        """
+        Ticks until every scenario has finished or reached its time limit.
+        Returns whether each scenario finished.
+        """
+        while self._get_active_scenarios().any():
+            self.tick()
+        return self.finished_at >= 0
+
+    def get_makespans(self) -> np.ndarray:
+        return np.where(self.finished_at >= 0, self.finished_at, self.time_limit)
+
+    def get_utilization(self) -> np.ndarray:
+        return self.busy_executor_ticks / (self.num_executors * self.get_makespans())
+
+
+def make_problem_grid(
+    problem: SchedulingProblem,
+    *,
+    buffer_size_limits: list[int] | None = None,
+    num_cpus: list[int] | None = None,
+    producer_durations: list[int] | None = None,
+) -> list[SchedulingProblem]:
+    """
+    Returns the variants of `problem` for every combination of the given buffer size limits,
+    CPU counts and durations of the first operator.
+    """
+    grid = itertools.product(
+        buffer_size_limits or [problem.buffer_size_limit],
+        num_cpus or [problem.resources.cpu],
+        producer_durations or [problem.operators[0].duration],
+    )
+    problems = []
+    for buffer_size_limit, cpu, producer_duration in grid:
+        operators = [
+            OperatorSpec(
+                name=op.name,
+                operator_idx=op.operator_idx,
+                num_tasks=op.num_tasks,
+                duration=producer_duration if op.operator_idx == 0 else op.duration,
+                input_size=op.input_size,
+                output_size=op.output_size,
+                resources=op.resources,
+            )
+            for op in problem.operators
+        ]
+        problems.append(
+            SchedulingProblem(
+                operators,
+                name=f"{problem.name}_b{buffer_size_limit}_c{cpu}_d{producer_duration}",
+                resources=dataclasses.replace(problem.resources, cpu=cpu),
+                time_limit=problem.time_limit,
+                buffer_size_limit=buffer_size_limit,
+            )
+        )
+    return problems
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    problems = make_problem_grid(
+        e2e_problem3,
+        buffer_size_limits=list(range(10, 110, 10)),
+        num_cpus=list(range(2, 17, 2)),
+        producer_durations=list(range(2, 21, 2)),
+    )
+    for policy_cls in BATCHED_POLICIES:
+        env = BatchedExecutionEnvironment(problems, policy_cls)
+        env.run()
+        makespans = env.get_makespans()
+        best = np.argmin(makespans)
+        print(
+            f"{policy_cls.__name__}: {len(problems)} scenarios, "
+            f"mean makespan {makespans.mean():.1f}, "
+            f"best {problems[best].name} ({makespans[best]})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import itertools
+import logging
+
+from ray_data_eval.common.pipeline import (
+    BatchCostSpec,
+    OperatorSpec,
+    ResourcesSpec,
+    SchedulingProblem,
+)
+from ray_data_eval.simulator.policies import DynamicBatchingPolicy
+from ray_data_eval.simulator.sweep import SweepJob, run_sweep
+
+
+def make_batched_inference_problem(
+    *,
+    num_cpus: int,
+    num_gpus: int,
+    num_items: int,
+    preprocess_duration: float,
+    batch_cost: BatchCostSpec,
+    buffer_size_limit: int,
+) -> SchedulingProblem:
+    """
+    CPU tasks that preprocess an item each, e.g. the frames of a video, and a GPU model that
+    infers on batches of items with the given cost model.
+    """
+    return SchedulingProblem(
+        [
+            OperatorSpec(
+                name="P",
+                operator_idx=0,
+                num_tasks=num_items,
+                duration=preprocess_duration,
+                input_size=0,
+                output_size=1,
+                resources=ResourcesSpec(cpu=1),
+            ),
+            OperatorSpec(
+                name="I",
+                operator_idx=1,
+                num_tasks=num_items,
+                duration=batch_cost.get_duration(1),
+                input_size=1,
+                output_size=0,
+                resources=ResourcesSpec(gpu=1),
+                batch_cost=batch_cost,
+            ),
+        ],
+        name="batched_inference",
+        resources=ResourcesSpec(cpu=num_cpus, gpu=num_gpus),
+        time_limit=num_items * (preprocess_duration + batch_cost.get_duration(1)),
+        buffer_size_limit=buffer_size_limit,
+    )
+
+
+def main(args):
+    logging.disable(logging.CRITICAL)
+    problem = make_batched_inference_problem(
+        num_cpus=args.num_cpus,
+        num_gpus=args.num_gpus,
+        num_items=args.num_items,
+        preprocess_duration=args.preprocess_duration,
+        batch_cost=BatchCostSpec(
+            overhead=args.overhead,
+            per_task_duration=args.per_item_duration,
+            max_batch_size=max(args.max_batch_sizes),
+        ),
+        buffer_size_limit=args.buffer_size_limit,
+    )
+    configs = list(itertools.product(args.max_batch_sizes, args.max_delays))
+    jobs = [
+        SweepJob(
+            problem,
+            DynamicBatchingPolicy,
+            params={"max_batch_size": max_batch_size, "max_delay": max_delay},
+        )
+        for max_batch_size, max_delay in configs
+    ]
+    rows = run_sweep(jobs, cache_dir=args.cache_dir, num_workers=args.num_workers)
+    for (max_batch_size, max_delay), row in zip(configs, rows, strict=True):
+        print(
+            f"max_batch_size={max_batch_size}",
+            f"max_delay={max_delay}",
+            "Finished" if row["finished"] else "Not finished",
+            row["makespan"],
+            f"time_to_first_output={row['time_to_first_output']}",
+            f"utilization={row['utilization']:.2f}",
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Trade latency against GPU throughput with DynamicBatchingPolicy."
+    )
+    parser.add_argument("--num-cpus", type=int, default=8)
+    parser.add_argument("--num-gpus", type=int, default=1)
+    parser.add_argument("--num-items", type=int, default=128)
+    parser.add_argument("--preprocess-duration", type=float, default=1, help="Ticks per item")
+    parser.add_argument("--overhead", type=float, default=2, help="Ticks per batch")
+    parser.add_argument("--per-item-duration", type=float, default=0.25, help="Ticks per item")
+    parser.add_argument("--buffer-size-limit", type=int, default=64)
+    parser.add_argument("--max-batch-sizes", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--max-delays", type=float, nargs="+", default=[0, 1, 4])
+    parser.add_argument("--cache-dir", help="Directory of cached simulation results")
+    parser.add_argument("--num-workers", type=int)
+    main(parser.parse_args())
@@ -1,8 +1,25 @@
+import argparse
 import logging
+from dataclasses import replace
 
-from ray_data_eval.common.pipeline import problems
-from ray_data_eval.simulator.environment import ExecutionEnvironment
+from ray_data_eval.common.pipeline import SpillSpec, problems
 from ray_data_eval.simulator.policies import (
+    ActorPoolAutoscalingPolicy,
+    AIMDBackpressurePolicy,
+    ConcurrencyCapPolicy,
+    DelayPolicy,
+    GreedyOracleConsumerFirstPolicy,
+    GreedyOracleProducerFirstPolicy,
+    GreedyPolicy,
+    GreedyWithBufferPolicy,
+    ModelPredictivePolicy,
+    PIDBackpressurePolicy,
+    RatesEqualizingPolicy,
+    SpeculativeExecutionPolicy,
+)
+from ray_data_eval.simulator.sweep import SweepJob, run_sweep
+
+POLICIES = [
     GreedyPolicy,
     GreedyWithBufferPolicy,
     GreedyOracleProducerFirstPolicy,
@@ -10,41 +27,74 @@ from ray_data_eval.simulator.policies import (
     RatesEqualizingPolicy,
     ConcurrencyCapPolicy,
     DelayPolicy,
-)
+    AIMDBackpressurePolicy,
+    PIDBackpressurePolicy,
+    ModelPredictivePolicy,
+    ActorPoolAutoscalingPolicy,
+    SpeculativeExecutionPolicy,
+]
 
 
-def main():
+def main(args):
     logging.disable(logging.CRITICAL)
+    spill = None
+    if args.spill_capacity > 0:
+        spill = SpillSpec(
+            capacity=args.spill_capacity,
+            write_bandwidth=args.spill_write_bandwidth,
+            read_bandwidth=args.spill_read_bandwidth,
+            restore_latency=args.spill_restore_latency,
+        )
+    jobs = [
+        SweepJob(
+            replace(problem, spill=spill),
+            policy_cls,
+            streaming=args.streaming,
+            event_driven=args.event_driven,
+        )
+        for problem in problems
+        for policy_cls in POLICIES
+    ]
+    rows = run_sweep(
+        jobs,
+        cache_dir=args.cache_dir,
+        output_path=args.output,
+        num_workers=args.num_workers,
+    )
     for problem in problems:
         print("Problem:", problem.name)
-        for policy in [
-            GreedyPolicy(problem),
-            GreedyWithBufferPolicy(problem),
-            GreedyOracleProducerFirstPolicy(problem),
-            GreedyOracleConsumerFirstPolicy(problem),
-            RatesEqualizingPolicy(problem),
-            ConcurrencyCapPolicy(problem),
-            DelayPolicy(problem),
-        ]:
-            env = ExecutionEnvironment(
-                resources=problem.resources,
-                buffer_size=problem.buffer_size_limit,
-                tasks=problem.tasks,
-                scheduling_policy=policy,
-            )
-
-            used_time = 0
-            is_finished = False
-            for _ in range(problem.time_limit):
-                env.tick()
-                used_time += 1
-                if env.check_all_tasks_finished():
-                    is_finished = True
-                    break
-
-            print(str(policy), "Finished" if is_finished else "Not finished", used_time)
+        for row in rows:
+            if row["problem"] == problem.name:
+                status = "Finished" if row["finished"] else "Not finished"
+                line = f"{row['policy']} {status} {row['makespan']}"
+                if spill is not None:
+                    line += f" spilled={row['spilled_items']}"
+                print(line)
         print("---")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--event-driven",
+        action="store_true",
+        help="Use the event-driven engine instead of ticking one tick at a time",
+    )
+    parser.add_argument("--output", help="CSV or Parquet file to write the results to")
+    parser.add_argument("--cache-dir", help="Directory of cached results to reuse")
+    parser.add_argument("--num-workers", type=int, help="Number of worker processes")
+    parser.add_argument(
+        "--spill-capacity", type=int, default=0, help="Items that fit on disk; 0 disables spilling"
+    )
+    parser.add_argument("--spill-write-bandwidth", type=float, default=1, help="Items per tick")
+    parser.add_argument("--spill-read-bandwidth", type=float, default=1, help="Items per tick")
+    parser.add_argument("--spill-restore-latency", type=float, default=0, help="Ticks")
+    parser.add_argument(
+        "--streaming", action="store_true", help="Tasks stream their outputs as they run"
+    )
+    args = parser.parse_args()
+    if args.streaming and args.spill_capacity > 0:
+        parser.error(
+            "--streaming cannot be combined with --spill-capacity: streamed outputs are not spilled"
+        )
+    main(args)
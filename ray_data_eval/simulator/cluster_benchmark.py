@@ -0,0 +1,63 @@
+import argparse
+import logging
+from dataclasses import replace
+
+from ray_data_eval.common.pipeline import SchedulingProblem, make_cluster, three_stage_problem
+from ray_data_eval.infra.config import CONFIGS
+from ray_data_eval.simulator.cluster_environment import EventDrivenClusterExecutionEnvironment
+from ray_data_eval.simulator.policies import (
+    ConcurrencyCapPolicy,
+    DelayPolicy,
+    GreedyPolicy,
+    LocalityAwareGreedyPolicy,
+)
+
+POLICIES = [GreedyPolicy, LocalityAwareGreedyPolicy, ConcurrencyCapPolicy, DelayPolicy]
+
+
+def scale_problem(problem: SchedulingProblem, scale: int, buffer_size_limit: int):
+    return replace(
+        problem,
+        name=f"{problem.name}x{scale}",
+        operators=[replace(op, num_tasks=op.num_tasks * scale) for op in problem.operators],
+        buffer_size_limit=buffer_size_limit,
+        time_limit=problem.time_limit * 10,
+    )
+
+
+def main(args):
+    logging.disable(logging.CRITICAL)
+    for config in CONFIGS:
+        cluster = make_cluster(
+            config.name,
+            object_store_size=args.object_store_size,
+            network_bandwidth=args.network_bandwidth,
+        )
+        # One copy of the workload per GPU node.
+        problem = scale_problem(
+            three_stage_problem, cluster.resources.gpu, cluster.object_store_size
+        )
+        print(f"Cluster: {config.name} ({len(cluster.nodes)} nodes), problem: {problem.name}")
+        for policy_cls in POLICIES:
+            env = EventDrivenClusterExecutionEnvironment(
+                cluster=cluster,
+                tasks=problem.tasks,
+                scheduling_policy=policy_cls(problem),
+            )
+            finished = env.run(problem.time_limit)
+            print(
+                policy_cls.__name__,
+                "Finished" if finished else "Not finished",
+                f"{env._current_tick:.1f}",
+                f"transferred={env.get_num_transferred_items()}",
+            )
+        print("---")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--object-store-size", type=int, default=10, help="Items per node")
+    parser.add_argument(
+        "--network-bandwidth", type=float, default=4, help="Items per tick fetched by each node"
+    )
+    main(parser.parse_args())
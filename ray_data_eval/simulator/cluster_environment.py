@@ -0,0 +1,157 @@
+import logging
+from collections import defaultdict
+
+from ray_data_eval.common.pipeline import (
+    ActorPoolSpec,
+    BatchCostSpec,
+    ClusterSpec,
+    ResourcesSpec,
+    SpillSpec,
+    TaskSpec,
+)
+from ray_data_eval.simulator.environment import (
+    CPU,
+    GPU,
+    Buffer,
+    DataItem,
+    ExecutionEnvironment,
+    Executor,
+    SchedulingPolicy,
+    Tick,
+)
+from ray_data_eval.simulator.event_environment import EventDrivenExecutionEnvironment
+
+
+class ClusterExecutionEnvironment(ExecutionEnvironment):
+    """
+    An execution environment with several nodes, each with its own executors and object store.
+
+    Tasks write their outputs to the object store of their node. Inputs stored on other nodes are
+    fetched before the task starts executing: each node fetches `network_bandwidth` items per
+    tick, one fetch at a time, so the transfer delays the task and queues behind the node's
+    earlier fetches. Inputs stay in their producer's object store until the consumer finishes.
+
+    Policies express locality preferences with `SchedulingPolicy.get_preferred_nodes`.
+    """
+
+    def __init__(
+        self,
+        *,
+        cluster: ClusterSpec,
+        tasks: list[TaskSpec],
+        scheduling_policy: SchedulingPolicy = None,
+        buffer_size: int | None = None,
+        spill: SpillSpec | None = None,
+        actor_pools: dict[int, ActorPoolSpec] | None = None,
+        batch_costs: dict[int, BatchCostSpec] | None = None,
+    ):
+        """
+        :param buffer_size: Total buffer size across nodes. Defaults to the sum of the object
+            store sizes.
+        :param spill: Spill tier shared by all nodes.
+        :param actor_pools: Actor pool of each operator whose tasks run on actors.
+        :param batch_costs: Cost model of each operator whose tasks may run in batches.
+        """
+        self.cluster = cluster
+        super().__init__(
+            resources=cluster.resources,
+            buffer_size=cluster.object_store_size if buffer_size is None else buffer_size,
+            tasks=tasks,
+            scheduling_policy=scheduling_policy,
+            spill=spill,
+            actor_pools=actor_pools,
+            batch_costs=batch_costs,
+        )
+        self.buffer = Buffer(
+            capacity=self.buffer.capacity,
+            node_capacities=[node.object_store_size for node in cluster.nodes],
+            spill_tier=self.buffer.spill_tier,
+        )
+        # Tick at which each node is done with its queued fetches.
+        self._network_free_at: list[Tick] = [0] * len(cluster.nodes)
+        self.num_transferred_items: dict[int, int] = defaultdict(int)
+
+    def __repr__(self):
+        return f"ClusterExecutionEnvironment@{self._current_tick}"
+
+    def _copy_state_from(self, other: "ClusterExecutionEnvironment"):
+        super()._copy_state_from(other)
+        self._network_free_at = other._network_free_at.copy()
+        self.num_transferred_items = other.num_transferred_items.copy()
+
+    def _get_node_capacities(self, _resources) -> list[ResourcesSpec]:
+        return [node.resources for node in self.cluster.nodes]
+
+    def _make_executors(self, _resources) -> list[Executor]:
+        executors = []
+        for i, node in enumerate(self.cluster.nodes):
+            num_cpu_slots, num_gpu_slots = self._get_num_slots(node.resources)
+            executors.extend(
+                self.executor_cls(f"{node.name}/CPU{j}", CPU, self, node=i)
+                for j in range(num_cpu_slots)
+            )
+            executors.extend(
+                self.executor_cls(f"{node.name}/GPU{j}", GPU, self, node=i)
+                for j in range(num_gpu_slots)
+            )
+        return executors
+
+    def _get_transfer_ticks(self, node: int, inputs: list[DataItem]) -> Tick:
+        """
+        Returns the time until the remote inputs are fetched to `node`, including queueing.
+        """
+        num_remote = sum(item.node != node for item in inputs)
+        if num_remote == 0:
+            return 0
+        start = max(self._current_tick, self._network_free_at[node])
+        return start + num_remote / self.cluster.network_bandwidth - self._current_tick
+
+    def _get_running_duration(
+        self, task: TaskSpec, executor: Executor, inputs: list[DataItem], batch_size: int = 1
+    ) -> Tick:
+        return self._get_transfer_ticks(executor.node, inputs) + super()._get_running_duration(
+            task, executor, inputs, batch_size
+        )
+
+    def start_task(
+        self, task: TaskSpec, executor_id: int, batch: tuple[TaskSpec, ...] = ()
+    ) -> bool:
+        if not super().start_task(task, executor_id, batch):
+            return False
+        executor = self._executors[executor_id]
+        # The network queue is unchanged since the running duration was computed.
+        transfer_ticks = self._get_transfer_ticks(executor.node, executor.running_task.inputs)
+        if transfer_ticks > 0:
+            num_remote = sum(item.node != executor.node for item in executor.running_task.inputs)
+            self._network_free_at[executor.node] = self._current_tick + transfer_ticks
+            self.num_transferred_items[executor.node] += num_remote
+            logging.debug(f"[{self}] Fetching {num_remote} items for {task.id}")
+        return True
+
+    def _get_idle_executor_ids(self, task: TaskSpec) -> list[int]:
+        executor_ids = super()._get_idle_executor_ids(task)
+        if self.scheduling_policy is None:
+            return executor_ids
+        preferred_nodes = self.scheduling_policy.get_preferred_nodes(self, task)
+        if preferred_nodes is None:
+            return executor_ids
+        # Executors on preferred nodes first, in order of preference. Sorting is stable.
+        rank = {node: i for i, node in enumerate(preferred_nodes)}
+        return sorted(
+            executor_ids,
+            key=lambda i: rank.get(self._executors[i].node, len(rank)),
+        )
+
+    def get_num_transferred_items(self) -> int:
+        return sum(self.num_transferred_items.values())
+
+
+class EventDrivenClusterExecutionEnvironment(
+    ClusterExecutionEnvironment, EventDrivenExecutionEnvironment
+):
+    """
+    Event-driven version of `ClusterExecutionEnvironment`, which keeps fractional transfer times.
+    """
+
+    def __repr__(self):
+        return f"EventDrivenClusterExecutionEnvironment@{self._current_tick}"
@@ -1,16 +1,41 @@
-from dataclasses import dataclass
+from collections import defaultdict, deque
+import copy
+from dataclasses import dataclass, replace
 from enum import Enum
+import itertools
 import logging
+import math
 
-from ray_data_eval.common.pipeline import ResourcesSpec, SchedulingProblem, TaskSpec
+from ray_data_eval.common.pipeline import (
+    RESOURCE_EPSILON,
+    ActorPoolSpec,
+    BatchCostSpec,
+    ResourcesSpec,
+    SchedulingProblem,
+    SpillSpec,
+    TaskSpec,
+    get_num_slots,
+)
+from ray_data_eval.common.schedule import Schedule, ScheduledTask, get_buffer_levels
 
 Resource = str
-Tick = int
+Tick = int | float
 
 CPU: Resource = "CPU"
 GPU: Resource = "GPU"
 
 
+def get_slot_resource(task: TaskSpec) -> Resource | None:
+    """
+    Returns the type of executor slot that `task` runs on, or None if it runs on any slot.
+    """
+    if task.resources.gpu > 0:
+        return GPU
+    if task.resources.cpu > 0:
+        return CPU
+    return None
+
+
 @dataclass
 class DataItem:
     id: str
@@ -18,68 +43,260 @@ class DataItem:
     block_id: int = 0
     producer: TaskSpec | None = None
     produced_at: Tick = -1
-    consumer: TaskSpec | None = None
-    consumed_at: Tick = -1
+    node: int = 0
+    # Spilled items are read back from disk once they are written, at `restorable_at`.
+    spilled: bool = False
+    restorable_at: Tick = -1
+
+
+class SpillTier:
+    """
+    Local disk that holds the items spilled from a full buffer.
+
+    Writes and reads are each processed one at a time at the configured bandwidth, so a spill
+    or restore waits for the earlier ones. Spilled items stay on disk until their consumer
+    finishes, like items in the buffer.
+    """
+
+    def __init__(self, spec: SpillSpec):
+        self.spec = spec
+        self._size = 0
+        self._write_free_at: Tick = 0
+        self._read_free_at: Tick = 0
+        self.num_spilled_items = 0
+        self.num_restored_items = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get_available_space(self) -> int:
+        return self.spec.capacity - self._size
+
+    def write(self, at_tick: Tick, items: list["DataItem"]):
+        start = max(at_tick, self._write_free_at)
+        self._write_free_at = start + len(items) / self.spec.write_bandwidth
+        for item in items:
+            item.spilled = True
+            item.restorable_at = self._write_free_at
+        self._size += len(items)
+        self.num_spilled_items += len(items)
+
+    def get_restore_ticks(self, at_tick: Tick, items: list["DataItem"]) -> Tick:
+        """
+        Returns the time until the spilled `items` are read back, including waiting for writes
+        and earlier reads.
+        """
+        spilled = [item for item in items if item.spilled]
+        if not spilled:
+            return 0
+        start = max(at_tick, self._read_free_at, *(item.restorable_at for item in spilled))
+        return start + self.spec.restore_latency + len(spilled) / self.spec.read_bandwidth - at_tick
+
+    def read(self, at_tick: Tick, items: list["DataItem"]):
+        restore_ticks = self.get_restore_ticks(at_tick, items)
+        if restore_ticks > 0:
+            self._read_free_at = at_tick + restore_ticks
+            self.num_restored_items += sum(item.spilled for item in items)
+
+    def remove(self, num_items: int):
+        assert num_items <= self._size, (num_items, self._size)
+        self._size -= num_items
 
 
 class Buffer:
-    def __init__(self, capacity: int, name: str = "buf"):
+    """
+    A memory buffer shared by all operators.
+
+    Items that are not yet claimed by a consumer are kept in a FIFO queue per producing operator
+    and node. Claimed items still take up space until the consumer finishes and removes them, so
+    only the total count is tracked for them. All operations are O(1) in the buffer size. Items
+    are never modified after they are pushed, so copies of the buffer can share them.
+
+    In a cluster, the buffer is the union of the object stores of the nodes: `node_capacities`
+    limits how many items each node holds in addition to the total `capacity`. With a spill
+    tier, outputs that do not fit can be spilled to disk instead; they do not count towards the
+    buffer size.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        name: str = "buf",
+        node_capacities: list[int] | None = None,
+        spill_tier: SpillTier | None = None,
+    ):
         self.capacity = capacity
         self.name = name
-        self._items: list[DataItem] = []
+        self.node_capacities = node_capacities
+        self.spill_tier = spill_tier
+        self._size = 0
+        self._node_sizes: dict[int, int] = defaultdict(int)
+        self._consumable: dict[int, dict[int, deque[DataItem]]] = defaultdict(
+            lambda: defaultdict(deque)
+        )
         self._timeline: list[int] = [0]
 
     def __str__(self) -> str:
         return self.name
 
     def __repr__(self):
-        return f"{self}({len(self._items)}/{self.capacity})"
+        return f"{self}({self._size}/{self.capacity})"
+
+    def __len__(self) -> int:
+        return self._size
 
     def tick(self):
         logging.info(f"[{self}] Tick")
-        self._timeline.append(len(self._items))
+        self._timeline.append(self._size)
 
-    def get_available_space(self) -> int:
-        return self.capacity - len(self._items)
+    def get_available_space(self, node: int | None = None) -> int:
+        """
+        Returns the free space of the buffer, or of the object store of `node` in a cluster.
+        """
+        available = self.capacity - self._size
+        if node is not None and self.node_capacities is not None:
+            available = min(available, self.node_capacities[node] - self._node_sizes[node])
+        return available
 
-    def push(self, at_tick: Tick, task: TaskSpec, size: int) -> DataItem | None:
+    def get_node_size(self, node: int) -> int:
+        return self._node_sizes[node]
+
+    def can_spill(self, size: int) -> bool:
+        return self.spill_tier is not None and size <= self.spill_tier.get_available_space()
+
+    def reserve(self, size: int, node: int = 0) -> bool:
+        """
+        Takes up space for `size` items that are not consumable yet, e.g. outputs that a
+        streaming task has generated but the executor has not read. They are pushed with
+        `reserved=True` once they become consumable.
+        """
+        if size > self.get_available_space(node):
+            return False
+        self._size += size
+        self._node_sizes[node] += size
+        return True
+
+    def push(
+        self,
+        at_tick: Tick,
+        task: TaskSpec,
+        size: int,
+        node: int = 0,
+        spill_at: Tick | None = None,
+        reserved: bool = False,
+        first_block_id: int = 0,
+    ) -> DataItem | None:
+        """
+        Adds `size` items produced by `task`. If `spill_at` is set, the items are spilled to disk
+        at that tick instead. If `reserved` is set, the space was taken by `reserve`.
+        """
         assert size > 0, (task, size)
-        if len(self._items) + size > self.capacity:
+        assert not (reserved and spill_at is not None), task
+        if spill_at is not None and not self.can_spill(size):
+            logging.debug(f"[{self}] Cannot spill {task.id}: disk full")
+            return None
+        if spill_at is None and not reserved and size > self.get_available_space(node):
             logging.debug(f"[{self}] Cannot push {task.id}: buffer full")
             return None
-        for i in range(size):
+        queue = self._consumable[task.operator_idx][node]
+        items = []
+        for i in range(first_block_id, first_block_id + size):
             item = DataItem(
                 id=task.id,
                 operator_idx=task.operator_idx,
                 block_id=i,
                 producer=task,
                 produced_at=at_tick,
-                consumer=None,
-                consumed_at=-1,
+                node=node,
             )
-            self._items.append(item)
+            queue.append(item)
+            items.append(item)
+        if spill_at is not None:
+            self.spill_tier.write(spill_at, items)
+            logging.debug(f"[{self}] Spilled {task.id}")
+            return item
+        if not reserved:
+            self._size += size
+            self._node_sizes[node] += size
         logging.debug(f"[{self}] Pushed {task.id}")
         return item
 
     def remove(self, items: list[DataItem]) -> list[DataItem]:
+        """
+        Removes items that were claimed by a consumer.
+        """
+        num_spilled = sum(item.spilled for item in items)
+        if num_spilled > 0:
+            self.spill_tier.remove(num_spilled)
+        assert len(items) - num_spilled <= self._size, (items, self._size)
+        self._size -= len(items) - num_spilled
         for item in items:
-            self._items.remove(item)
+            if not item.spilled:
+                self._node_sizes[item.node] -= 1
         return items
 
-    def peek(self, size: int, operator_idx: int) -> list[DataItem]:
+    def get_num_consumable(self, operator_idx: int, node: int | None = None) -> int:
         """
-        Returns the first `size` items in the buffer without consumers.
+        Returns the number of unclaimed items produced by the operator, on `node` or on any node.
+        """
+        queues = self._consumable[operator_idx]
+        if node is not None:
+            return len(queues[node])
+        return sum(len(queue) for queue in queues.values())
+
+    def peek(self, size: int, operator_idx: int, node: int = 0) -> list[DataItem]:
+        """
+        Returns the first `size` unclaimed items in the buffer, preferring items on `node` and then
+        the other nodes in order.
         If there are fewer than `size` items, returns an empty list.
         """
-        items = [
-            item
-            for item in self._items
-            if item.consumer is None and item.operator_idx == operator_idx
-        ]
-        logging.debug(f"[{self}] Peeked {size} items: {items[:size]}")
-        if len(items) < size:
+        if self.get_num_consumable(operator_idx) < size:
             return []
-        return items[:size]
+        queues = self._consumable[operator_idx]
+        items = list(itertools.islice(queues[node], size))
+        for other in sorted(queues):
+            if len(items) == size:
+                break
+            if other != node:
+                items.extend(itertools.islice(queues[other], size - len(items)))
+        logging.debug(f"[{self}] Peeked {size} items from operator {operator_idx}")
+        return items
+
+    def claim(self, items: list[DataItem]):
+        """
+        Marks items returned by `peek` as taken by a consumer. They still take up space until the
+        consumer finishes and removes them.
+        """
+        for item in items:
+            queue = self._consumable[item.operator_idx][item.node]
+            assert queue[0] is item, (item, queue[0])
+            queue.popleft()
+
+    def unclaim(self, items: list[DataItem]):
+        """
+        Returns claimed items to the front of their queues, in their original order, e.g. when
+        their consumer is cancelled.
+        """
+        for item in reversed(items):
+            self._consumable[item.operator_idx][item.node].appendleft(item)
+
+    def fork(self) -> "Buffer":
+        """
+        Returns a copy of the buffer with an empty timeline.
+        """
+        buffer = Buffer(self.capacity, self.name, self.node_capacities)
+        buffer._timeline = []
+        buffer._copy_state_from(self)
+        return buffer
+
+    def _copy_state_from(self, other: "Buffer"):
+        self._size = other._size
+        self._node_sizes = other._node_sizes.copy()
+        self._consumable = defaultdict(lambda: defaultdict(deque))
+        for operator_idx, queues in other._consumable.items():
+            for node, queue in queues.items():
+                self._consumable[operator_idx][node] = queue.copy()
+        self.spill_tier = copy.copy(other.spill_tier)
 
     def print_timeline(self, max_time: int):
         print(f"|| {self}  ||", end="")
@@ -98,6 +315,11 @@ class TaskStateType(Enum):
 
 
 class TaskState:
+    """
+    Replaced rather than modified on every state change, so copies of the task state map can
+    share the objects.
+    """
+
     state: TaskStateType = TaskStateType.PENDING
     started_at: Tick = -1
     execution_started_at: Tick = -1
@@ -114,11 +336,44 @@ class RunningTask:
     inputs: list[DataItem]
     started_at: Tick
     remaining_ticks: int
+    # Time the task occupies its executor, including fetching remote inputs.
+    duration: Tick
+    # Other tasks of the operator that run in the same batch as `spec`.
+    batch: tuple[TaskSpec, ...] = ()
+
+    @property
+    def input_size(self) -> int:
+        return self.spec.input_size + sum(task.input_size for task in self.batch)
+
+    @property
+    def output_size(self) -> int:
+        return self.spec.output_size + sum(task.output_size for task in self.batch)
+
+
+@dataclass
+class Actor:
+    """
+    An actor of an operator's actor pool. It holds its executor and the resources of one task of
+    the operator from the time it starts until it is stopped.
+    """
+
+    id: str
+    operator_idx: int
+    executor_id: int
+    started_at: Tick
+    # Tick at which the actor is done starting up and can run tasks.
+    ready_at: Tick
+    # Tick since which the actor has had no task, or None while it runs one. Starts at
+    # `ready_at`, since the startup is not idle time.
+    idle_since: Tick | None
+    stopped_at: Tick | None = None
+    busy_ticks: Tick = 0
 
 
 class HistoryEventType(Enum):
     TASK_STARTED = "TASK_STARTED"
     TASK_FINISHED = "TASK_FINISHED"
+    TASK_CANCELLED = "TASK_CANCELLED"
 
 
 @dataclass
@@ -129,9 +384,10 @@ class HistoryEvent:
 
 
 class Executor:
-    def __init__(self, id: str, resource: Resource, env: "ExecutionEnvironment"):
+    def __init__(self, id: str, resource: Resource, env: "ExecutionEnvironment", node: int = 0):
         self.id = id
         self.resource = resource
+        self.node = node
         self.running_task: RunningTask | None = None
         self._env = env
         self._events: list[HistoryEvent] = []
@@ -150,18 +406,27 @@ class Executor:
         """
         if self.running_task is None:
             return True
-        if self.running_task.spec.output_size > 0 and (
-            self._env.buffer.get_available_space()
-            < self.running_task.spec.output_size - self.running_task.spec.input_size
+        # Only the in-memory inputs stored on this node free up space for the outputs.
+        num_local_inputs = sum(
+            item.node == self.node and not item.spilled for item in self.running_task.inputs
+        )
+        output_size = self.running_task.output_size
+        spill_at = None
+        if output_size > 0 and (
+            self._env.buffer.get_available_space(self.node) < output_size - num_local_inputs
         ):
-            logging.debug(f"[{self}] Cannot finish {self.running_task.spec.id}: buffer is full")
-            return False
+            if not self._env.buffer.can_spill(output_size):
+                logging.debug(f"[{self}] Cannot finish {self.running_task.spec.id}: buffer is full")
+                return False
+            spill_at = self._env._current_tick
         self._env.buffer.remove(self.running_task.inputs)
-        if self.running_task.spec.output_size > 0:
+        if output_size > 0:
             item = self._env.buffer.push(
                 at_tick=self.running_task.started_at,
                 task=self.running_task.spec,
-                size=self.running_task.spec.output_size,
+                size=output_size,
+                node=self.node,
+                spill_at=spill_at,
             )
             if item is None:
                 logging.debug(f"[{self}] Cannot finish {self.running_task.spec.id}: buffer is full")
@@ -191,6 +456,25 @@ class Executor:
             return "!"
         return self.running_task.spec.id
 
+    def complete_running_task(self) -> RunningTask | None:
+        """
+        Called once the running task has executed for its full duration. Returns the task if it
+        finished, or None if its output is blocked by a full buffer.
+        """
+        tid = self.running_task.spec.id
+        batch = self.running_task.batch
+        if self._try_finishing_running_task():
+            finished = self._finish_running_task()
+            for task in batch:
+                self._env.update_task_state(task.id, TaskStateType.FINISHED)
+            self._env.update_task_state(tid, TaskStateType.FINISHED)
+            return finished
+        if self._env.task_states[tid].state != TaskStateType.PENDING_OUTPUT:
+            for task in batch:
+                self._env.update_task_state(task.id, TaskStateType.PENDING_OUTPUT)
+            self._env.update_task_state(tid, TaskStateType.PENDING_OUTPUT)
+        return None
+
     def tick(self) -> RunningTask | None:
         """
         Advances a tick. Returns the task that finished, if any.
@@ -200,40 +484,40 @@ class Executor:
             return None
         self.running_task.remaining_ticks -= 1
         if self.running_task.remaining_ticks <= 0:
-            if self._try_finishing_running_task():
-                self._env.update_task_state(self.running_task.spec.id, TaskStateType.FINISHED)
-                return self._finish_running_task()
-            else:
-                self._env.update_task_state(self.running_task.spec.id, TaskStateType.PENDING_OUTPUT)
-                return None
+            return self.complete_running_task()
+        return None
 
-    def start_task(self, task: TaskSpec, at_tick: Tick, inputs: list[DataItem]) -> bool:
+    def start_task(
+        self,
+        task: TaskSpec,
+        at_tick: Tick,
+        inputs: list[DataItem],
+        duration: Tick | None = None,
+        batch: tuple[TaskSpec, ...] = (),
+    ) -> bool:
         """
-        Tries to start a task on this executor.
+        Tries to start a task, and the other tasks of its `batch`, on this executor. `duration`
+        defaults to the task duration. `inputs` are the inputs of the whole batch.
         Returns true if the task was started, false if it was not.
         """
-        if (
-            task.resources.cpu > 0
-            and self.resource != CPU
-            or task.resources.gpu > 0
-            and self.resource != GPU
-        ):
+        if get_slot_resource(task) not in (None, self.resource):
             return False
         if self.running_task is not None:
             logging.debug(
                 f"[{self}] Cannot start {task.id}: {self.running_task.spec.id} is running"
             )
             return False
+        if duration is None:
+            duration = task.duration
         self.running_task = RunningTask(
             spec=task,
             inputs=inputs,
             started_at=at_tick,
-            remaining_ticks=task.duration,
+            remaining_ticks=duration,
+            duration=duration,
+            batch=batch,
         )
-        for item in inputs:
-            item.consumer = task
-            item.consumed_at = at_tick
-        logging.info(f"[{self}] Started {task}")
+        logging.info(f"[{self}] Started {task}" + (f" with {len(batch)} more" if batch else ""))
         self._events.append(
             HistoryEvent(
                 tick=at_tick,
@@ -243,8 +527,24 @@ class Executor:
         )
         return True
 
-    def cancel_task(self):
+    def cancel_task(self) -> RunningTask:
+        """
+        Stops the running task without writing its outputs, and returns it.
+        """
+        logging.info(f"[{self}] Cancelled {self.running_task.spec.id}")
+        self._events.append(
+            HistoryEvent(
+                tick=self._env._current_tick,
+                type=HistoryEventType.TASK_CANCELLED,
+                task=self.running_task.spec,
+            )
+        )
+        ret = self.running_task
         self.running_task = None
+        return ret
+
+    def _copy_state_from(self, other: "Executor"):
+        self.running_task = None if other.running_task is None else replace(other.running_task)
 
     def print_timeline(self, max_time: int):
         print(f"|| {self.id:4} ||", end="")
@@ -258,6 +558,14 @@ class Executor:
 
 
 class ExecutionEnvironment:
+    """
+    Runs tasks on executors, which are task slots of a machine. Tasks are packed by resource
+    vector: a task starts on an idle slot only if its resource request fits in what the running
+    tasks of the machine leave free.
+    """
+
+    executor_cls = Executor
+
     def __init__(
         self,
         *,
@@ -265,49 +573,216 @@ class ExecutionEnvironment:
         buffer_size: int,
         tasks: list[TaskSpec],
         scheduling_policy: "SchedulingPolicy" = None,
+        spill: SpillSpec | None = None,
+        actor_pools: dict[int, ActorPoolSpec] | None = None,
+        batch_costs: dict[int, BatchCostSpec] | None = None,
     ):
+        """
+        :param actor_pools: Actor pool of each operator whose tasks run on actors.
+        :param batch_costs: Cost model of each operator whose tasks may run in batches.
+        """
         self.task_specs = {t.id: t for t in tasks}
         self.task_states = {t.id: TaskState() for t in tasks}
-        self.buffer = Buffer(capacity=buffer_size)
+        self.buffer = Buffer(
+            capacity=buffer_size, spill_tier=SpillTier(spill) if spill is not None else None
+        )
         self.scheduling_policy = scheduling_policy
         self._current_tick = 0
-        self._executors = [Executor(f"CPU{i}", CPU, self) for i in range(resources.cpu)] + [
-            Executor(f"GPU{i}", GPU, self) for i in range(resources.gpu)
-        ]
+        self._num_tasks_finished = 0
+        self._node_capacities = self._get_node_capacities(resources)
+        self._node_usages = [ResourcesSpec() for _ in self._node_capacities]
+        self._executors = self._make_executors(resources)
+        # Operators in the order their tasks appear in `tasks`, i.e. in scheduling priority.
+        self.operator_indices = list(dict.fromkeys(t.operator_idx for t in tasks))
+        # Indexes of tasks and executors, kept up to date by `update_task_state`.
+        self._operator_tasks = {
+            state: {op: {} for op in self.operator_indices} for state in TaskStateType
+        }
+        self._pending_queues = {op: deque() for op in self.operator_indices}
+        for t in tasks:
+            self._operator_tasks[TaskStateType.PENDING][t.operator_idx][t.id] = None
+            self._pending_queues[t.operator_idx].append(t.id)
+        self._task_executor_ids: dict[str, int] = {}
+        # Executors running a backup copy of a task, see `start_backup_task`.
+        self._backup_executor_ids: dict[str, int] = {}
+        self._idle_executor_ids = {
+            resource: {i for i, e in enumerate(self._executors) if e.resource == resource}
+            for resource in [CPU, GPU]
+        }
+        self.actor_pools = actor_pools or {}
+        # The task an actor reserves resources for, per operator.
+        self._actor_task_specs = {
+            op: next(t for t in tasks if t.operator_idx == op) for op in self.actor_pools
+        }
+        # Actors of each pool, including the stopped ones, and the actor on each executor.
+        self._actors: dict[int, list[Actor]] = {op: [] for op in self.actor_pools}
+        self._executor_actors: dict[int, Actor] = {}
+        self.batch_costs = batch_costs or {}
 
     def __repr__(self):
         return f"ExecutionEnvironment@{self._current_tick}"
 
+    def fork(self) -> "ExecutionEnvironment":
+        """
+        Returns an independent copy of the environment, e.g. for what-if rollouts.
+
+        Task specs, task states and data items are never modified, so they are shared. Only the
+        state that changes during a run is copied, including the scheduling policy. The
+        timelines and events of the copy start empty.
+        """
+        env = copy.copy(self)
+        env._executors = [
+            type(executor)(executor.id, executor.resource, env, executor.node)
+            for executor in self._executors
+        ]
+        env.buffer = self.buffer.fork()
+        env._copy_state_from(self)
+        return env
+
+    def snapshot(self) -> "EnvironmentSnapshot":
+        """
+        Returns a snapshot that `restore` rolls back to. A snapshot can be restored many times.
+        """
+        return EnvironmentSnapshot(
+            env=self.fork(),
+            executor_history_lengths=[
+                (len(executor._timeline), len(executor._events)) for executor in self._executors
+            ],
+            buffer_history_length=len(self.buffer._timeline),
+        )
+
+    def restore(self, snapshot: "EnvironmentSnapshot"):
+        self._copy_state_from(snapshot.env)
+        for executor, (timeline_length, events_length) in zip(
+            self._executors, snapshot.executor_history_lengths
+        ):
+            del executor._timeline[timeline_length:]
+            del executor._events[events_length:]
+        del self.buffer._timeline[snapshot.buffer_history_length :]
+
+    def _copy_state_from(self, other: "ExecutionEnvironment"):
+        """
+        Copies the state that changes during a run from `other`. Subclasses with more such state
+        extend this.
+        """
+        self.task_states = other.task_states.copy()
+        self.scheduling_policy = other.scheduling_policy
+        if other.scheduling_policy is not None:
+            # The problem is shared, like the task specs.
+            problem = other.scheduling_policy.problem
+            self.scheduling_policy = copy.deepcopy(other.scheduling_policy, {id(problem): problem})
+        self._current_tick = other._current_tick
+        self._num_tasks_finished = other._num_tasks_finished
+        for executor, other_executor in zip(self._executors, other._executors):
+            executor._copy_state_from(other_executor)
+        self.buffer._copy_state_from(other.buffer)
+        self._operator_tasks = {
+            state: {op: tasks.copy() for op, tasks in operator_tasks.items()}
+            for state, operator_tasks in other._operator_tasks.items()
+        }
+        self._pending_queues = {op: queue.copy() for op, queue in other._pending_queues.items()}
+        self._task_executor_ids = other._task_executor_ids.copy()
+        self._backup_executor_ids = other._backup_executor_ids.copy()
+        self._node_usages = other._node_usages.copy()
+        self._idle_executor_ids = {
+            resource: executor_ids.copy()
+            for resource, executor_ids in other._idle_executor_ids.items()
+        }
+        self._actors = {
+            op: [replace(actor) for actor in actors] for op, actors in other._actors.items()
+        }
+        self._executor_actors = {
+            actor.executor_id: actor
+            for actors in self._actors.values()
+            for actor in actors
+            if actor.stopped_at is None
+        }
+
+    def _get_node_capacities(self, resources: ResourcesSpec) -> list[ResourcesSpec]:
+        return [resources]
+
+    def _get_num_slots(self, capacity: ResourcesSpec) -> tuple[int, int]:
+        return get_num_slots(capacity, [task.resources for task in self.task_specs.values()])
+
+    def _make_executors(self, resources: ResourcesSpec) -> list[Executor]:
+        num_cpu_slots, num_gpu_slots = self._get_num_slots(resources)
+        return [self.executor_cls(f"CPU{i}", CPU, self) for i in range(num_cpu_slots)] + [
+            self.executor_cls(f"GPU{i}", GPU, self) for i in range(num_gpu_slots)
+        ]
+
+    def fits(self, task: TaskSpec, node: int = 0) -> bool:
+        """
+        Returns whether the resource request of `task` fits in the free resources of `node`.
+        """
+        usage, capacity = self._node_usages[node], self._node_capacities[node]
+        return (
+            usage.cpu + task.resources.cpu <= capacity.cpu + RESOURCE_EPSILON
+            and usage.gpu + task.resources.gpu <= capacity.gpu + RESOURCE_EPSILON
+        )
+
+    @staticmethod
+    def _executor_sort_key(executor: Executor) -> tuple[int, int]:
+        if executor.running_task is None:
+            return 100000, 100000  # Sorted last.
+        remaining_ticks = executor.running_task.remaining_ticks
+        net_output_size = executor.running_task.output_size - executor.running_task.input_size
+        # Net_output_size first: decreasing buffer usage.
+        return net_output_size, remaining_ticks
+
     def _get_executors_sorted(self) -> list[Executor]:
         """
         Returns first the executors with tasks that are finishing and will
         decrease buffer usage.
         """
+        return sorted(self._executors, key=self._executor_sort_key)
 
-        def _sort_key(executor: Executor) -> tuple[int, int]:
-            if executor.running_task is None:
-                return 100000, 100000  # Sorted last.
-            remaining_ticks = executor.running_task.remaining_ticks
-            net_output_size = (
-                executor.running_task.spec.output_size - executor.running_task.spec.input_size
-            )
-            # Net_output_size first: decreasing buffer usage.
-            return net_output_size, remaining_ticks
-
-        return sorted(self._executors, key=_sort_key)
+    def _update_indexes(self, tid: str, state: TaskStateType):
+        op = self.task_specs[tid].operator_idx
+        del self._operator_tasks[self.task_states[tid].state][op][tid]
+        self._operator_tasks[state][op][tid] = None
+        if state == TaskStateType.PENDING:
+            self._pending_queues[op].append(tid)
+        elif state == TaskStateType.FINISHED:
+            self._num_tasks_finished += 1
+        if state in (TaskStateType.PENDING, TaskStateType.FINISHED):
+            executor_ids = [self._task_executor_ids.pop(tid, None)]
+            if tid in self._backup_executor_ids:
+                executor_ids.append(self._backup_executor_ids.pop(tid))
+            for executor_id in executor_ids:
+                if executor_id is None:
+                    continue
+                executor = self._executors[executor_id]
+                if executor.running_task is not None and executor.running_task.spec.id == tid:
+                    # A copy of the task that was cancelled or lost to the other copy.
+                    self._cancel_on_executor(executor_id)
+                actor = self._executor_actors.get(executor_id)
+                if actor is not None:
+                    # The actor keeps its executor and resources.
+                    actor.idle_since = self._current_tick
+                    actor.busy_ticks += self._current_tick - self.task_states[tid].started_at
+                else:
+                    self._idle_executor_ids[executor.resource].add(executor_id)
+                    self._node_usages[executor.node] -= self.task_specs[tid].resources
 
     def update_task_state(self, tid: str, state: TaskStateType):
-        self.task_states[tid].state = state
-        if state == TaskStateType.RUNNING:
-            self.task_states[tid].started_at = self._current_tick
+        self._update_indexes(tid, state)
+        task_state = copy.copy(self.task_states[tid])
+        task_state.state = state
+        if state == TaskStateType.PENDING:
+            # Rolled back, e.g. by `cancel_task`.
+            task_state = TaskState()
+        elif state == TaskStateType.RUNNING:
+            task_state.started_at = self._current_tick
         elif state == TaskStateType.PENDING_OUTPUT:
-            self.task_states[tid].execution_finished_at = self._current_tick
+            task_state.execution_finished_at = self._current_tick
         elif state == TaskStateType.FINISHED:
-            self.task_states[tid].finished_at = self._current_tick
+            task_state.finished_at = self._current_tick
+        self.task_states[tid] = task_state
         if self.scheduling_policy is not None:
-            self.scheduling_policy.on_task_state_change(self.task_specs[tid], self.task_states[tid])
+            self.scheduling_policy.on_task_state_change(self.task_specs[tid], task_state)
 
     def tick(self):
+        self._update_actors()
         if self.scheduling_policy is not None:
             self.scheduling_policy.tick(self)
         logging.debug(f"[{self}] Tick")
@@ -316,11 +791,30 @@ class ExecutionEnvironment:
             executor.tick()
         self.buffer.tick()
 
-    def _get_task_inputs(self, task: TaskSpec) -> list[DataItem]:
-        if task.input_size == 0:
+    def run(self, time_limit: Tick) -> bool:
+        """
+        Ticks until all tasks are finished or `time_limit` is reached.
+        Returns true if all tasks finished.
+        """
+        while self._current_tick < time_limit:
+            self.tick()
+            if self.all_tasks_finished():
+                break
+        return self.all_tasks_finished()
+
+    def _get_task_inputs(
+        self, task: TaskSpec, node: int = 0, input_size: int | None = None
+    ) -> list[DataItem]:
+        """
+        Returns whether the inputs are available, and the inputs. `input_size` defaults to the
+        input size of the task, and is the input size of the whole batch for batches.
+        """
+        if input_size is None:
+            input_size = task.input_size
+        if input_size == 0:
             return True, []
-        inp = self.buffer.peek(task.input_size, task.operator_idx - 1)
-        if len(inp) < task.input_size:
+        inp = self.buffer.peek(input_size, task.operator_idx - 1, node)
+        if len(inp) < input_size:
             return False, []
         return True, inp
 
@@ -328,27 +822,338 @@ class ExecutionEnvironment:
         can_start, _ = self._get_task_inputs(task)
         return can_start
 
-    def start_task(self, task: TaskSpec, executor_id: int) -> bool:
-        can_start, inp = self._get_task_inputs(task)
-        if can_start and self._executors[executor_id].start_task(task, self._current_tick, inp):
+    def get_task_duration(self, task: TaskSpec, batch_size: int = 1) -> Tick:
+        """
+        Returns the execution time of a batch of `batch_size` tasks of the operator of `task`.
+        Tasks of operators without a batch cost model run one at a time in their duration.
+        """
+        batch_cost = self.batch_costs.get(task.operator_idx)
+        if batch_cost is None:
+            assert batch_size == 1, (task.id, batch_size)
+            return task.duration
+        return batch_cost.get_duration(batch_size)
+
+    def _get_running_duration(
+        self, task: TaskSpec, _executor: Executor, inputs: list[DataItem], batch_size: int = 1
+    ) -> Tick:
+        """
+        Returns how long `task`, in a batch of `batch_size` tasks, occupies the executor it is
+        started on, including restoring spilled inputs.
+        """
+        duration = self.get_task_duration(task, batch_size)
+        if self.buffer.spill_tier is None:
+            return duration
+        return self.buffer.spill_tier.get_restore_ticks(self._current_tick, inputs) + duration
+
+    def start_task(
+        self, task: TaskSpec, executor_id: int, batch: tuple[TaskSpec, ...] = ()
+    ) -> bool:
+        """
+        Tries to start `task` on the executor, together with the pending tasks of `batch`, which
+        must be of the same operator. The batch runs as one launch and finishes all at once.
+        """
+        executor = self._executors[executor_id]
+        actor = self._executor_actors.get(executor_id)
+        if actor is None:
+            if task.operator_idx in self.actor_pools or not self.fits(task, executor.node):
+                return False
+        elif actor.operator_idx != task.operator_idx or not self.is_actor_ready(actor):
+            return False
+        input_size = task.input_size + sum(other.input_size for other in batch)
+        can_start, inp = self._get_task_inputs(task, executor.node, input_size)
+        if can_start and executor.start_task(
+            task,
+            self._current_tick,
+            inp,
+            self._get_running_duration(task, executor, inp, 1 + len(batch)),
+            batch,
+        ):
+            self.buffer.claim(inp)
+            if self.buffer.spill_tier is not None:
+                self.buffer.spill_tier.read(self._current_tick, inp)
+            self._idle_executor_ids[executor.resource].discard(executor_id)
+            self._task_executor_ids[task.id] = executor_id
+            if actor is None:
+                self._node_usages[executor.node] += task.resources
+            else:
+                actor.idle_since = None
+            for other in batch:
+                self.update_task_state(other.id, TaskStateType.RUNNING)
             self.update_task_state(task.id, TaskStateType.RUNNING)
             return True
         return False
 
-    def start_task_on_any_executor(self, task: TaskSpec) -> bool:
-        can_start, _ = self._get_task_inputs(task)
+    def start_task_on_any_executor(self, task: TaskSpec, batch: tuple[TaskSpec, ...] = ()) -> bool:
+        input_size = task.input_size + sum(other.input_size for other in batch)
+        can_start, _ = self._get_task_inputs(task, input_size=input_size)
         if not can_start:
             return False
-        for exec_id in range(len(self._executors)):
-            if self.start_task(task, exec_id):
-                return True
-        return False
+        executor_ids = self._get_idle_executor_ids(task)
+        if not executor_ids:
+            return False
+        return self.start_task(task, executor_ids[0], batch)
 
-    def cancel_task(self, task: TaskSpec):
-        raise NotImplementedError
+    def start_batch_on_any_executor(self, operator_idx: int, batch_size: int) -> bool:
+        """
+        Starts the first `batch_size` pending tasks of a batched operator as one batch.
+        """
+        pending = self._operator_tasks[TaskStateType.PENDING][operator_idx]
+        tasks = [self.task_specs[tid] for tid in itertools.islice(pending, batch_size)]
+        if len(tasks) < batch_size:
+            return False
+        return self.start_task_on_any_executor(tasks[0], tuple(tasks[1:]))
+
+    def _get_idle_executor_ids(self, task: TaskSpec) -> list[int]:
+        """
+        Returns the idle executors that can run `task`, in executor order. Tasks of operators
+        with an actor pool run on the ready actors of the pool.
+        """
+        if task.operator_idx in self.actor_pools:
+            return sorted(
+                executor_id
+                for executor_id, actor in self._executor_actors.items()
+                if actor.operator_idx == task.operator_idx
+                and actor.idle_since is not None
+                and self.is_actor_ready(actor)
+            )
+        return self._get_free_executor_ids(task)
+
+    def _get_free_executor_ids(self, task: TaskSpec) -> list[int]:
+        """
+        Returns the executors without a task or an actor that fit `task`, in executor order.
+        """
+        resource = get_slot_resource(task)
+        if resource is None:
+            executor_ids = self._idle_executor_ids[CPU] | self._idle_executor_ids[GPU]
+        else:
+            executor_ids = self._idle_executor_ids[resource]
+        nodes = [node for node in range(len(self._node_capacities)) if self.fits(task, node)]
+        if len(nodes) == len(self._node_capacities):
+            return sorted(executor_ids)
+        return sorted(i for i in executor_ids if self._executors[i].node in nodes)
+
+    def get_actors(self, operator_idx: int) -> list[Actor]:
+        """
+        Returns the actors of the operator's pool that are not stopped, including the ones still
+        starting up.
+        """
+        return [actor for actor in self._actors[operator_idx] if actor.stopped_at is None]
+
+    def is_actor_ready(self, actor: Actor) -> bool:
+        return actor.ready_at <= self._current_tick
+
+    def start_actor(self, operator_idx: int) -> Actor | None:
+        """
+        Starts an actor of the operator's pool on a free executor. Returns None if the pool is at
+        its max size or no executor fits the operator's tasks.
+        """
+        pool = self.actor_pools[operator_idx]
+        if len(self.get_actors(operator_idx)) >= pool.max_size:
+            return None
+        task = self._actor_task_specs[operator_idx]
+        executor_ids = self._get_free_executor_ids(task)
+        if not executor_ids:
+            logging.debug(f"[{self}] Cannot start an actor of operator {operator_idx}")
+            return None
+        executor = self._executors[executor_ids[0]]
+        ready_at = self._current_tick + pool.startup_duration
+        actor = Actor(
+            id=f"{task.id.rsplit('_', 1)[0]}#{len(self._actors[operator_idx])}",
+            operator_idx=operator_idx,
+            executor_id=executor_ids[0],
+            started_at=self._current_tick,
+            ready_at=ready_at,
+            idle_since=ready_at,
+        )
+        self._actors[operator_idx].append(actor)
+        self._executor_actors[actor.executor_id] = actor
+        self._idle_executor_ids[executor.resource].discard(actor.executor_id)
+        self._node_usages[executor.node] += task.resources
+        logging.info(f"[{self}] Started actor {actor.id} on {executor}")
+        return actor
+
+    def stop_actor(self, actor: Actor) -> bool:
+        """
+        Stops an actor and frees its executor. Returns false if the actor is running a task.
+        """
+        executor = self._executors[actor.executor_id]
+        if executor.running_task is not None:
+            return False
+        actor.stopped_at = self._current_tick
+        del self._executor_actors[actor.executor_id]
+        self._idle_executor_ids[executor.resource].add(actor.executor_id)
+        self._node_usages[executor.node] -= self._actor_task_specs[actor.operator_idx].resources
+        logging.info(f"[{self}] Stopped actor {actor.id}")
+        return True
+
+    def is_operator_done(self, operator_idx: int) -> bool:
+        """
+        Returns whether all tasks of the operator finished.
+        """
+        return all(
+            self.get_num_tasks(operator_idx, state) == 0
+            for state in (
+                TaskStateType.PENDING,
+                TaskStateType.RUNNING,
+                TaskStateType.PENDING_OUTPUT,
+            )
+        )
+
+    def _update_actors(self):
+        """
+        Called at the start of every tick. Stops the pools of finished operators and the actors
+        that were idle for the idle timeout while their pool is above its min size, then starts
+        actors up to the min size of each pool.
+        """
+        for op, pool in self.actor_pools.items():
+            if self.is_operator_done(op):
+                for actor in self.get_actors(op):
+                    self.stop_actor(actor)
+                continue
+            num_actors = len(self.get_actors(op))
+            for actor in self.get_actors(op):
+                if num_actors <= pool.min_size:
+                    break
+                if (
+                    actor.idle_since is not None
+                    and self._current_tick - actor.idle_since >= pool.idle_timeout
+                ):
+                    self.stop_actor(actor)
+                    num_actors -= 1
+            for _ in range(pool.min_size - num_actors):
+                if self.start_actor(op) is None:
+                    break
+
+    def get_next_actor_event(self) -> Tick | None:
+        """
+        Returns the next tick at which an actor becomes ready or reaches its idle timeout, if
+        any. Used by the event-driven engine.
+        """
+        ticks = []
+        for op, pool in self.actor_pools.items():
+            actors = self.get_actors(op)
+            for actor in actors:
+                if not self.is_actor_ready(actor):
+                    ticks.append(actor.ready_at)
+                elif actor.idle_since is not None and len(actors) > pool.min_size:
+                    ticks.append(actor.idle_since + pool.idle_timeout)
+        return min((tick for tick in ticks if tick > self._current_tick), default=None)
+
+    def get_actor_ticks_wasted(self, operator_idx: int | None = None) -> Tick:
+        """
+        Returns the time that actors of the operator, or of all operators, spent alive without
+        running a task, i.e. starting up or idle.
+        """
+        ops = self.actor_pools if operator_idx is None else [operator_idx]
+        return sum(
+            (self._current_tick if actor.stopped_at is None else actor.stopped_at)
+            - actor.started_at
+            - actor.busy_ticks
+            for op in ops
+            for actor in self._actors[op]
+        )
+
+    def get_time_to_first_output(self, operator_idx: int | None = None) -> Tick | None:
+        """
+        Returns the tick at which the first task of the operator finished, or None if none did.
+        Defaults to the last operator, i.e. the first output of the pipeline.
+        """
+        if operator_idx is None:
+            operator_idx = max(self.operator_indices)
+        tids = self._operator_tasks[TaskStateType.FINISHED][operator_idx]
+        return min((self.task_states[tid].finished_at for tid in tids), default=None)
+
+    def next_pending(self, operator_idx: int) -> TaskSpec | None:
+        """
+        Returns the first pending task of the operator, or None if there is none.
+        """
+        queue = self._pending_queues[operator_idx]
+        while queue and self.task_states[queue[0]].state != TaskStateType.PENDING:
+            queue.popleft()
+        return self.task_specs[queue[0]] if queue else None
+
+    def get_tasks(self, operator_idx: int, state: TaskStateType) -> list[TaskSpec]:
+        return [self.task_specs[tid] for tid in self._operator_tasks[state][operator_idx]]
+
+    def get_num_tasks(self, operator_idx: int, state: TaskStateType) -> int:
+        return len(self._operator_tasks[state][operator_idx])
+
+    def num_pending(self, operator_idx: int) -> int:
+        return self.get_num_tasks(operator_idx, TaskStateType.PENDING)
+
+    def num_running(self, operator_idx: int) -> int:
+        return self.get_num_tasks(operator_idx, TaskStateType.RUNNING)
+
+    def free_executors(self, resource: Resource) -> list[Executor]:
+        return [self._executors[i] for i in sorted(self._idle_executor_ids[resource])]
+
+    def _cancel_on_executor(self, executor_id: int) -> RunningTask:
+        return self._executors[executor_id].cancel_task()
+
+    def cancel_task(self, task: TaskSpec) -> bool:
+        """
+        Cancels a task that is running or blocked in PENDING_OUTPUT, along with its backup copy
+        and the other tasks of its batch, and rolls them back to PENDING. Their claimed inputs
+        become consumable again, and they start over when they are scheduled again. Returns
+        false if the task was not started or already finished.
+        """
+        if self.task_states[task.id].state not in (
+            TaskStateType.RUNNING,
+            TaskStateType.PENDING_OUTPUT,
+        ):
+            return False
+        running_task = self._executors[self._task_executor_ids[task.id]].running_task
+        # Outputs are only written when a task finishes, so only the inputs need a rollback.
+        self.buffer.unclaim(running_task.inputs)
+        for other in running_task.batch:
+            self.update_task_state(other.id, TaskStateType.PENDING)
+        self.update_task_state(task.id, TaskStateType.PENDING)
+        return True
+
+    def has_backup(self, task: TaskSpec) -> bool:
+        return task.id in self._backup_executor_ids
+
+    def start_backup_task(
+        self, task: TaskSpec, executor_id: int, duration: Tick | None = None
+    ) -> bool:
+        """
+        Starts a backup copy of a running task on an idle executor, for speculative execution.
+        The copy shares the inputs of the task and runs for `duration`, which defaults to the
+        task duration. Whichever copy finishes first writes the outputs, and the other one is
+        cancelled. Tasks of actor pools and batches have no backups.
+        """
+        executor = self._executors[executor_id]
+        if (
+            self.task_states[task.id].state != TaskStateType.RUNNING
+            or self.has_backup(task)
+            or task.operator_idx in self.actor_pools
+            or executor_id in self._executor_actors
+            or not self.fits(task, executor.node)
+        ):
+            return False
+        running_task = self._executors[self._task_executor_ids[task.id]].running_task
+        if running_task.batch:
+            return False
+        if duration is None:
+            duration = task.duration
+        if not executor.start_task(task, self._current_tick, running_task.inputs, duration):
+            return False
+        logging.info(f"[{self}] Started a backup of {task.id} on {executor}")
+        self._idle_executor_ids[executor.resource].discard(executor_id)
+        self._backup_executor_ids[task.id] = executor_id
+        self._node_usages[executor.node] += task.resources
+        return True
+
+    def start_backup_task_on_any_executor(
+        self, task: TaskSpec, duration: Tick | None = None
+    ) -> bool:
+        executor_ids = self._get_free_executor_ids(task)
+        if not executor_ids:
+            return False
+        return self.start_backup_task(task, executor_ids[0], duration)
 
     def print_timeline(self):
-        max_time = self._current_tick
+        max_time = math.ceil(self._current_tick)
         separator_line = "++" + "-" * (max_time * 6 + 7) + "++"
         print(separator_line)
         for executor in self._executors:
@@ -363,6 +1168,44 @@ class ExecutionEnvironment:
         print(separator_line)
         print("Total Run Time =", max([s.finished_at for s in self.task_states.values()]))
 
+    def get_schedule(self, problem: SchedulingProblem) -> Schedule:
+        """
+        Returns the schedule of the tasks finished so far, e.g. to diff it with the schedule
+        of a solver. The tasks of a batch are listed under the task that launched it.
+        """
+        tasks = [
+            ScheduledTask(
+                id=event.task.id,
+                operator_idx=event.task.operator_idx,
+                executor=executor_id,
+                start=event.tick,
+                end=self.task_states[event.task.id].finished_at,
+            )
+            for executor_id, executor in enumerate(self._executors)
+            for event in executor._events
+            if event.type == HistoryEventType.TASK_FINISHED
+        ]
+        makespan = max((task.end for task in tasks), default=0)
+        buffer_levels, buffer_to_consume_levels = get_buffer_levels(
+            list(self.task_specs.values()), tasks, problem.num_operators, makespan
+        )
+        return Schedule(
+            problem=problem.name,
+            executors=[executor.id for executor in self._executors],
+            operators=[op.name for op in problem.operators],
+            tasks=tasks,
+            buffer_levels=buffer_levels,
+            buffer_to_consume_levels=buffer_to_consume_levels,
+            makespan=makespan,
+            stats={
+                "policy": repr(self.scheduling_policy),
+                "finished": self.all_tasks_finished(),
+            },
+        )
+
+    def all_tasks_finished(self) -> bool:
+        return self._num_tasks_finished == len(self.task_states)
+
     def check_all_tasks_finished(self):
         all_finished = True
         for tid, state in self.task_states.items():
@@ -372,6 +1215,15 @@ class ExecutionEnvironment:
         return all_finished
 
 
+@dataclass
+class EnvironmentSnapshot:
+    # A fork of the environment that is never run.
+    env: ExecutionEnvironment
+    # Lengths of the append-only histories, which are truncated on restore.
+    executor_history_lengths: list[tuple[int, int]]
+    buffer_history_length: int
+
+
 class SchedulingPolicy:
     def __init__(self, problem: SchedulingProblem):
         self.problem = problem
@@ -381,3 +1233,34 @@ class SchedulingPolicy:
 
     def on_task_state_change(self, _task: TaskSpec, _state: TaskState):
         pass
+
+    def get_next_wakeup(self, env: ExecutionEnvironment) -> Tick | None:
+        """
+        Returns the next tick at which the policy must run even if no task changes state, or
+        None if it only needs to run on task events. Used by the event-driven engine.
+        By default, the policy runs on every tick.
+        """
+        return math.floor(env._current_tick) + 1
+
+    def get_preferred_nodes(self, _env: ExecutionEnvironment, _task: TaskSpec) -> list[int] | None:
+        """
+        Returns the nodes to start `task` on in order of preference, or None for no preference.
+        Nodes that are not listed are used last. Only used by multi-node environments.
+        """
+        return None
+
+    def get_max_blocks_in_generator_buffer(
+        self, _env: ExecutionEnvironment, _task: TaskSpec
+    ) -> int | None:
+        """
+        Returns how many generated outputs of `task` the executor may leave unread before the
+        task pauses, or None for no limit. Only used by streaming environments.
+        """
+        return None
+
+    def get_max_blocks_to_read(self, _env: ExecutionEnvironment, _operator_idx: int) -> int | None:
+        """
+        Returns how many generated outputs of the operator's tasks the executor reads in this
+        tick, or None to read all of them. Only used by streaming environments.
+        """
+        return None
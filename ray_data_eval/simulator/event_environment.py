@@ -0,0 +1,194 @@
+import heapq
+import itertools
+import logging
+import math
+
+from ray_data_eval.common.pipeline import (
+    ActorPoolSpec,
+    BatchCostSpec,
+    ResourcesSpec,
+    SpillSpec,
+    TaskSpec,
+)
+from ray_data_eval.simulator.environment import (
+    ExecutionEnvironment,
+    Executor,
+    SchedulingPolicy,
+    TaskStateType,
+    Tick,
+)
+
+
+class EventDrivenExecutionEnvironment(ExecutionEnvironment):
+    """
+    An execution environment that jumps between events instead of stepping one tick at a time.
+
+    Events are task completions, which are kept in a priority queue, policy wakeups (see
+    `SchedulingPolicy.get_next_wakeup`), and actors becoming ready or timing out. The buffer
+    only changes when a task completes, so tasks blocked in PENDING_OUTPUT are retried on
+    completion events only. Task durations may be fractional. With integer durations, task
+    states and timelines are identical to those of `ExecutionEnvironment`.
+    """
+
+    def __init__(
+        self,
+        *,
+        resources: ResourcesSpec,
+        buffer_size: int,
+        tasks: list[TaskSpec],
+        scheduling_policy: SchedulingPolicy = None,
+        spill: SpillSpec | None = None,
+        actor_pools: dict[int, ActorPoolSpec] | None = None,
+        batch_costs: dict[int, BatchCostSpec] | None = None,
+    ):
+        super().__init__(
+            resources=resources,
+            buffer_size=buffer_size,
+            tasks=tasks,
+            scheduling_policy=scheduling_policy,
+            spill=spill,
+            actor_pools=actor_pools,
+            batch_costs=batch_costs,
+        )
+        # (finish_tick, seq, executor_idx, task_id)
+        self._completion_queue: list[tuple[Tick, int, int, str]] = []
+        self._seq = itertools.count()
+        self._blocked_executors: set[int] = set()
+
+    def __repr__(self):
+        return f"EventDrivenExecutionEnvironment@{self._current_tick}"
+
+    def _copy_state_from(self, other: "EventDrivenExecutionEnvironment"):
+        super()._copy_state_from(other)
+        self._completion_queue = other._completion_queue.copy()
+        self._seq = itertools.count(next(other._seq))
+        self._blocked_executors = other._blocked_executors.copy()
+
+    def start_task(
+        self, task: TaskSpec, executor_id: int, batch: tuple[TaskSpec, ...] = ()
+    ) -> bool:
+        if not super().start_task(task, executor_id, batch):
+            return False
+        self._push_completion(executor_id)
+        return True
+
+    def start_backup_task(
+        self, task: TaskSpec, executor_id: int, duration: Tick | None = None
+    ) -> bool:
+        if not super().start_backup_task(task, executor_id, duration):
+            return False
+        self._push_completion(executor_id)
+        return True
+
+    def _push_completion(self, executor_id: int):
+        running_task = self._executors[executor_id].running_task
+        heapq.heappush(
+            self._completion_queue,
+            (
+                running_task.started_at + running_task.duration,
+                next(self._seq),
+                executor_id,
+                running_task.spec.id,
+            ),
+        )
+
+    def _cancel_on_executor(self, executor_id: int):
+        # The completion event is dropped when it comes up, see `_pop_completing_executors`.
+        self._blocked_executors.discard(executor_id)
+        return super()._cancel_on_executor(executor_id)
+
+    def _get_next_event_tick(self, time_limit: Tick | None) -> Tick:
+        # Without a time limit, an idle environment steps one tick at a time.
+        next_tick = math.floor(self._current_tick) + 1 if time_limit is None else time_limit
+        if self._completion_queue:
+            next_tick = min(next_tick, self._completion_queue[0][0])
+        if self.scheduling_policy is not None:
+            wakeup = self.scheduling_policy.get_next_wakeup(self)
+            if wakeup is not None and wakeup > self._current_tick:
+                next_tick = min(next_tick, wakeup)
+        actor_event = self.get_next_actor_event()
+        if actor_event is not None:
+            next_tick = min(next_tick, actor_event)
+        return next_tick
+
+    def _record_timelines(self, next_tick: Tick):
+        """
+        Records the executor states on every integer tick in [current_tick, next_tick), and the
+        buffer usage on every integer tick in (current_tick, next_tick).
+        """
+        for executor in self._executors:
+            if executor.running_task is not None:
+                executor.running_task.remaining_ticks = (
+                    executor.running_task.started_at
+                    + executor.running_task.duration
+                    - self._current_tick
+                )
+        num_ticks = math.ceil(next_tick) - math.ceil(self._current_tick)
+        if num_ticks > 0:
+            for executor in self._executors:
+                executor._timeline.extend([executor._get_timeline_item()] * num_ticks)
+        num_ticks = math.ceil(next_tick) - math.floor(self._current_tick) - 1
+        if num_ticks > 0:
+            self.buffer._timeline.extend([len(self.buffer)] * num_ticks)
+
+    def _pop_completing_executors(self) -> list[tuple[int, Executor]]:
+        executor_ids = set(self._blocked_executors)
+        while self._completion_queue and self._completion_queue[0][0] <= self._current_tick:
+            finish_tick, _, executor_id, tid = heapq.heappop(self._completion_queue)
+            running_task = self._executors[executor_id].running_task
+            # Events of cancelled tasks are stale, even if the task was started again.
+            if (
+                running_task is not None
+                and running_task.spec.id == tid
+                and running_task.started_at + running_task.duration == finish_tick
+            ):
+                executor_ids.add(executor_id)
+        for executor_id in executor_ids:
+            running_task = self._executors[executor_id].running_task
+            running_task.remaining_ticks = (
+                running_task.started_at + running_task.duration - self._current_tick
+            )
+        # Same order as `_get_executors_sorted`, which is stable in the executor index.
+        return [
+            (i, self._executors[i])
+            for i in sorted(
+                executor_ids, key=lambda i: (self._executor_sort_key(self._executors[i]), i)
+            )
+        ]
+
+    def advance_to(self, next_tick: Tick):
+        """
+        Advances the clock to `next_tick` and completes the tasks that finish at that tick.
+        """
+        assert next_tick > self._current_tick, (next_tick, self._current_tick)
+        self._record_timelines(next_tick)
+        self._current_tick = next_tick
+        for executor_id, executor in self._pop_completing_executors():
+            if executor.running_task is None:
+                # Lost to a backup copy that completed first.
+                continue
+            tid = executor.running_task.spec.id
+            executor.complete_running_task()
+            if self.task_states[tid].state == TaskStateType.PENDING_OUTPUT:
+                self._blocked_executors.add(executor_id)
+            else:
+                self._blocked_executors.discard(executor_id)
+        if next_tick == math.floor(next_tick):
+            self.buffer._timeline.append(len(self.buffer))
+
+    def tick(self, time_limit: Tick | None = None):
+        """
+        Runs the scheduling policy, then jumps to the next event.
+        """
+        self._update_actors()
+        if self.scheduling_policy is not None:
+            self.scheduling_policy.tick(self)
+        logging.debug(f"[{self}] Tick")
+        self.advance_to(self._get_next_event_tick(time_limit))
+
+    def run(self, time_limit: Tick) -> bool:
+        while self._current_tick < time_limit:
+            self.tick(time_limit)
+            if self.all_tasks_finished():
+                break
+        return self.all_tasks_finished()
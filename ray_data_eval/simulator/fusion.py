@@ -0,0 +1,125 @@
+import argparse
+import itertools
+import logging
+from dataclasses import dataclass, replace
+
+from ray_data_eval.common.pipeline import SchedulingProblem, problems
+from ray_data_eval.simulator.environment import SchedulingPolicy
+from ray_data_eval.simulator.policies import GreedyPolicy
+from ray_data_eval.simulator.sweep import SweepJob, run_sweep
+
+
+@dataclass
+class FusionResult:
+    groups: list[list[int]]
+    problem: SchedulingProblem
+    finished: bool
+    makespan: int | float
+    peak_buffer_size: int
+
+    @property
+    def plan(self) -> str:
+        return " | ".join(op.name for op in self.problem.operators)
+
+
+def get_fusion_groups(num_operators: int) -> list[list[list[int]]]:
+    """
+    Returns every way to split the operators into groups of adjacent operators, starting with
+    no fusion at all.
+    """
+    plans = []
+    for boundaries in itertools.product([True, False], repeat=num_operators - 1):
+        groups = [[0]]
+        for op, is_boundary in enumerate(boundaries, start=1):
+            if is_boundary:
+                groups.append([op])
+            else:
+                groups[-1].append(op)
+        plans.append(groups)
+    return plans
+
+
+def optimize_fusion(
+    problem: SchedulingProblem,
+    *,
+    policy_cls: type[SchedulingPolicy] = GreedyPolicy,
+    params: dict | None = None,
+    streaming: bool = False,
+    cache_dir: str | None = None,
+    num_workers: int | None = None,
+) -> list[FusionResult]:
+    """
+    Simulates the problem under every fusion plan that `SchedulingProblem.fuse` accepts, and
+    returns the results best first: finished plans by makespan, then the unfinished ones. Every
+    plan runs with the buffer limit of the original problem.
+
+    :param policy_cls: Policy to run each plan with.
+    :param params: Keyword arguments of the policy.
+    :param streaming: If set, simulate with streaming outputs.
+    :param cache_dir: Directory of cached job results. If None, nothing is cached.
+    :param num_workers: Number of worker processes. If None, use the number of CPUs.
+    """
+    plans = []
+    for groups in get_fusion_groups(problem.num_operators):
+        try:
+            plans.append((groups, problem.fuse(groups)))
+        except ValueError as e:
+            logging.info(f"Skipping fusion plan {groups}: {e}")
+    jobs = [
+        SweepJob(
+            problem=fused,
+            policy_cls=policy_cls,
+            params=params or {},
+            streaming=streaming,
+        )
+        for _, fused in plans
+    ]
+    rows = run_sweep(jobs, cache_dir=cache_dir, num_workers=num_workers)
+    results = [
+        FusionResult(
+            groups=groups,
+            problem=fused,
+            finished=row["finished"],
+            makespan=row["makespan"],
+            peak_buffer_size=row["peak_buffer_size"],
+        )
+        for (groups, fused), row in zip(plans, rows, strict=True)
+    ]
+    return sorted(results, key=lambda result: (not result.finished, result.makespan))
+
+
+def main(args):
+    logging.disable(logging.CRITICAL)
+    for problem in problems:
+        if args.problems and problem.name not in args.problems:
+            continue
+        if args.buffer_size_limit is not None:
+            problem = replace(problem, buffer_size_limit=args.buffer_size_limit)
+        print("Problem:", problem.name)
+        results = optimize_fusion(
+            problem,
+            streaming=args.streaming,
+            cache_dir=args.cache_dir,
+            num_workers=args.num_workers,
+        )
+        for result in results:
+            print(
+                result.plan,
+                "Finished" if result.finished else "Not finished",
+                result.makespan,
+                f"peak_buffer_size={result.peak_buffer_size}",
+            )
+        print("Recommended:", results[0].plan)
+        print("---")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find the operator fusion plan that minimizes the makespan of each problem."
+    )
+    parser.add_argument("--problems", nargs="*", help="Names of the problems to optimize")
+    parser.add_argument("--buffer-size-limit", type=int, help="Override the buffer size limit")
+    parser.add_argument("--streaming", action="store_true", help="Simulate streaming outputs")
+    parser.add_argument("--cache-dir", help="Directory of cached simulation results")
+    parser.add_argument("--num-workers", type=int)
+    main(parser.parse_args())
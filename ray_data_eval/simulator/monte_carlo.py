@@ -0,0 +1,107 @@
+import argparse
+import logging
+from dataclasses import replace
+
+import numpy as np
+
+from ray_data_eval.common.distributions import LogNormal
+from ray_data_eval.common.pipeline import SchedulingProblem, e2e_problem3
+from ray_data_eval.simulator.benchmark import POLICIES
+from ray_data_eval.simulator.environment import SchedulingPolicy
+from ray_data_eval.simulator.sweep import SweepJob, run_sweep
+
+PERCENTILES = [50, 90, 99]
+
+
+def run_monte_carlo(
+    problem: SchedulingProblem,
+    policies: list[type[SchedulingPolicy]],
+    num_replicas: int,
+    *,
+    seed: int = 0,
+    cache_dir: str | None = None,
+    output_path: str | None = None,
+    num_workers: int | None = None,
+) -> list[dict]:
+    """
+    Simulates `num_replicas` samples of the problem under each policy, and returns one summary
+    row per policy with the fraction of finished replicas and makespan and peak buffer size
+    percentiles. All policies see the same replicas, so their differences are not sampling noise.
+    The percentiles are over the finished replicas only, since the makespan of the others is just
+    the time limit, and are NaN if no replica finished.
+
+    :param problem: A problem whose operators have duration or output size distributions.
+    :param policies: Policies to compare.
+    :param num_replicas: Number of sampled problems per policy.
+    :param seed: Seed from which the replica seeds are derived.
+    :param cache_dir: Directory of cached replica results. If None, nothing is cached.
+    :param output_path: If set, the per-replica results are written to this CSV or Parquet file.
+    :param num_workers: Number of worker processes. If None, use the number of CPUs.
+    """
+    seeds = np.random.SeedSequence(seed).generate_state(num_replicas).tolist()
+    jobs = [SweepJob(problem, policy_cls, seed=s) for policy_cls in policies for s in seeds]
+    rows = run_sweep(jobs, cache_dir=cache_dir, output_path=output_path, num_workers=num_workers)
+
+    summary = []
+    for policy_cls in policies:
+        policy_rows = [row for row in rows if row["policy"] == policy_cls.__name__]
+        result = {
+            "policy": policy_cls.__name__,
+            "num_replicas": len(policy_rows),
+            "finished": np.mean([row["finished"] for row in policy_rows]),
+        }
+        finished_rows = [row for row in policy_rows if row["finished"]]
+        for metric in ["makespan", "peak_buffer_size"]:
+            values = [row[metric] for row in finished_rows]
+            percentiles = (
+                np.percentile(values, PERCENTILES) if values else [np.nan] * len(PERCENTILES)
+            )
+            for q, value in zip(PERCENTILES, percentiles, strict=True):
+                result[f"{metric}_p{q}"] = value
+        summary.append(result)
+    return summary
+
+
+def main(args):
+    logging.disable(logging.CRITICAL)
+    # Producers with heavy-tailed durations around the nominal 10 ticks.
+    producer = e2e_problem3.operators[0]
+    problem = replace(
+        e2e_problem3,
+        name="e2e_problem3_lognormal",
+        operators=[
+            replace(producer, duration_distribution=LogNormal(producer.duration, args.sigma)),
+            *e2e_problem3.operators[1:],
+        ],
+        time_limit=e2e_problem3.time_limit * 10,
+    )
+    summary = run_monte_carlo(
+        problem,
+        POLICIES,
+        args.num_replicas,
+        seed=args.seed,
+        cache_dir=args.cache_dir,
+        output_path=args.output,
+        num_workers=args.num_workers,
+    )
+    print("Problem:", problem.name)
+    for result in summary:
+        print(
+            result["policy"],
+            f"finished={result['finished']:.0%}",
+            "makespan=" + "/".join(f"{result[f'makespan_p{q}']:.1f}" for q in PERCENTILES),
+            "peak_buffer="
+            + "/".join(f"{result[f'peak_buffer_size_p{q}']:.0f}" for q in PERCENTILES),
+        )
+    print(f"(p{'/p'.join(map(str, PERCENTILES))} over {args.num_replicas} replicas)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-replicas", type=int, default=100, help="Replicas per policy")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Producer duration skew")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="CSV or Parquet file to write the results to")
+    parser.add_argument("--cache-dir", help="Directory of cached results to reuse")
+    parser.add_argument("--num-workers", type=int, help="Number of worker processes")
+    main(parser.parse_args())
@@ -0,0 +1,45 @@
+import argparse
+import itertools
+import logging
+import time
+
+from ray_data_eval.common.pipeline import e2e_problem, three_stage_problem
+from ray_data_eval.simulator.event_environment import EventDrivenExecutionEnvironment
+from ray_data_eval.simulator.policies import ModelPredictivePolicy
+
+PROBLEMS = [three_stage_problem, e2e_problem]
+
+
+def main(args):
+    logging.disable(logging.CRITICAL)
+    for problem in PROBLEMS:
+        print("Problem:", problem.name)
+        for horizon, budget in itertools.product(args.horizons, args.budgets):
+            policy = ModelPredictivePolicy(problem, horizon=horizon, budget=budget, seed=args.seed)
+            env = EventDrivenExecutionEnvironment(
+                resources=problem.resources,
+                buffer_size=problem.buffer_size_limit,
+                tasks=problem.tasks,
+                scheduling_policy=policy,
+            )
+            start = time.perf_counter()
+            finished = env.run(problem.time_limit)
+            run_time = time.perf_counter() - start
+            print(
+                f"horizon={horizon}",
+                f"budget={budget}",
+                "Finished" if finished else "Not finished",
+                env._current_tick,
+                f"decision_latency={run_time / max(policy.num_decisions, 1) * 1000:.2f}ms",
+            )
+        print("---")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Trade decision latency against makespan for ModelPredictivePolicy."
+    )
+    parser.add_argument("--horizons", type=int, nargs="+", default=[2, 5, 10, 20])
+    parser.add_argument("--budgets", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -1,12 +1,15 @@
 import logging
+import math
 
 import numpy as np
 from ray_data_eval.common.pipeline import SchedulingProblem, TaskSpec
+from ray_data_eval.common.schedule import Schedule
 from ray_data_eval.simulator.environment import (
     ExecutionEnvironment,
     SchedulingPolicy,
     TaskState,
     TaskStateType,
+    Tick,
 )
 
 
@@ -25,12 +28,37 @@ class GreedyPolicy(SchedulingPolicy):
 
     def tick(self, env: ExecutionEnvironment):
         super().tick(env)
-        for tid, task_state in env.task_states.items():
-            if task_state.state == TaskStateType.PENDING:
-                logging.debug(f"[{self}] Trying to start {tid}")
-                task = env.task_specs[tid]
-                if not env.start_task_on_any_executor(task):
-                    logging.debug(f"[{self}] Cannot not start {tid}")
+        for op in env.operator_indices:
+            self._start_tasks(env, op)
+
+    def _start_tasks(self, env: ExecutionEnvironment, op: int):
+        while (task := env.next_pending(op)) is not None:
+            logging.debug(f"[{self}] Trying to start {task.id}")
+            if not env.start_task_on_any_executor(task):
+                # Tasks of an operator are identical, so the rest cannot start either.
+                logging.debug(f"[{self}] Cannot not start {task.id}")
+                break
+
+    def get_next_wakeup(self, _env: ExecutionEnvironment) -> Tick | None:
+        return None
+
+
+class LocalityAwareGreedyPolicy(GreedyPolicy):
+    """
+    A greedy policy that starts tasks on the nodes that hold most of their inputs, and producers
+    on the nodes with the most free object store space.
+    """
+
+    def __repr__(self):
+        return "LocalityAwareGreedyPolicy"
+
+    def get_preferred_nodes(self, env: ExecutionEnvironment, task: TaskSpec) -> list[int]:
+        nodes = range(len(env.cluster.nodes))
+        if task.input_size == 0:
+            return sorted(nodes, key=lambda node: -env.buffer.get_available_space(node))
+        return sorted(
+            nodes, key=lambda node: -env.buffer.get_num_consumable(task.operator_idx - 1, node)
+        )
 
 
 class GreedyWithBufferPolicy(SchedulingPolicy):
@@ -49,23 +77,22 @@ class GreedyWithBufferPolicy(SchedulingPolicy):
 
     def tick(self, env: ExecutionEnvironment):
         super().tick(env)
-        for tid, task_state in env.task_states.items():
-            if task_state.state != TaskStateType.PENDING:
-                continue
-            task = env.task_specs[tid]
-            net_output_size = task.output_size - task.input_size
-            logging.debug(
-                f"net_output_size={net_output_size}, "
-                f"cumulative_output_size={self._cumulative_output_size}, "
-                f"limit={self.buffer_size_limit}"
-            )
-            if net_output_size > 0:
-                if self._cumulative_output_size + net_output_size > self.buffer_size_limit:
-                    logging.info(f"[{self}] Not starting {tid} to avoid buffer overflow")
-                    continue
-            logging.debug(f"[{self}] Trying to start {tid}")
-            if not env.start_task_on_any_executor(task):
-                logging.debug(f"[{self}] Cannot not start {tid}")
+        for op in env.operator_indices:
+            while (task := env.next_pending(op)) is not None:
+                net_output_size = task.output_size - task.input_size
+                logging.debug(
+                    f"net_output_size={net_output_size}, "
+                    f"cumulative_output_size={self._cumulative_output_size}, "
+                    f"limit={self.buffer_size_limit}"
+                )
+                if net_output_size > 0:
+                    if self._cumulative_output_size + net_output_size > self.buffer_size_limit:
+                        logging.info(f"[{self}] Not starting {task.id} to avoid buffer overflow")
+                        break
+                logging.debug(f"[{self}] Trying to start {task.id}")
+                if not env.start_task_on_any_executor(task):
+                    logging.debug(f"[{self}] Cannot not start {task.id}")
+                    break
 
     def on_task_state_change(self, task: TaskSpec, task_state: TaskState):
         super().on_task_state_change(task, task_state)
@@ -75,6 +102,9 @@ class GreedyWithBufferPolicy(SchedulingPolicy):
         elif task_state.state == TaskStateType.FINISHED:
             self._cumulative_output_size -= task.input_size
 
+    def get_next_wakeup(self, _env: ExecutionEnvironment) -> Tick | None:
+        return None
+
 
 class GreedyOracleProducerFirstPolicy(SchedulingPolicy):
     """
@@ -86,47 +116,49 @@ class GreedyOracleProducerFirstPolicy(SchedulingPolicy):
         super().__init__(problem)
         self.buffer_size_limit = problem.buffer_size_limit
         self._buffer_diff = np.zeros(problem.time_limit * 2)
-        self._current_tick = 0
 
     def __repr__(self):
         return "GreedyOracleProducerFirstPolicy"
 
-    def _buffer_size_at(self, tick: int):
-        return np.sum(self._buffer_diff[: tick + 1])
+    def _buffer_size_at(self, tick: Tick):
+        return np.sum(self._buffer_diff[: math.ceil(tick) + 1])
 
-    def _get_task_states(self, env: ExecutionEnvironment) -> list[tuple[str, TaskState]]:
-        return env.task_states.items()
+    def _add_buffer_diff(self, tick: Tick, diff: int):
+        # Fractional finish times are rounded up to the next tick. Heavy-tailed durations may
+        # finish past the preallocated horizon.
+        idx = math.ceil(tick)
+        if idx >= len(self._buffer_diff):
+            self._buffer_diff = np.pad(self._buffer_diff, (0, idx + 1))
+        self._buffer_diff[idx] += diff
+
+    def _get_operator_indices(self, env: ExecutionEnvironment) -> list[int]:
+        return env.operator_indices
 
     def tick(self, env: ExecutionEnvironment):
         super().tick(env)
-        for tid, task_state in self._get_task_states(env):
-            if task_state.state != TaskStateType.PENDING:
-                continue
-            task = env.task_specs[tid]
-            net_output_size = task.output_size - task.input_size
-            logging.debug(
-                f"net_output_size={net_output_size}, "
-                f"buffer_diff={self._buffer_diff}, "
-                f"limit={self.buffer_size_limit}"
-            )
-            if net_output_size > 0:
-                finish_at = self._current_tick + task.duration
-                if self._buffer_size_at(finish_at) + net_output_size > self.buffer_size_limit:
-                    logging.info(
-                        f"[{self}] Not starting {tid} to due to anticipated buffer overflow at {finish_at}"
-                    )
-                    continue
-            logging.debug(f"[{self}] Trying to start {tid}")
-            if not env.start_task_on_any_executor(task):
-                logging.debug(f"[{self}] Cannot not start {tid}")
-        self._current_tick += 1
+        for op in self._get_operator_indices(env):
+            while (task := env.next_pending(op)) is not None:
+                net_output_size = task.output_size - task.input_size
+                logging.debug(f"net_output_size={net_output_size}, limit={self.buffer_size_limit}")
+                if net_output_size > 0:
+                    finish_at = env._current_tick + task.duration
+                    if self._buffer_size_at(finish_at) + net_output_size > self.buffer_size_limit:
+                        logging.info(
+                            f"[{self}] Not starting {task.id} to due to anticipated buffer "
+                            f"overflow at {finish_at}"
+                        )
+                        break
+                logging.debug(f"[{self}] Trying to start {task.id}")
+                if not env.start_task_on_any_executor(task):
+                    logging.debug(f"[{self}] Cannot not start {task.id}")
+                    break
 
     def on_task_state_change(self, task: TaskSpec, task_state: TaskState):
         super().on_task_state_change(task, task_state)
         logging.info(f"{task.id} changed state to {task_state.state}")
         if task_state.state == TaskStateType.RUNNING:
-            self._buffer_diff[self._current_tick + task.duration] += (
-                task.output_size - task.input_size
+            self._add_buffer_diff(
+                task_state.started_at + task.duration, task.output_size - task.input_size
             )
 
 
@@ -138,9 +170,11 @@ class GreedyOracleConsumerFirstPolicy(GreedyOracleProducerFirstPolicy):
     def __repr__(self):
         return "GreedyOracleConsumerFirstPolicy"
 
-    def _get_task_states(self, env: ExecutionEnvironment) -> list[tuple[str, TaskState]]:
-        ret = super()._get_task_states(env)
-        return sorted(ret, key=lambda x: x[0].startswith("C"), reverse=True)
+    def _get_operator_indices(self, env: ExecutionEnvironment) -> list[int]:
+        ret = super()._get_operator_indices(env)
+        return sorted(
+            ret, key=lambda op: self.problem.operators[op].name.startswith("C"), reverse=True
+        )
 
 
 class RatesEqualizingPolicy(SchedulingPolicy):
@@ -152,7 +186,8 @@ class RatesEqualizingPolicy(SchedulingPolicy):
         super().__init__(problem)
         self.operator_ratios = []
         self.operator_running_duration = [0] * len(problem.operators)
-        self.task_finished = dict()
+        self._num_newly_finished = [0] * len(problem.operators)
+        self._last_tick = 0
         for idx, operator in enumerate(problem.operators):
             if idx == 0:
                 self.operator_ratios.append(1)
@@ -170,16 +205,22 @@ class RatesEqualizingPolicy(SchedulingPolicy):
         return "RatesEqualizingPolicy"
 
     def _update_operator_running_duration(self, env: ExecutionEnvironment):
-        for tid, task_state in env.task_states.items():
-            operator_idx = env.task_specs[tid].operator_idx
-            if task_state.state == TaskStateType.RUNNING:
-                self.operator_running_duration[operator_idx] += 1
+        # Weighted by the time since the last call, which is one tick unless the environment is
+        # event-driven with fractional durations.
+        elapsed = env._current_tick - self._last_tick
+        self._last_tick = env._current_tick
+        for operator_idx in env.operator_indices:
+            self.operator_running_duration[operator_idx] += env.num_running(operator_idx) * elapsed
             # Add the last time tick to running_duration.
-            if task_state.state == TaskStateType.FINISHED and tid not in self.task_finished:
-                self.operator_running_duration[operator_idx] += 1
-                self.task_finished[tid] = True
+            self.operator_running_duration[operator_idx] += self._num_newly_finished[operator_idx]
+            self._num_newly_finished[operator_idx] = 0
+
+    def on_task_state_change(self, task: TaskSpec, task_state: TaskState):
+        super().on_task_state_change(task, task_state)
+        if task_state.state == TaskStateType.FINISHED:
+            self._num_newly_finished[task.operator_idx] += task_state.finished_at - self._last_tick
 
-    def _try_start_task(self, env: ExecutionEnvironment, tid: int):
+    def _try_start_task(self, env: ExecutionEnvironment, tid: str):
         task = env.task_specs[tid]
         logging.debug(f"[{self}] Trying to start {tid}")
         if not env.start_task_on_any_executor(task):
@@ -187,50 +228,57 @@ class RatesEqualizingPolicy(SchedulingPolicy):
             return False
         return True
 
+    def _keeps_ratio(self, operator_idx: int) -> bool:
+        # Maintain ratio with the successor.
+        if (
+            # Not the last operator.
+            operator_idx + 1 < len(self.operator_ratios)
+            # Next operator has already launched tasks.
+            and self.operator_running_duration[operator_idx + 1] > 0
+            # Exceed the ratio.
+            and (self.operator_running_duration[operator_idx] + 1)
+            / self.operator_running_duration[operator_idx + 1]
+            > self.operator_ratios[operator_idx] / self.operator_ratios[operator_idx + 1]
+        ):
+            return False
+        # Maintain ratio with the predecessor.
+        if (
+            # Not the first operator.
+            operator_idx >= 1
+            and self.operator_running_duration[operator_idx - 1]
+            / (self.operator_running_duration[operator_idx] + 1)
+            < self.operator_ratios[operator_idx - 1] / self.operator_ratios[operator_idx]
+        ):
+            return False
+        return True
+
     def tick(self, env: ExecutionEnvironment):
         super().tick(env)
         self._update_operator_running_duration(env)
+        # Running durations only change between ticks, so the ratio checks are fixed for this tick.
+        keeps_ratio = {op: self._keeps_ratio(op) for op in env.operator_indices}
         makes_progress = True
         while makes_progress:
             makes_progress = False
-            for tid, task_state in env.task_states.items():
-                if task_state.state == TaskStateType.PENDING:
-                    operator_idx = env.task_specs[tid].operator_idx
-
-                    # Maintain ratio with the successor.
-                    if (
-                        # Not the last operator.
-                        operator_idx + 1 < len(self.operator_ratios)
-                        # Next operator has already launched tasks.
-                        and self.operator_running_duration[operator_idx + 1] > 0
-                        # Exceed the ratio.
-                        and (self.operator_running_duration[operator_idx] + 1)
-                        / self.operator_running_duration[operator_idx + 1]
-                        > self.operator_ratios[operator_idx]
-                        / self.operator_ratios[operator_idx + 1]
-                    ):
-                        logging.info(f"[{self}] Not starting task {tid} to keep ratio.")
-                    # Maintain ratio with the predecessor.
-                    elif (
-                        # Not the first operator.
-                        operator_idx >= 1
-                        and self.operator_running_duration[operator_idx - 1]
-                        / (self.operator_running_duration[operator_idx] + 1)
-                        < self.operator_ratios[operator_idx - 1]
-                        / self.operator_ratios[operator_idx]
-                    ):
-                        logging.info(f"[{self}] Not starting task {tid} to keep ratio.")
-                    else:
-                        makes_progress = makes_progress or self._try_start_task(env, tid)
+            # Start one task at a time, from the first operator that keeps the ratio.
+            for operator_idx in env.operator_indices:
+                task = env.next_pending(operator_idx)
+                if task is None:
+                    continue
+                if not keeps_ratio[operator_idx]:
+                    logging.info(f"[{self}] Not starting task {task.id} to keep ratio.")
+                elif self._try_start_task(env, task.id):
+                    makes_progress = True
+                    break
             if not makes_progress:
                 # Liveness condition.
                 # Tasks are sorted in descending order of operator index.
                 # Prioritized downstreaming tasks.
-                for tid, task_state in env.task_states.items():
-                    if task_state.state == TaskStateType.PENDING:
-                        makes_progress = makes_progress or self._try_start_task(env, tid)
-                        if makes_progress:
-                            break
+                for operator_idx in env.operator_indices:
+                    task = env.next_pending(operator_idx)
+                    if task is not None and self._try_start_task(env, task.id):
+                        makes_progress = True
+                        break
 
 
 class ConcurrencyCapPolicy(SchedulingPolicy):
@@ -243,25 +291,23 @@ class ConcurrencyCapPolicy(SchedulingPolicy):
         return "ConcurrencyCapPolicy"
 
     def _get_num_running_tasks(self, env: ExecutionEnvironment, operator_idx: int):
-        num_running_tasks = 0
-        for tid, task_state in env.task_states.items():
-            if task_state.state == TaskStateType.RUNNING:
-                if env.task_specs[tid].operator_idx == operator_idx:
-                    num_running_tasks += 1
-        return num_running_tasks
+        return env.num_running(operator_idx)
 
     def tick(self, env: ExecutionEnvironment):
         super().tick(env)
-        for tid, task_state in env.task_states.items():
-            if task_state.state == TaskStateType.PENDING:
-                if env.task_specs[tid].operator_idx == 0:
+        for op in env.operator_indices:
+            while (task := env.next_pending(op)) is not None:
+                if op == 0:
                     if self._get_num_running_tasks(env, 0) >= self.max_first_op_num_tasks:
-                        continue
+                        break
 
-                logging.debug(f"[{self}] Trying to start {tid}")
-                task = env.task_specs[tid]
+                logging.debug(f"[{self}] Trying to start {task.id}")
                 if not env.start_task_on_any_executor(task):
-                    logging.debug(f"[{self}] Cannot not start {tid}")
+                    logging.debug(f"[{self}] Cannot not start {task.id}")
+                    break
+
+    def get_next_wakeup(self, _env: ExecutionEnvironment) -> Tick | None:
+        return None
 
 
 class DelayPolicy(SchedulingPolicy):
@@ -278,26 +324,583 @@ class DelayPolicy(SchedulingPolicy):
         return "DelayPolicy"
 
     def _get_num_running_tasks(self, env: ExecutionEnvironment, operator_idx: int):
-        num_running_tasks = 0
-        for tid, task_state in env.task_states.items():
-            if task_state.state == TaskStateType.RUNNING:
-                if env.task_specs[tid].operator_idx == operator_idx:
-                    num_running_tasks += 1
-        return num_running_tasks
+        return env.num_running(operator_idx)
 
     def tick(self, env: ExecutionEnvironment):
         super().tick(env)
-        for tid, task_state in env.task_states.items():
-            if task_state.state == TaskStateType.PENDING:
-                if self.executor_slots_delays and env.task_specs[tid].operator_idx == 0:
+        for op in env.operator_indices:
+            # Every pending task is considered once, and pops a delay before trying to start.
+            for _ in range(env.num_pending(op)):
+                if self.executor_slots_delays and op == 0:
                     next_offset = self.executor_slots_delays[0]
                     if env._current_tick >= next_offset:
                         self.executor_slots_delays.pop(0)
-                        pass
                     else:
-                        continue
+                        break
+
+                task = env.next_pending(op)
+                logging.debug(f"[{self}] Trying to start {task.id}")
+                if not env.start_task_on_any_executor(task):
+                    logging.debug(f"[{self}] Cannot not start {task.id}")
+                    if not self.executor_slots_delays or op != 0:
+                        # Tasks of an operator are identical, so the rest cannot start either.
+                        break
 
-                logging.debug(f"[{self}] Trying to start {tid}")
-                task = env.task_specs[tid]
+    def get_next_wakeup(self, env: ExecutionEnvironment) -> Tick | None:
+        # Delays are consumed on every tick, even when no task can start.
+        if self.executor_slots_delays:
+            return super().get_next_wakeup(env)
+        return None
+
+
+class FeedbackBackpressurePolicy(SchedulingPolicy):
+    """
+    A closed-loop policy that caps the number of running tasks of each operator that adds data
+    to the buffer, and adjusts the caps from what a real runtime observes: the buffer occupancy,
+    tasks blocked on a full buffer, task durations, and the rate at which each operator's
+    outputs are consumed. Subclasses implement the controller in `_update_limits`.
+    """
+
+    def __init__(
+        self,
+        problem: SchedulingProblem,
+        target_occupancy: float = 0.8,
+        update_period: Tick = 1,
+        smoothing: float = 0.5,
+    ):
+        """
+        :param target_occupancy: Fraction of the buffer the controller aims to fill.
+        :param update_period: Ticks between two updates of the caps.
+        :param smoothing: Weight of the newest observation in the moving averages.
+        """
+        super().__init__(problem)
+        self.target_occupancy = target_occupancy
+        self.update_period = update_period
+        self.smoothing = smoothing
+        num_operators = len(problem.operators)
+        # Only operators whose tasks add data to the buffer are capped.
+        self.controlled_operators = [
+            op.operator_idx for op in problem.operators if op.output_size > op.input_size
+        ]
+        self.limits = [math.inf] * num_operators
+        for op in self.controlled_operators:
+            self.limits[op] = 1
+        # Items of each operator's output consumed per tick, and task durations.
+        self.consumption_rates = [0.0] * num_operators
+        self.mean_durations = [0.0] * num_operators
+        self._num_consumed = [0] * num_operators
+        self._last_update: Tick | None = None
+
+    def _average(self, mean: float, value: float) -> float:
+        return mean + self.smoothing * (value - mean)
+
+    def _observe(self, env: ExecutionEnvironment) -> Tick:
+        """
+        Updates the consumption rates, and returns the time since the last update.
+        """
+        elapsed = env._current_tick - self._last_update
+        for op, num_consumed in enumerate(self._num_consumed):
+            self.consumption_rates[op] = self._average(
+                self.consumption_rates[op], num_consumed / elapsed
+            )
+        self._num_consumed = [0] * len(self._num_consumed)
+        return elapsed
+
+    def _update_limits(self, env: ExecutionEnvironment, elapsed: Tick):
+        raise NotImplementedError
+
+    def _get_num_active_tasks(self, env: ExecutionEnvironment, operator_idx: int) -> int:
+        # Tasks blocked on a full buffer still hold their executor.
+        return env.num_running(operator_idx) + env.get_num_tasks(
+            operator_idx, TaskStateType.PENDING_OUTPUT
+        )
+
+    def tick(self, env: ExecutionEnvironment):
+        super().tick(env)
+        if self._last_update is None:
+            self._last_update = env._current_tick
+        elif env._current_tick >= self._last_update + self.update_period:
+            self._update_limits(env, self._observe(env))
+            self._last_update = env._current_tick
+            logging.debug(f"[{self}] Limits: {self.limits}")
+        for op in env.operator_indices:
+            while (task := env.next_pending(op)) is not None:
+                if self._get_num_active_tasks(env, op) >= self.limits[op]:
+                    break
                 if not env.start_task_on_any_executor(task):
-                    logging.debug(f"[{self}] Cannot not start {tid}")
+                    logging.debug(f"[{self}] Cannot not start {task.id}")
+                    break
+
+    def on_task_state_change(self, task: TaskSpec, task_state: TaskState):
+        super().on_task_state_change(task, task_state)
+        if task_state.state == TaskStateType.RUNNING and task.operator_idx > 0:
+            self._num_consumed[task.operator_idx - 1] += task.input_size
+        elif task_state.state == TaskStateType.FINISHED:
+            op = task.operator_idx
+            duration = task_state.finished_at - task_state.started_at
+            if self.mean_durations[op] == 0:
+                self.mean_durations[op] = duration
+            else:
+                self.mean_durations[op] = self._average(self.mean_durations[op], duration)
+
+
+class AIMDBackpressurePolicy(FeedbackBackpressurePolicy):
+    """
+    Additive-increase/multiplicative-decrease: the cap of an operator grows while it is fully
+    used, and shrinks when the buffer is above the target occupancy or the operator's outputs
+    are blocked.
+    """
+
+    def __init__(
+        self,
+        problem: SchedulingProblem,
+        increase: float = 1,
+        decrease: float = 0.5,
+        **kwargs,
+    ):
+        super().__init__(problem, **kwargs)
+        self.increase = increase
+        self.decrease = decrease
+
+    def __repr__(self):
+        return "AIMDBackpressurePolicy"
+
+    def _update_limits(self, env: ExecutionEnvironment, _elapsed: Tick):
+        occupancy = len(env.buffer) / env.buffer.capacity
+        for op in self.controlled_operators:
+            if (
+                occupancy > self.target_occupancy
+                or env.get_num_tasks(op, TaskStateType.PENDING_OUTPUT) > 0
+            ):
+                self.limits[op] = max(1, self.limits[op] * self.decrease)
+            elif self._get_num_active_tasks(env, op) >= math.floor(self.limits[op]):
+                self.limits[op] += self.increase
+
+
+class PIDBackpressurePolicy(FeedbackBackpressurePolicy):
+    """
+    Sets the cap of an operator to the concurrency that matches the observed consumption rate of
+    its outputs (Little's law), corrected by a PID controller on the buffer occupancy.
+    """
+
+    def __init__(
+        self,
+        problem: SchedulingProblem,
+        kp: float = 0.5,
+        ki: float = 0.1,
+        kd: float = 0.0,
+        **kwargs,
+    ):
+        super().__init__(problem, **kwargs)
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self._integral = 0.0
+        self._last_error: float | None = None
+
+    def __repr__(self):
+        return "PIDBackpressurePolicy"
+
+    def _update_limits(self, env: ExecutionEnvironment, elapsed: Tick):
+        # Error in number of items below the target.
+        error = self.target_occupancy * env.buffer.capacity - len(env.buffer)
+        # Anti-windup: the integral term alone never exceeds the buffer capacity.
+        self._integral = float(
+            np.clip(
+                self._integral + error * elapsed,
+                -env.buffer.capacity / max(self.ki, 1e-9),
+                env.buffer.capacity / max(self.ki, 1e-9),
+            )
+        )
+        derivative = 0.0 if self._last_error is None else (error - self._last_error) / elapsed
+        self._last_error = error
+        correction = self.kp * error + self.ki * self._integral + self.kd * derivative
+        for op in self.controlled_operators:
+            spec = self.problem.operators[op]
+            feedforward = self.consumption_rates[op] * self.mean_durations[op] / spec.output_size
+            self.limits[op] = max(
+                1, feedforward + correction / (spec.output_size - spec.input_size)
+            )
+
+
+class StreamingOutputBackpressurePolicy(GreedyPolicy):
+    """
+    Emulates Ray Data's `StreamingOutputBackpressurePolicy` in a `StreamingExecutionEnvironment`.
+    Tasks are started greedily. The executor reads outputs of an operator only while its output
+    queue holds fewer than `max_blocks_in_op_output_queue` blocks, and a task pauses while it has
+    `max_blocks_in_generator_buffer` unread outputs. As in Ray, at least one block is read per
+    tick when all downstream operators are idle, to avoid deadlocks.
+
+    With N executors busy with an operator whose tasks yield B blocks each, the blocks pending in
+    the buffer are bounded by about B + (N - 1) * max_blocks_in_generator_buffer +
+    max_blocks_in_op_output_queue.
+    """
+
+    def __init__(
+        self,
+        problem: SchedulingProblem,
+        max_blocks_in_op_output_queue: int = 1,
+        max_blocks_in_generator_buffer: int = 1,
+    ):
+        super().__init__(problem)
+        self.max_blocks_in_op_output_queue = max_blocks_in_op_output_queue
+        self.max_blocks_in_generator_buffer = max_blocks_in_generator_buffer
+
+    def __repr__(self):
+        return "StreamingOutputBackpressurePolicy"
+
+    def get_max_blocks_in_generator_buffer(
+        self, _env: ExecutionEnvironment, _task: TaskSpec
+    ) -> int | None:
+        return self.max_blocks_in_generator_buffer
+
+    def get_max_blocks_to_read(self, env: ExecutionEnvironment, operator_idx: int) -> int | None:
+        max_blocks = self.max_blocks_in_op_output_queue - env.buffer.get_num_consumable(
+            operator_idx
+        )
+        downstream = env.operator_indices[env.operator_indices.index(operator_idx) + 1 :]
+        num_active_downstream = sum(
+            env.num_running(op) + env.get_num_tasks(op, TaskStateType.PENDING_OUTPUT)
+            for op in downstream
+        )
+        if num_active_downstream == 0:
+            max_blocks = max(max_blocks, 1)
+        return max(max_blocks, 0)
+
+
+class ActorPoolAutoscalingPolicy(GreedyPolicy):
+    """
+    A greedy policy that scales actor pools up like Ray Data's actor pool autoscaler. While an
+    operator has tasks whose inputs are ready but no free actor to run them, it adds actors as
+    long as the pool's utilization, i.e. the fraction of its actors running a task, is at least
+    `upscaling_threshold`. Actors that are still starting count as free. Idle actors are
+    stopped by the idle timeout of their pool.
+    """
+
+    def __init__(self, problem: SchedulingProblem, upscaling_threshold: float = 0.8):
+        super().__init__(problem)
+        self.upscaling_threshold = upscaling_threshold
+
+    def __repr__(self):
+        return "ActorPoolAutoscalingPolicy"
+
+    def tick(self, env: ExecutionEnvironment):
+        super().tick(env)
+        for op in env.actor_pools:
+            self._scale_up(env, op)
+
+    def _scale_up(self, env: ExecutionEnvironment, op: int):
+        task = env.next_pending(op)
+        if task is None:
+            return
+        num_queued = env.num_pending(op)
+        if task.input_size > 0:
+            num_queued = min(num_queued, env.buffer.get_num_consumable(op - 1) // task.input_size)
+        actors = env.get_actors(op)
+        num_busy = sum(actor.idle_since is None for actor in actors)
+        num_free = len(actors) - num_busy
+        while num_queued > num_free and (
+            not actors or num_busy / len(actors) >= self.upscaling_threshold
+        ):
+            actor = env.start_actor(op)
+            if actor is None:
+                break
+            logging.debug(f"[{self}] Scaled up operator {op} to {len(actors) + 1} actors")
+            actors.append(actor)
+            num_free += 1
+
+
+class DynamicBatchingPolicy(GreedyPolicy):
+    """
+    A greedy policy that runs the tasks of batched operators in batches, like the dynamic batcher
+    of an inference server. A batch launches once `max_batch_size` tasks have their inputs, once
+    the first of them has waited for `max_delay` ticks, or once no more inputs are coming.
+    Larger batches use the GPU more efficiently but delay their first outputs. Other operators
+    are scheduled greedily.
+    """
+
+    def __init__(
+        self,
+        problem: SchedulingProblem,
+        max_batch_size: int | None = None,
+        max_delay: Tick = 0,
+    ):
+        """
+        :param max_batch_size: Defaults to the max batch size of each operator's cost model.
+        """
+        super().__init__(problem)
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        # Tick since which each batched operator has had tasks with their inputs ready.
+        self._waiting_since: dict[int, Tick] = {}
+
+    def __repr__(self):
+        return "DynamicBatchingPolicy"
+
+    def _start_tasks(self, env: ExecutionEnvironment, op: int):
+        batch_cost = env.batch_costs.get(op)
+        if batch_cost is None:
+            super()._start_tasks(env, op)
+            return
+        max_batch_size = batch_cost.max_batch_size
+        if self.max_batch_size is not None:
+            max_batch_size = min(max_batch_size, self.max_batch_size)
+        while (task := env.next_pending(op)) is not None:
+            num_ready = env.num_pending(op)
+            if task.input_size > 0:
+                num_ready = min(num_ready, env.buffer.get_num_consumable(op - 1) // task.input_size)
+            if num_ready == 0:
+                break
+            waiting_since = self._waiting_since.setdefault(op, env._current_tick)
+            if (
+                num_ready < max_batch_size
+                and env._current_tick - waiting_since < self.max_delay
+                and not (op == 0 or env.is_operator_done(op - 1))
+            ):
+                logging.debug(f"[{self}] Waiting for a batch of {max_batch_size} for op {op}")
+                return
+            batch_size = min(num_ready, max_batch_size)
+            if not env.start_batch_on_any_executor(op, batch_size):
+                logging.debug(f"[{self}] Cannot not start a batch of {batch_size} for op {op}")
+                return
+            # The tasks left over start waiting for the next batch.
+            del self._waiting_since[op]
+        self._waiting_since.pop(op, None)
+
+    def get_next_wakeup(self, env: ExecutionEnvironment) -> Tick | None:
+        wakeups = [
+            waiting_since + self.max_delay
+            for waiting_since in self._waiting_since.values()
+            if waiting_since + self.max_delay > env._current_tick
+        ]
+        return min(wakeups, default=None)
+
+
+class SpeculativeExecutionPolicy(GreedyPolicy):
+    """
+    A greedy policy with speculative execution, like Spark's `spark.speculation`. Once a
+    `quantile` of an operator's tasks finished, a task that has run for `multiplier` times the
+    median duration of the finished ones gets a backup copy on an idle executor. Whichever copy
+    finishes first is kept.
+
+    Stragglers are assumed to be slowed down by their attempt, e.g. a busy node, rather than by
+    their input. So a backup takes a fresh duration drawn from the operator's duration
+    distribution, or the nominal duration without one.
+    """
+
+    def __init__(
+        self,
+        problem: SchedulingProblem,
+        multiplier: float = 1.5,
+        quantile: float = 0.75,
+        seed: int = 0,
+    ):
+        super().__init__(problem)
+        self.multiplier = multiplier
+        self.quantile = quantile
+        self._rng = np.random.default_rng(seed)
+        self._durations: dict[int, list[Tick]] = {op.operator_idx: [] for op in problem.operators}
+        self.num_backups = 0
+
+    def __repr__(self):
+        return "SpeculativeExecutionPolicy"
+
+    def on_task_state_change(self, task: TaskSpec, state: TaskState):
+        if state.state == TaskStateType.FINISHED:
+            self._durations[task.operator_idx].append(state.finished_at - state.started_at)
+
+    def _get_straggler_threshold(self, op: int) -> Tick | None:
+        """
+        Returns the running time after which a task of the operator is a straggler, or None if
+        too few of its tasks finished.
+        """
+        durations = self._durations[op]
+        num_tasks = self.problem.operators[op].num_tasks
+        if not durations or len(durations) < self.quantile * num_tasks:
+            return None
+        return self.multiplier * float(np.median(durations))
+
+    def _get_backup_duration(self, task: TaskSpec) -> Tick:
+        spec = self.problem.operators[task.operator_idx]
+        if spec.duration_distribution is None:
+            return spec.duration
+        return float(spec.duration_distribution.sample(self._rng, 1)[0])
+
+    def tick(self, env: ExecutionEnvironment):
+        super().tick(env)
+        for op in env.operator_indices:
+            threshold = self._get_straggler_threshold(op)
+            if threshold is None:
+                continue
+            for task in env.get_tasks(op, TaskStateType.RUNNING):
+                started_at = env.task_states[task.id].started_at
+                if env._current_tick - started_at < threshold or env.has_backup(task):
+                    continue
+                if not env.start_backup_task_on_any_executor(task, self._get_backup_duration(task)):
+                    logging.debug(f"[{self}] Cannot start a backup of {task.id}")
+                    break
+                logging.debug(f"[{self}] Started a backup of {task.id}")
+                self.num_backups += 1
+
+    def get_next_wakeup(self, env: ExecutionEnvironment) -> Tick | None:
+        # The next time a running task becomes a straggler.
+        wakeups = []
+        for op in env.operator_indices:
+            threshold = self._get_straggler_threshold(op)
+            if threshold is None:
+                continue
+            wakeups.extend(
+                env.task_states[task.id].started_at + threshold
+                for task in env.get_tasks(op, TaskStateType.RUNNING)
+                if not env.has_backup(task)
+            )
+        return min((tick for tick in wakeups if tick > env._current_tick), default=None)
+
+
+class ReplayPolicy(SchedulingPolicy):
+    """
+    Replays a schedule, e.g. an optimal one found by the solvers: starts each task on its
+    executor at its start tick, or as soon as possible after that if the simulator cannot start
+    it then. Diffing `env.get_schedule` with the replayed schedule shows where they differ.
+    """
+
+    def __init__(self, problem: SchedulingProblem, schedule: Schedule):
+        super().__init__(problem)
+        self.schedule = schedule
+        # Tasks not started yet, in start order.
+        self._unstarted = list(schedule.tasks)
+
+    def __repr__(self):
+        return "ReplayPolicy"
+
+    def tick(self, env: ExecutionEnvironment):
+        super().tick(env)
+        unstarted = []
+        for task in self._unstarted:
+            if task.start > env._current_tick or not env.start_task(
+                env.task_specs[task.id], task.executor
+            ):
+                unstarted.append(task)
+        self._unstarted = unstarted
+
+    def get_next_wakeup(self, env: ExecutionEnvironment) -> Tick | None:
+        # Tasks that are late start on the task events that unblock them.
+        return min(
+            (task.start for task in self._unstarted if task.start > env._current_tick),
+            default=None,
+        )
+
+
+class _PlannedPolicy(SchedulingPolicy):
+    """
+    Starts tasks greedily, but at most `plan[i][op]` tasks of each operator on the i-th tick
+    after `start_tick`. Greedy once the plan runs out. Used for the rollouts of
+    `ModelPredictivePolicy`.
+    """
+
+    def __init__(self, problem: SchedulingProblem, plan: list[dict[int, int]], start_tick: Tick):
+        super().__init__(problem)
+        self.plan = plan
+        self.start_tick = start_tick
+
+    def __repr__(self):
+        return "_PlannedPolicy"
+
+    def tick(self, env: ExecutionEnvironment):
+        super().tick(env)
+        offset = math.floor(env._current_tick - self.start_tick)
+        caps = self.plan[offset] if offset < len(self.plan) else {}
+        _start_tasks(env, caps)
+
+
+def _start_tasks(env: ExecutionEnvironment, caps: dict[int, int]):
+    """
+    Starts pending tasks of each operator in order, at most `caps[op]` of them if set.
+    """
+    for op in env.operator_indices:
+        num_started = 0
+        while num_started < caps.get(op, math.inf) and (task := env.next_pending(op)) is not None:
+            if not env.start_task_on_any_executor(task):
+                break
+            num_started += 1
+
+
+class ModelPredictivePolicy(SchedulingPolicy):
+    """
+    A receding-horizon policy. On every tick with tasks to start, it simulates `budget` plans for
+    the next `horizon` ticks on forks of the environment, and commits only the first decision of
+    the best plan.
+
+    A plan caps the number of tasks of each operator to start on each tick. The candidates are
+    the greedy plan, the greedy plans that hold back one operator on the first tick, and random
+    plans. A plan is scored by the work done at the end of the horizon, i.e. the durations of the
+    finished tasks plus the time spent on running tasks that are not blocked. Plans that finish
+    all tasks are scored by their makespan.
+    """
+
+    def __init__(
+        self, problem: SchedulingProblem, horizon: int = 5, budget: int = 8, seed: int = 0
+    ):
+        """
+        :param horizon: Number of ticks to simulate for each plan.
+        :param budget: Number of plans simulated per decision.
+        :param seed: Seed of the random plans.
+        """
+        super().__init__(problem)
+        self.horizon = horizon
+        self.budget = budget
+        self.rng = np.random.default_rng(seed)
+        self.num_decisions = 0
+
+    def __repr__(self):
+        return "ModelPredictivePolicy"
+
+    def _get_candidate_plans(self, env: ExecutionEnvironment) -> list[list[dict[int, int]]]:
+        plans = [[]]
+        for op in env.operator_indices:
+            if env.next_pending(op) is not None:
+                plans.append([{op: 0}])
+        num_executors = len(env._executors)
+        while len(plans) < self.budget:
+            plans.append(
+                [
+                    {
+                        op: int(self.rng.integers(0, num_executors + 1))
+                        for op in env.operator_indices
+                    }
+                    for _ in range(self.horizon)
+                ]
+            )
+        return plans[: self.budget]
+
+    def _score(self, env: ExecutionEnvironment, plan: list[dict[int, int]]) -> tuple:
+        rollout = env.fork()
+        rollout.scheduling_policy = _PlannedPolicy(self.problem, plan, env._current_tick)
+        if rollout.run(env._current_tick + self.horizon):
+            return 1, -rollout._current_tick
+        work = sum(
+            task.duration
+            for op in rollout.operator_indices
+            for task in rollout.get_tasks(op, TaskStateType.FINISHED)
+        )
+        for executor in rollout._executors:
+            running_task = executor.running_task
+            # Tasks blocked on a full buffer hold their executor without doing work.
+            if (
+                running_task is not None
+                and rollout.task_states[running_task.spec.id].state != TaskStateType.PENDING_OUTPUT
+            ):
+                work += min(running_task.duration, rollout._current_tick - running_task.started_at)
+        return 0, work
+
+    def tick(self, env: ExecutionEnvironment):
+        super().tick(env)
+        if not any(env.next_pending(op) is not None for op in env.operator_indices):
+            return
+        plans = self._get_candidate_plans(env)
+        # Ties go to the earlier, i.e. greedier, plan.
+        scores = [self._score(env, plan) for plan in plans]
+        best = max(range(len(plans)), key=lambda i: (scores[i], -i))
+        self.num_decisions += 1
+        logging.debug(f"[{self}] Plan {best} scored {scores[best]}")
+        _start_tasks(env, plans[best][0] if plans[best] else {})
@@ -0,0 +1,60 @@
+import argparse
+import logging
+
+from ray_data_eval.common.ray_trace import (
+    get_wall_time,
+    load_ray_timeline,
+    make_problem_from_trace,
+    parse_ds_stats,
+)
+from ray_data_eval.simulator.benchmark import POLICIES
+from ray_data_eval.simulator.monte_carlo import run_monte_carlo
+
+
+def main(args):
+    logging.disable(logging.CRITICAL)
+    tasks = load_ray_timeline(args.timeline)
+    stats = None
+    if args.stats is not None:
+        with open(args.stats) as f:
+            stats = parse_ds_stats(f.read())
+    problem = make_problem_from_trace(
+        tasks,
+        name=args.timeline,
+        stats=stats,
+        tick_seconds=args.tick_seconds,
+        gpu_operators=args.gpu_operators,
+        buffer_size_limit=args.buffer_size_limit,
+    )
+    for op in problem.operators:
+        print(
+            f"{op.name}: {op.num_tasks} tasks, median duration {op.duration}, "
+            f"input {op.input_size}, output {op.output_size}, {op.resources}"
+        )
+    print(problem.resources, f"buffer_size_limit={problem.buffer_size_limit}")
+
+    measured = get_wall_time(tasks) / args.tick_seconds
+    print(f"Measured: {measured:.1f} ticks")
+    summary = run_monte_carlo(problem, POLICIES, args.num_replicas, num_workers=args.num_workers)
+    for result in summary:
+        predicted = result["makespan_p50"]
+        print(
+            result["policy"],
+            f"finished={result['finished']:.0%}",
+            f"predicted={predicted:.1f}",
+            f"error={(predicted - measured) / measured:+.1%}",
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay a Ray timeline in the simulator and compare the makespans."
+    )
+    parser.add_argument("timeline", help="JSON file written by ray.timeline()")
+    parser.add_argument("--stats", help="Text file with the output of ds.stats()")
+    parser.add_argument("--tick-seconds", type=float, default=1.0, help="Length of a tick")
+    parser.add_argument("--gpu-operators", nargs="*", default=[], help="Operators that run on GPUs")
+    parser.add_argument("--buffer-size-limit", type=int, help="Buffer size in blocks")
+    parser.add_argument("--num-replicas", type=int, default=20, help="Replicas per policy")
+    parser.add_argument("--num-workers", type=int, help="Number of worker processes")
+    main(parser.parse_args())
@@ -0,0 +1,959 @@
+import itertools
+import json
+import math
+from dataclasses import replace
+
+import pytest
+
+from ray_data_eval.common.distributions import Empirical, LogNormal, Uniform
+from ray_data_eval.common.pipeline import (
+    ActorPoolSpec,
+    BatchCostSpec,
+    ClusterSpec,
+    NodeSpec,
+    OperatorSpec,
+    ResourcesSpec,
+    SchedulingProblem,
+    SpillSpec,
+    e2e_problem2,
+    get_num_slots,
+    make_producer_consumer_problem,
+    multi_stage_problem,
+    producer_consumer_problem,
+    test_problem,
+    training_problem,
+)
+from ray_data_eval.common.ray_trace import (
+    get_wall_time,
+    load_ray_timeline,
+    make_problem_from_trace,
+    parse_ds_stats,
+)
+from ray_data_eval.simulator.actor_pool_benchmark import make_inference_problem
+from ray_data_eval.simulator.batched_environment import (
+    BATCHED_POLICIES,
+    BatchedExecutionEnvironment,
+    make_problem_grid,
+)
+from ray_data_eval.simulator.batching_benchmark import make_batched_inference_problem
+from ray_data_eval.simulator.cluster_environment import (
+    ClusterExecutionEnvironment,
+    EventDrivenClusterExecutionEnvironment,
+)
+from ray_data_eval.simulator.environment import (
+    CPU,
+    GPU,
+    Buffer,
+    ExecutionEnvironment,
+    HistoryEventType,
+    SchedulingPolicy,
+    TaskStateType,
+)
+from ray_data_eval.simulator.event_environment import EventDrivenExecutionEnvironment
+from ray_data_eval.simulator.fusion import optimize_fusion
+from ray_data_eval.simulator.monte_carlo import run_monte_carlo
+from ray_data_eval.simulator.policies import (
+    ActorPoolAutoscalingPolicy,
+    AIMDBackpressurePolicy,
+    ConcurrencyCapPolicy,
+    DelayPolicy,
+    DynamicBatchingPolicy,
+    GreedyOracleProducerFirstPolicy,
+    GreedyPolicy,
+    GreedyWithBufferPolicy,
+    ModelPredictivePolicy,
+    PIDBackpressurePolicy,
+    RatesEqualizingPolicy,
+    ReplayPolicy,
+    SpeculativeExecutionPolicy,
+    StreamingOutputBackpressurePolicy,
+)
+from ray_data_eval.simulator.streaming_benchmark import make_backpressure_problem
+from ray_data_eval.simulator.streaming_environment import StreamingExecutionEnvironment
+from ray_data_eval.simulator.sweep import SweepJob, run_sweep
+
+
+def test_buffer_fifo_per_operator():
+    producer, middle = test_problem.operators[0].tasks[0], multi_stage_problem.operators[1].tasks[0]
+    buffer = Buffer(capacity=4)
+    assert buffer.push(0, producer, 2) is not None
+    assert buffer.push(0, middle, 1) is not None
+    assert buffer.push(0, producer, 2) is None
+    assert buffer.get_available_space() == 1
+
+    assert buffer.peek(3, operator_idx=0) == []
+    items = buffer.peek(2, operator_idx=0)
+    assert [(item.operator_idx, item.block_id) for item in items] == [(0, 0), (0, 1)]
+    buffer.claim(items[:1])
+    assert buffer.get_num_consumable(0) == 1
+    assert buffer.peek(1, operator_idx=0) == [items[1]]
+
+    buffer.remove(items[:1])
+    assert len(buffer) == 2
+    assert buffer.get_available_space() == 2
+
+
+def _run(env_cls, problem: SchedulingProblem, policy_cls) -> ExecutionEnvironment:
+    env = env_cls(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=policy_cls(problem),
+    )
+    env.run(problem.time_limit)
+    return env
+
+
+def test_operator_task_queries():
+    env = ExecutionEnvironment(
+        resources=training_problem.resources,
+        buffer_size=training_problem.buffer_size_limit,
+        tasks=training_problem.tasks,
+    )
+    assert env.operator_indices == [2, 1, 0]
+    assert env.next_pending(0).id == "P_0"
+    assert env.next_pending(1).id == "C_0"
+    assert not env.start_task_on_any_executor(env.next_pending(1))
+
+    for _ in range(3):
+        assert env.start_task_on_any_executor(env.next_pending(0))
+    assert not env.start_task_on_any_executor(env.next_pending(0))
+    assert env.next_pending(0).id == "P_3"
+    assert env.num_running(0) == 3
+    assert env.num_pending(0) == 5
+    assert env.free_executors(CPU) == []
+    assert [executor.id for executor in env.free_executors(GPU)] == ["GPU0"]
+
+    env.tick()
+    assert env.num_running(0) == 0
+    assert env.get_num_tasks(0, TaskStateType.FINISHED) == 3
+    assert len(env.free_executors(CPU)) == 3
+
+
+@pytest.mark.parametrize(
+    "problem",
+    [test_problem, multi_stage_problem, producer_consumer_problem, training_problem, e2e_problem2],
+    ids=lambda p: p.name,
+)
+@pytest.mark.parametrize(
+    "policy_cls",
+    [
+        GreedyPolicy,
+        GreedyWithBufferPolicy,
+        GreedyOracleProducerFirstPolicy,
+        RatesEqualizingPolicy,
+        ConcurrencyCapPolicy,
+        DelayPolicy,
+    ],
+    ids=lambda p: p.__name__,
+)
+def test_event_driven_matches_tick(problem, policy_cls):
+    tick_env = _run(ExecutionEnvironment, problem, policy_cls)
+    event_env = _run(EventDrivenExecutionEnvironment, problem, policy_cls)
+    assert event_env._current_tick == tick_env._current_tick
+    for tid, state in tick_env.task_states.items():
+        event_state = event_env.task_states[tid]
+        assert (event_state.state, event_state.started_at, event_state.finished_at) == (
+            state.state,
+            state.started_at,
+            state.finished_at,
+        ), tid
+    for tick_executor, event_executor in zip(
+        tick_env._executors, event_env._executors, strict=True
+    ):
+        assert event_executor._timeline == tick_executor._timeline
+    assert event_env.buffer._timeline == tick_env.buffer._timeline
+
+
+def test_event_driven_fractional_durations():
+    problem = make_producer_consumer_problem(
+        num_producers=2,
+        num_consumers=2,
+        producer_time=0.5,
+        consumer_time=1.5,
+        num_execution_slots=2,
+        buffer_size_limit=2,
+    )
+    env = _run(EventDrivenExecutionEnvironment, problem, GreedyPolicy)
+    assert env.all_tasks_finished()
+    assert env._current_tick == 2.0
+    assert [env.task_states[f"C_{i}"].started_at for i in range(2)] == [0.5, 0.5]
+
+
+@pytest.mark.parametrize("policy_cls", list(BATCHED_POLICIES), ids=lambda p: p.__name__)
+def test_batched_matches_object_simulator(policy_cls):
+    problems = make_problem_grid(
+        training_problem,
+        buffer_size_limits=[2, 4, 8],
+        num_cpus=[1, 3],
+        producer_durations=[1, 3],
+    )
+    env = BatchedExecutionEnvironment(problems, policy_cls)
+    env.run()
+    makespans = env.get_makespans()
+    for i, problem in enumerate(problems):
+        object_env = _run(ExecutionEnvironment, problem, policy_cls)
+        assert makespans[i] == object_env._current_tick, problem.name
+        assert env.peak_buffer_size[i] == max(object_env.buffer._timeline), problem.name
+
+
+def test_batched_rejects_unsupported_problems():
+    producer, consumer = test_problem.operators
+    straggler = replace(producer)
+    straggler.tasks[0] = replace(straggler.tasks[0], duration=20)
+    for problem in [
+        replace(test_problem, operators=[replace(producer, duration=1.5), consumer]),
+        replace(
+            test_problem,
+            operators=[replace(producer, duration_distribution=LogNormal(1, 0.5)), consumer],
+        ),
+        replace(test_problem, operators=[straggler, consumer]),
+        replace(test_problem, resources=ResourcesSpec(cpu=1.5)),
+    ]:
+        with pytest.raises(AssertionError):
+            BatchedExecutionEnvironment([problem], GreedyPolicy)
+
+
+def test_sweep_caches_results(tmp_path):
+    jobs = [SweepJob(test_problem, GreedyPolicy), SweepJob(test_problem, DelayPolicy)]
+    rows = run_sweep(jobs, cache_dir=str(tmp_path), num_workers=1)
+    assert [row["makespan"] for row in rows] == [
+        _run(ExecutionEnvironment, test_problem, policy_cls)._current_tick
+        for policy_cls in [GreedyPolicy, DelayPolicy]
+    ]
+    assert len(list(tmp_path.iterdir())) == 2
+
+    # Adding a policy only computes the new job; renaming a problem keeps its key.
+    renamed = make_producer_consumer_problem(
+        name="renamed",
+        num_producers=8,
+        num_consumers=8,
+        consumer_time=2,
+        num_execution_slots=2,
+        time_limit=20,
+        buffer_size_limit=4,
+    )
+    assert SweepJob(renamed, GreedyPolicy).get_key() == jobs[0].get_key()
+    jobs.append(SweepJob(test_problem, ConcurrencyCapPolicy))
+    assert run_sweep(jobs, cache_dir=str(tmp_path), num_workers=1)[:2] == rows
+    assert len(list(tmp_path.iterdir())) == 3
+
+    # Edited tasks and the engine are part of the key.
+    producer, consumer = test_problem.operators
+    straggler = replace(producer)
+    straggler.tasks[0] = replace(straggler.tasks[0], duration=20)
+    edited = replace(test_problem, operators=[straggler, consumer])
+    assert SweepJob(edited, GreedyPolicy).get_key() != jobs[0].get_key()
+    ticked = SweepJob(edited, GreedyPolicy, event_driven=False)
+    assert ticked.get_key() != SweepJob(edited, GreedyPolicy).get_key()
+    [row] = run_sweep([ticked], cache_dir=str(tmp_path), num_workers=1)
+    assert row["makespan"] == _run(ExecutionEnvironment, edited, GreedyPolicy)._current_tick
+    assert row["makespan"] > rows[0]["makespan"]
+
+
+def test_sample_problem():
+    producer, middle, sink = multi_stage_problem.operators[:3]
+    problem = replace(
+        multi_stage_problem,
+        operators=[
+            replace(producer, duration_distribution=LogNormal(1, 1)),
+            replace(middle, output_size_distribution=Empirical([1, 3])),
+            *multi_stage_problem.operators[2:],
+        ],
+    )
+    sampled = problem.sample(seed=0)
+    assert sampled.tasks == problem.sample(seed=0).tasks
+    assert sampled.tasks != problem.sample(seed=1).tasks
+    assert len({task.duration for task in sampled.operators[0].tasks}) == producer.num_tasks
+
+    # Downstream task counts follow the sampled output sizes.
+    for upstream, downstream in itertools.pairwise(sampled.operators[1:]):
+        assert sum(task.output_size for task in upstream.tasks) == sum(
+            task.input_size for task in downstream.tasks
+        )
+    assert [task.input_size for task in sampled.operators[2].tasks][:-1] == [sink.input_size] * (
+        sampled.operators[2].num_tasks - 1
+    )
+
+
+def test_monte_carlo():
+    producer = e2e_problem2.operators[0]
+    problem = replace(
+        e2e_problem2,
+        operators=[
+            replace(producer, duration_distribution=Uniform(2, 6)),
+            *e2e_problem2.operators[1:],
+        ],
+    )
+    summary = run_monte_carlo(problem, [GreedyPolicy, DelayPolicy], 8, num_workers=1)
+    assert [result["policy"] for result in summary] == ["GreedyPolicy", "DelayPolicy"]
+    for result in summary:
+        assert result["num_replicas"] == 8
+        assert result["finished"] == 1
+        assert result["makespan_p50"] <= result["makespan_p90"] <= result["makespan_p99"]
+        assert result["peak_buffer_size_p99"] <= problem.buffer_size_limit
+
+    # The replicas that run out of time do not count towards the percentiles.
+    [result] = run_monte_carlo(replace(problem, time_limit=33), [GreedyPolicy], 8, num_workers=1)
+    assert result["finished"] == 5 / 8
+    assert result["makespan_p99"] < 33
+    [result] = run_monte_carlo(replace(problem, time_limit=20), [GreedyPolicy], 8, num_workers=1)
+    assert result["finished"] == 0
+    assert math.isnan(result["makespan_p50"]) and math.isnan(result["peak_buffer_size_p50"])
+
+
+def test_single_node_cluster_matches_environment():
+    problem = training_problem
+    cluster = ClusterSpec(
+        [NodeSpec("node", problem.resources, problem.buffer_size_limit)],
+        network_bandwidth=1,
+    )
+    env = _run(ExecutionEnvironment, problem, GreedyPolicy)
+    cluster_env = ClusterExecutionEnvironment(
+        cluster=cluster, tasks=problem.tasks, scheduling_policy=GreedyPolicy(problem)
+    )
+    cluster_env.run(problem.time_limit)
+    assert cluster_env._current_tick == env._current_tick
+    assert cluster_env.buffer._timeline == env.buffer._timeline
+    assert cluster_env.get_num_transferred_items() == 0
+
+
+def test_cluster_network_transfer():
+    problem = SchedulingProblem(
+        [
+            OperatorSpec("P", 0, 4, 1, 0, 1, ResourcesSpec(cpu=1)),
+            OperatorSpec("T", 1, 2, 1, 2, 0, ResourcesSpec(gpu=1)),
+        ],
+        name="transfer",
+        resources=ResourcesSpec(cpu=2, gpu=1),
+        time_limit=20,
+        buffer_size_limit=4,
+    )
+    cluster = ClusterSpec(
+        [
+            NodeSpec("cpu_node", ResourcesSpec(cpu=2), 4),
+            NodeSpec("gpu_node", ResourcesSpec(gpu=1), 4),
+        ],
+        network_bandwidth=4,
+    )
+    env = EventDrivenClusterExecutionEnvironment(
+        cluster=cluster, tasks=problem.tasks, scheduling_policy=GreedyPolicy(problem)
+    )
+    assert env.run(problem.time_limit)
+    # Each consumer fetches its 2 inputs in 0.5 ticks before running for 1 tick.
+    assert [env.task_states[f"T_{i}"].started_at for i in range(2)] == [1, 2.5]
+    assert [env.task_states[f"T_{i}"].finished_at for i in range(2)] == [2.5, 4]
+    assert env.get_num_transferred_items() == 4
+    assert env.buffer.get_node_size(0) == 0
+
+
+class _PreferLastNodePolicy(GreedyPolicy):
+    def get_preferred_nodes(self, env, task):
+        return [len(env.cluster.nodes) - 1]
+
+
+def test_cluster_locality_preference():
+    cluster = ClusterSpec(
+        [NodeSpec(f"node_{i}", ResourcesSpec(cpu=1), 2) for i in range(3)],
+        network_bandwidth=1,
+    )
+    env = ClusterExecutionEnvironment(
+        cluster=cluster,
+        tasks=test_problem.tasks,
+        scheduling_policy=_PreferLastNodePolicy(test_problem),
+    )
+    env.scheduling_policy.tick(env)
+    # Producers start on the preferred node first, then on the others in order.
+    assert [executor.node for executor in env._executors if executor.running_task] == [0, 1, 2]
+    assert env._executors[2].running_task.spec.id == "P_0"
+
+
+def test_spill_to_disk():
+    problem = make_producer_consumer_problem(
+        num_producers=2,
+        num_consumers=2,
+        num_execution_slots=2,
+        time_limit=20,
+        buffer_size_limit=1,
+    )
+    spill = SpillSpec(capacity=1, write_bandwidth=1, read_bandwidth=1, restore_latency=1)
+    env = EventDrivenExecutionEnvironment(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=GreedyPolicy(problem),
+        spill=spill,
+    )
+    assert env.run(problem.time_limit)
+    # P_1 spills instead of blocking. C_1 waits for the write (1 tick), the restore latency
+    # (1 tick) and the read (1 tick) before running.
+    assert env.task_states["P_1"].finished_at == 1
+    assert env.task_states["C_1"].finished_at == 5
+    assert env.buffer.spill_tier.num_spilled_items == 1
+    assert env.buffer.spill_tier.num_restored_items == 1
+    assert len(env.buffer) == len(env.buffer.spill_tier) == 0
+
+
+def test_problem_from_ray_timeline(tmp_path):
+    events = [{"cat": "task:execute", "ph": "X", "ts": 0, "dur": 1, "pid": "node"}]
+    for i in range(4):
+        events.append(
+            {
+                "cat": "task::ReadRange->MapBatches(produce)",
+                "ph": "X",
+                "ts": 1_000_000 + i // 2 * 2_000_000,
+                "dur": 2_000_000,
+                "pid": "cpu_node",
+            }
+        )
+    for i in range(8):
+        events.append(
+            {
+                "cat": "task::MapBatches(Classifier)",
+                "ph": "X",
+                "ts": 3_000_000 + i * 1_000_000,
+                "dur": 1_000_000 if i % 2 else 3_000_000,
+                "pid": "gpu_node",
+            }
+        )
+    path = tmp_path / "timeline.json"
+    path.write_text(json.dumps(events))
+    stats = parse_ds_stats(
+        "Operator 1 ReadRange->MapBatches(produce): 4 tasks executed, 8 blocks produced in 4s\n"
+        "* Remote wall time: 2s min, 2s max, 2s mean, 8s total\n"
+        "Operator 2 MapBatches(Classifier): 8 tasks executed, 8 blocks produced in 8s\n"
+    )
+
+    tasks = load_ray_timeline(str(path))
+    assert len(tasks) == 12
+    assert get_wall_time(tasks) == 11
+    problem = make_problem_from_trace(tasks, stats=stats, gpu_operators=["Classifier"])
+    producer, consumer = problem.operators
+    assert (producer.name, producer.num_tasks, producer.duration) == (
+        "ReadRange->MapBatches(produce)",
+        4,
+        2,
+    )
+    assert (producer.output_size, consumer.input_size, consumer.output_size) == (2, 1, 0)
+    assert sorted(consumer.duration_distribution.samples) == [1] * 4 + [3] * 4
+    assert (problem.resources.cpu, problem.resources.gpu) == (2, 2)
+    assert problem.buffer_size_limit == 8
+
+
+@pytest.mark.parametrize("env_cls", [ExecutionEnvironment, EventDrivenExecutionEnvironment])
+@pytest.mark.parametrize("policy_cls", [GreedyPolicy, GreedyWithBufferPolicy, DelayPolicy])
+def test_replay_schedule(env_cls, policy_cls, tmp_path):
+    problem = training_problem
+    env = env_cls(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=policy_cls(problem),
+    )
+    assert env.run(problem.time_limit)
+    schedule = env.get_schedule(problem)
+    assert schedule.makespan == env._current_tick
+    assert len(schedule.tasks) == problem.num_total_tasks
+    assert all(level == 0 for levels in schedule.buffer_levels for level in levels[-1:])
+
+    env = env_cls(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=ReplayPolicy(problem, schedule),
+    )
+    assert env.run(problem.time_limit)
+    replayed = env.get_schedule(problem)
+    assert replayed.diff(schedule) == []
+    assert replayed.buffer_levels == schedule.buffer_levels
+
+    path = tmp_path / "schedule.json"
+    schedule.to_chrome_trace(str(path), tick_seconds=1)
+    events = json.loads(path.read_text())
+    tasks = [event for event in events if event["ph"] == "X"]
+    assert len(tasks) == problem.num_total_tasks
+    assert max(event["ts"] + event["dur"] for event in tasks) == schedule.makespan * 1e6
+    assert len(schedule.get_buffer_rows()) == (problem.num_operators - 1) * (schedule.makespan + 1)
+
+
+@pytest.mark.parametrize("policy_cls", [AIMDBackpressurePolicy, PIDBackpressurePolicy])
+@pytest.mark.parametrize(
+    "problem", [test_problem, multi_stage_problem, training_problem, e2e_problem2]
+)
+def test_feedback_backpressure(policy_cls, problem):
+    greedy = _run(EventDrivenExecutionEnvironment, problem, GreedyPolicy)
+    env = _run(EventDrivenExecutionEnvironment, problem, policy_cls)
+    assert env._current_tick <= greedy._current_tick + 2
+    # The caps of the operators that grow the buffer converge to a finite number of tasks.
+    policy = env.scheduling_policy
+    assert policy.controlled_operators
+    assert all(1 <= policy.limits[op] < float("inf") for op in policy.controlled_operators)
+
+
+@pytest.mark.parametrize("policy_cls", [AIMDBackpressurePolicy, PIDBackpressurePolicy])
+def test_feedback_backpressure_occupancy(policy_cls):
+    # Consumers are slower than producers, so greedy runs ahead and fills most of the buffer.
+    problem = make_producer_consumer_problem(
+        num_producers=16,
+        num_consumers=16,
+        producer_time=1,
+        consumer_time=2,
+        producer_output_size=2,
+        consumer_input_size=2,
+        num_execution_slots=4,
+        buffer_size_limit=10,
+        time_limit=100,
+    )
+    greedy = _run(EventDrivenExecutionEnvironment, problem, GreedyPolicy)
+    env = _run(EventDrivenExecutionEnvironment, problem, policy_cls)
+    assert env.all_tasks_finished()
+    assert max(greedy.buffer._timeline) == 8
+    assert max(env.buffer._timeline) < max(greedy.buffer._timeline)
+
+
+@pytest.mark.parametrize("output_queue_size,generator_buffer_size", [(1, 1), (2, 4), (8, 2)])
+def test_streaming_output_backpressure(output_queue_size, generator_buffer_size):
+    # The configuration of nanobenchmarks/test_large_e2e_backpressure.py.
+    problem = make_backpressure_problem(
+        num_cpus=8, num_tasks=16, blocks_per_task=10, produce_duration=10
+    )
+    env = StreamingExecutionEnvironment(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=StreamingOutputBackpressurePolicy(
+            problem,
+            max_blocks_in_op_output_queue=output_queue_size,
+            max_blocks_in_generator_buffer=generator_buffer_size,
+        ),
+    )
+    assert env.run(problem.time_limit)
+    assert max(env.buffer._timeline) <= 10 + 7 * generator_buffer_size + output_queue_size
+    assert len(env.buffer) == 0
+
+    greedy = StreamingExecutionEnvironment(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=GreedyPolicy(problem),
+    )
+    assert greedy.run(problem.time_limit)
+    assert max(greedy.buffer._timeline) > max(env.buffer._timeline)
+
+
+@pytest.mark.parametrize("env_cls", [ExecutionEnvironment, EventDrivenExecutionEnvironment])
+@pytest.mark.parametrize(
+    "problem,greedy_makespan,makespan",
+    [
+        # The optimal makespans are 9, 10 and 32 ticks.
+        (multi_stage_problem, 12, 9),
+        (producer_consumer_problem, 12, 11),
+        (e2e_problem2, 32, 32),
+    ],
+)
+def test_model_predictive_policy(env_cls, problem, greedy_makespan, makespan):
+    assert _run(env_cls, problem, GreedyPolicy)._current_tick == greedy_makespan
+    env = _run(env_cls, problem, ModelPredictivePolicy)
+    assert env.all_tasks_finished()
+    assert env._current_tick == makespan
+    assert env.scheduling_policy.num_decisions > 0
+
+
+def test_model_predictive_policy_score():
+    problem = make_producer_consumer_problem(
+        num_producers=4,
+        num_consumers=4,
+        consumer_time=4,
+        num_execution_slots=4,
+        buffer_size_limit=1,
+        time_limit=40,
+    )
+    env = _run(EventDrivenExecutionEnvironment, replace(problem, time_limit=4), GreedyPolicy)
+    assert env.get_num_tasks(0, TaskStateType.PENDING_OUTPUT) == 3
+    # P_0 and 3 ticks of C_0. The producers blocked on the full buffer do no work.
+    assert ModelPredictivePolicy(problem, horizon=0)._score(env, []) == (0, 1 + 3)
+
+
+@pytest.mark.parametrize(
+    "output_delay,buffer_size_limit,consumers_started_at,producer_finished_at,max_buffer",
+    [
+        # One output per tick, consumed as soon as it is read.
+        (0, 4, [1, 2, 3, 4], 4, 1),
+        # Two outputs per tick after a delay of two ticks.
+        (2, 4, [3, 3, 4, 4], 4, 2),
+        # All outputs at the end, as without streaming.
+        (4, 4, [4, 4, 4, 5], 4, 4),
+        # The producer pauses while the buffer is full.
+        (2, 1, [3, 4, 5, 6], 6, 1),
+    ],
+)
+def test_streaming_outputs(
+    output_delay, buffer_size_limit, consumers_started_at, producer_finished_at, max_buffer
+):
+    problem = make_producer_consumer_problem(
+        producer_time=4,
+        producer_output_size=4,
+        num_consumers=4,
+        num_execution_slots=3,
+        buffer_size_limit=buffer_size_limit,
+        time_limit=20,
+    )
+    producer, consumer = problem.operators
+    problem = replace(problem, operators=[replace(producer, output_delay=output_delay), consumer])
+    env = StreamingExecutionEnvironment(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=GreedyPolicy(problem),
+    )
+    assert env.run(problem.time_limit)
+    assert [env.task_states[f"C_{i}"].started_at for i in range(4)] == consumers_started_at
+    assert env.task_states["P_0"].finished_at == producer_finished_at
+    # Outputs consumed as they stream take up less of the buffer than the 4 outputs at once.
+    assert max(env.buffer._timeline) == max_buffer
+
+
+def test_get_num_slots():
+    machine = ResourcesSpec(cpu=8, gpu=4)
+    assert get_num_slots(machine, [ResourcesSpec(cpu=1), ResourcesSpec(gpu=1)]) == (8, 4)
+    assert get_num_slots(machine, [ResourcesSpec(cpu=0.99), ResourcesSpec(gpu=1)]) == (8, 4)
+    assert get_num_slots(machine, [ResourcesSpec(cpu=0.5), ResourcesSpec(gpu=0.5)]) == (16, 8)
+    # A GPU task's CPU request does not add CPU slots.
+    assert get_num_slots(machine, [ResourcesSpec(cpu=0.1, gpu=1)]) == (8, 4)
+
+
+@pytest.mark.parametrize(
+    "inference_resources,num_running",
+    [
+        # The oversubscription used in microbenchmarks/raydata/producer_consumer_gpu.py.
+        (ResourcesSpec(cpu=0, gpu=1), 12),
+        (ResourcesSpec(cpu=1, gpu=1), 8),
+    ],
+)
+def test_fractional_resources(inference_resources, num_running):
+    problem = SchedulingProblem(
+        [
+            OperatorSpec(
+                name="C",
+                operator_idx=0,
+                num_tasks=8,
+                duration=2,
+                input_size=0,
+                output_size=0,
+                resources=ResourcesSpec(cpu=0.99),
+            ),
+            OperatorSpec(
+                name="I",
+                operator_idx=1,
+                num_tasks=4,
+                duration=2,
+                input_size=0,
+                output_size=0,
+                resources=inference_resources,
+            ),
+        ],
+        name="fractional",
+        resources=ResourcesSpec(cpu=8, gpu=4),
+        time_limit=10,
+        buffer_size_limit=1,
+    )
+    env = EventDrivenExecutionEnvironment(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=GreedyPolicy(problem),
+    )
+    env.scheduling_policy.tick(env)
+    assert env.num_running(0) + env.num_running(1) == num_running
+    assert env.num_running(1) == 4
+    assert env.run(problem.time_limit)
+    assert env._current_tick == (2 if num_running == 12 else 4)
+
+
+def test_fuse_operators():
+    fused = multi_stage_problem.fuse([[0], [1, 2], [3]])
+    assert [op.name for op in fused.operators] == ["A", "B->C", "D"]
+    assert [op.operator_idx for op in fused.operators] == [0, 1, 2]
+    # B's 8 tasks and C's 4 tasks become 8 tasks that each do half of a C task.
+    b_c = fused.operators[1]
+    assert (b_c.num_tasks, b_c.duration, b_c.input_size, b_c.output_size) == (8, 2.5, 1, 5)
+    assert multi_stage_problem.fuse([[0], [1], [2], [3]]) == multi_stage_problem
+
+    with pytest.raises(ValueError, match="in order"):
+        multi_stage_problem.fuse([[0, 2], [1], [3]])
+    with pytest.raises(ValueError, match="different resources"):
+        training_problem.fuse([[0], [1, 2]])
+
+    a, b, c, d = multi_stage_problem.operators
+
+    def fuse_b_c(b: OperatorSpec, c: OperatorSpec) -> SchedulingProblem:
+        return replace(multi_stage_problem, operators=[a, b, c, d]).fuse([[0], [1, 2], [3]])
+
+    # B's outputs stay inside the fused task, so its delay does not matter.
+    assert fuse_b_c(replace(b, output_delay=1), c) == fused
+    with pytest.raises(ValueError, match="output delay"):
+        fuse_b_c(b, replace(c, output_delay=1))
+    with pytest.raises(ValueError, match="distributions"):
+        fuse_b_c(replace(b, duration_distribution=Uniform(1, 3)), c)
+    with pytest.raises(ValueError, match="distributions"):
+        fuse_b_c(b, replace(c, output_size_distribution=Uniform(5, 15)))
+
+
+def test_optimize_fusion():
+    results = optimize_fusion(multi_stage_problem, num_workers=2)
+    assert len(results) == 8
+    assert all(result.finished for result in results)
+    assert [result.makespan for result in results] == sorted(result.makespan for result in results)
+    assert results[0].groups == [[0], [1, 2, 3]]
+    unfused = next(result for result in results if len(result.groups) == 4)
+    assert results[0].makespan < unfused.makespan
+
+
+def _run_inference(env_cls, actor_pool: ActorPoolSpec, policy_cls, **kwargs):
+    problem = make_inference_problem(
+        num_cpus=4, num_gpus=4, buffer_size_limit=8, actor_pool=actor_pool, **kwargs
+    )
+    env = env_cls(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=policy_cls(problem),
+        actor_pools=problem.actor_pools,
+    )
+    assert env.run(problem.time_limit)
+    return env
+
+
+@pytest.mark.parametrize(
+    "env_cls",
+    [ExecutionEnvironment, EventDrivenExecutionEnvironment, StreamingExecutionEnvironment],
+)
+def test_actor_pool_startup(env_cls):
+    env = _run_inference(
+        env_cls,
+        ActorPoolSpec(min_size=2, max_size=2, startup_duration=3),
+        GreedyPolicy,
+        num_batches=12,
+        preprocess_duration=1,
+        inference_duration=2,
+    )
+    actors = env._actors[1]
+    assert [(actor.started_at, actor.ready_at) for actor in actors] == [(0, 3), (0, 3)]
+    # Only the two actors run inference, although 4 GPUs are available.
+    assert env._current_tick == 3 + 12 // 2 * 2
+    assert env.get_time_to_first_output() == 5
+    assert env.get_actor_ticks_wasted() == 2 * 3
+
+
+@pytest.mark.parametrize("env_cls", [ExecutionEnvironment, EventDrivenExecutionEnvironment])
+def test_actor_pool_autoscaling(env_cls):
+    kwargs = {"num_batches": 16, "preprocess_duration": 3, "inference_duration": 1}
+    fixed = _run_inference(env_cls, ActorPoolSpec(min_size=1, max_size=1), GreedyPolicy, **kwargs)
+    env = _run_inference(
+        env_cls,
+        ActorPoolSpec(min_size=1, max_size=4, startup_duration=1, idle_timeout=1),
+        ActorPoolAutoscalingPolicy,
+        **kwargs,
+    )
+    assert env._current_tick < fixed._current_tick
+    actors = env._actors[1]
+    assert len(actors) > 1
+    # Actors that are scaled up go idle between bursts of inputs and time out.
+    assert any(actor.stopped_at is not None for actor in actors)
+    for tick in range(env._current_tick):
+        num_alive = sum(
+            actor.started_at <= tick and (actor.stopped_at is None or tick < actor.stopped_at)
+            for actor in actors
+        )
+        assert num_alive <= 4
+    lifetimes = sum(
+        (env._current_tick if actor.stopped_at is None else actor.stopped_at) - actor.started_at
+        for actor in actors
+    )
+    assert env.get_actor_ticks_wasted() == lifetimes - 16
+
+
+def _run_batched_inference(env_cls, policy: SchedulingPolicy):
+    problem = policy.problem
+    env = env_cls(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=policy,
+        batch_costs=problem.batch_costs,
+    )
+    assert env.run(problem.time_limit)
+    return env
+
+
+def _make_batched_inference_problem(num_cpus: int, overhead: int) -> SchedulingProblem:
+    return make_batched_inference_problem(
+        num_cpus=num_cpus,
+        num_gpus=1,
+        num_items=8,
+        preprocess_duration=1,
+        batch_cost=BatchCostSpec(overhead=overhead, per_task_duration=1, max_batch_size=4),
+        buffer_size_limit=8,
+    )
+
+
+@pytest.mark.parametrize("env_cls", [ExecutionEnvironment, EventDrivenExecutionEnvironment])
+@pytest.mark.parametrize(
+    "policy_cls,params,expected_makespan,expected_first_output",
+    [
+        # One task at a time pays the overhead for every item.
+        (GreedyPolicy, {}, 1 + 8 * 3, 4),
+        (DynamicBatchingPolicy, {}, 1 + 2 * 6, 7),
+        (DynamicBatchingPolicy, {"max_batch_size": 2}, 1 + 4 * 4, 5),
+    ],
+)
+def test_batch_cost(env_cls, policy_cls, params, expected_makespan, expected_first_output):
+    problem = _make_batched_inference_problem(num_cpus=8, overhead=2)
+    env = _run_batched_inference(env_cls, policy_cls(problem, **params))
+    assert env._current_tick == expected_makespan
+    assert env.get_time_to_first_output() == expected_first_output
+
+
+@pytest.mark.parametrize("env_cls", [ExecutionEnvironment, EventDrivenExecutionEnvironment])
+def test_dynamic_batching_delay(env_cls):
+    # The producer yields an item per tick. Without a delay, the first item runs alone.
+    problem = _make_batched_inference_problem(num_cpus=1, overhead=4)
+    eager = _run_batched_inference(env_cls, DynamicBatchingPolicy(problem))
+    delayed = _run_batched_inference(env_cls, DynamicBatchingPolicy(problem, max_delay=3))
+    assert [eager.task_states[f"I_{i}"].started_at for i in range(8)] == [1, 6, 6, 6, 6, 14, 14, 14]
+    assert [delayed.task_states[f"I_{i}"].started_at for i in range(8)] == [4] * 4 + [12] * 4
+    assert (eager._current_tick, eager.get_time_to_first_output()) == (21, 6)
+    assert (delayed._current_tick, delayed.get_time_to_first_output()) == (20, 12)
+
+
+@pytest.mark.parametrize("env_cls", [ExecutionEnvironment, EventDrivenExecutionEnvironment])
+def test_cancel_task(env_cls):
+    problem = test_problem
+    env = env_cls(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=GreedyPolicy(problem),
+    )
+    while env.num_running(1) == 0:
+        env.tick()
+    task = env.get_tasks(1, TaskStateType.RUNNING)[0]
+    num_consumable = env.buffer.get_num_consumable(0)
+    buffer_size = len(env.buffer)
+
+    assert env.cancel_task(task)
+    assert not env.cancel_task(task)
+    assert env.task_states[task.id].state == TaskStateType.PENDING
+    assert env.task_states[task.id].started_at == -1
+    # The input is consumable again and still takes up space.
+    assert env.buffer.get_num_consumable(0) == num_consumable + 1
+    assert len(env.buffer) == buffer_size
+    assert task in env.get_tasks(1, TaskStateType.PENDING)
+
+    assert env.run(problem.time_limit)
+    assert len(env.buffer) == 0
+    assert all(state.state == TaskStateType.FINISHED for state in env.task_states.values())
+
+
+def _make_straggler_problem() -> SchedulingProblem:
+    producer = OperatorSpec(
+        name="P",
+        operator_idx=0,
+        num_tasks=8,
+        duration=2,
+        input_size=0,
+        output_size=1,
+        resources=ResourcesSpec(cpu=1),
+    )
+    producer.tasks[0] = replace(producer.tasks[0], duration=20)
+    consumer = OperatorSpec(
+        name="C",
+        operator_idx=1,
+        num_tasks=8,
+        duration=1,
+        input_size=1,
+        output_size=0,
+        resources=ResourcesSpec(cpu=1),
+    )
+    return SchedulingProblem(
+        [producer, consumer],
+        name="straggler",
+        resources=ResourcesSpec(cpu=4),
+        time_limit=40,
+        buffer_size_limit=8,
+    )
+
+
+@pytest.mark.parametrize("env_cls", [ExecutionEnvironment, EventDrivenExecutionEnvironment])
+def test_speculative_execution(env_cls):
+    problem = _make_straggler_problem()
+    assert _run(env_cls, problem, GreedyPolicy)._current_tick == 21
+
+    env = _run(env_cls, problem, SpeculativeExecutionPolicy)
+    assert env.scheduling_policy.num_backups == 1
+    # The backup of P_0 starts at tick 6, once it ran for 1.5x the median of 2 ticks and an
+    # executor is idle, and takes the nominal 2 ticks.
+    assert env.task_states["P_0"].finished_at == 8
+    assert env._current_tick == 9
+    assert len(env.buffer) == 0
+    assert not env.has_backup(problem.tasks[-1])
+    assert len(env._idle_executor_ids[CPU]) == 4
+    cancelled = [
+        event
+        for executor in env._executors
+        for event in executor._events
+        if event.type == HistoryEventType.TASK_CANCELLED
+    ]
+    assert [event.task.id for event in cancelled] == ["P_0"]
+
+
+def test_speculative_execution_streaming():
+    # Streamed outputs cannot be rolled back or yielded twice, so the policy runs as greedy.
+    problem = _make_straggler_problem()
+    env = _run(StreamingExecutionEnvironment, problem, SpeculativeExecutionPolicy)
+    assert env.scheduling_policy.num_backups == 0
+    assert (
+        env._current_tick
+        == _run(StreamingExecutionEnvironment, problem, GreedyPolicy)._current_tick
+    )
+    assert all(state.state == TaskStateType.FINISHED for state in env.task_states.values())
+    assert not env.cancel_task(problem.tasks[0])
+
+
+def _get_result(env: ExecutionEnvironment):
+    return (
+        env._current_tick,
+        {
+            tid: (state.state, state.started_at, state.finished_at)
+            for tid, state in env.task_states.items()
+        },
+    )
+
+
+@pytest.mark.parametrize("env_cls", [ExecutionEnvironment, EventDrivenExecutionEnvironment])
+def test_fork_and_restore(env_cls):
+    problem = e2e_problem2
+    expected = _get_result(_run(env_cls, problem, RatesEqualizingPolicy))
+    env = env_cls(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=RatesEqualizingPolicy(problem),
+    )
+    for _ in range(5):
+        env.tick()
+    before = _get_result(env)
+    timeline = list(env.buffer._timeline)
+
+    fork = env.fork()
+    fork.run(problem.time_limit)
+    assert _get_result(fork) == expected
+    assert _get_result(env) == before
+
+    snapshot = env.snapshot()
+    for _ in range(2):
+        env.run(problem.time_limit)
+        assert _get_result(env) == expected
+        env.restore(snapshot)
+        assert _get_result(env) == before
+        assert env.buffer._timeline == timeline
@@ -0,0 +1,94 @@
+import argparse
+import itertools
+import logging
+
+from ray_data_eval.common.pipeline import OperatorSpec, ResourcesSpec, SchedulingProblem
+from ray_data_eval.simulator.policies import StreamingOutputBackpressurePolicy
+from ray_data_eval.simulator.streaming_environment import StreamingExecutionEnvironment
+
+
+def make_backpressure_problem(
+    *, num_cpus: int, num_tasks: int, blocks_per_task: int, produce_duration: int
+) -> SchedulingProblem:
+    """
+    The workload of `nanobenchmarks/test_large_e2e_backpressure.py`: producers that yield
+    `blocks_per_task` blocks each, and a consumer task per block that takes one tick.
+    """
+    return SchedulingProblem(
+        [
+            OperatorSpec(
+                name="P",
+                operator_idx=0,
+                num_tasks=num_tasks,
+                duration=produce_duration,
+                input_size=0,
+                output_size=blocks_per_task,
+                resources=ResourcesSpec(cpu=1),
+            ),
+            OperatorSpec(
+                name="C",
+                operator_idx=1,
+                num_tasks=num_tasks * blocks_per_task,
+                duration=1,
+                input_size=1,
+                output_size=0,
+                resources=ResourcesSpec(cpu=1),
+            ),
+        ],
+        name="large_e2e_backpressure",
+        resources=ResourcesSpec(cpu=num_cpus),
+        time_limit=num_tasks * blocks_per_task * (produce_duration + 1),
+        buffer_size_limit=num_tasks * blocks_per_task,
+    )
+
+
+def main(args):
+    logging.disable(logging.CRITICAL)
+    problem = make_backpressure_problem(
+        num_cpus=args.num_cpus,
+        num_tasks=args.num_tasks,
+        blocks_per_task=args.blocks_per_task,
+        produce_duration=args.produce_duration,
+    )
+    for output_queue_size, generator_buffer_size in itertools.product(
+        args.max_blocks_in_op_output_queue, args.max_blocks_in_generator_buffer
+    ):
+        env = StreamingExecutionEnvironment(
+            resources=problem.resources,
+            buffer_size=problem.buffer_size_limit,
+            tasks=problem.tasks,
+            scheduling_policy=StreamingOutputBackpressurePolicy(
+                problem,
+                max_blocks_in_op_output_queue=output_queue_size,
+                max_blocks_in_generator_buffer=generator_buffer_size,
+            ),
+        )
+        finished = env.run(problem.time_limit)
+        bound = (
+            args.blocks_per_task + (args.num_cpus - 1) * generator_buffer_size + output_queue_size
+        )
+        print(
+            f"op_output_queue={output_queue_size}",
+            f"generator_buffer={generator_buffer_size}",
+            "Finished" if finished else "Not finished",
+            env._current_tick,
+            f"peak_pending_blocks={max(env.buffer._timeline)}",
+            f"bound={bound}",
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sweep the StreamingOutputBackpressurePolicy limits in the simulator."
+    )
+    parser.add_argument("--num-cpus", type=int, default=8)
+    parser.add_argument("--num-tasks", type=int, default=16, help="Number of producer tasks")
+    parser.add_argument("--blocks-per-task", type=int, default=10)
+    parser.add_argument("--produce-duration", type=int, default=10, help="Ticks per producer")
+    parser.add_argument(
+        "--max-blocks-in-op-output-queue", type=int, nargs="+", default=[1, 2, 4, 8]
+    )
+    parser.add_argument(
+        "--max-blocks-in-generator-buffer", type=int, nargs="+", default=[1, 2, 4, 8]
+    )
+    main(parser.parse_args())
@@ -0,0 +1,221 @@
+import logging
+from dataclasses import dataclass, replace
+
+from ray_data_eval.common.pipeline import ActorPoolSpec, ResourcesSpec, TaskSpec
+from ray_data_eval.simulator.environment import (
+    ExecutionEnvironment,
+    Executor,
+    RunningTask,
+    SchedulingPolicy,
+    TaskStateType,
+    Tick,
+)
+
+
+@dataclass
+class OutputGenerator:
+    """
+    The outputs of a task that yields its blocks as it runs, like a Ray streaming generator.
+    """
+
+    task: TaskSpec
+    node: int
+    # Ticks of work done so far.
+    progress: Tick = 0
+    # Blocks yielded so far, including the ones read by the executor.
+    num_generated: int = 0
+    num_read: int = 0
+    inputs_released: bool = False
+    done: bool = False
+
+    @property
+    def num_unread(self) -> int:
+        return self.num_generated - self.num_read
+
+    def get_next_block_progress(self) -> Tick:
+        """
+        Returns the progress at which the next block is yielded, or the task duration once all
+        blocks are yielded. Blocks are spread evenly over the task after its output delay.
+        """
+        task = self.task
+        if self.num_generated == task.output_size:
+            return task.duration
+        interval = (task.duration - task.output_delay) / task.output_size
+        return task.output_delay + (self.num_generated + 1) * interval
+
+
+class StreamingExecutor(Executor):
+    """
+    An executor whose tasks yield their outputs one block at a time. A task pauses when its
+    unread outputs reach the limit of the scheduling policy, or when the buffer is full.
+    """
+
+    def _get_max_unread(self) -> int | None:
+        if self._env.scheduling_policy is None:
+            return None
+        return self._env.scheduling_policy.get_max_blocks_in_generator_buffer(
+            self._env, self.running_task.spec
+        )
+
+    def _release_inputs(self, generator: OutputGenerator):
+        if not generator.inputs_released:
+            self._env.buffer.remove(self.running_task.inputs)
+            generator.inputs_released = True
+
+    def _try_generating_block(self, generator: OutputGenerator) -> bool:
+        max_unread = self._get_max_unread()
+        if max_unread is not None and generator.num_unread >= max_unread:
+            logging.debug(f"[{self}] {generator.task.id} paused: {generator.num_unread} unread")
+            return False
+        if generator.progress >= generator.task.duration:
+            # As in `Executor`, the inputs are removed before the last output is added.
+            self._release_inputs(generator)
+        if not self._env.buffer.reserve(1, self.node):
+            logging.debug(f"[{self}] {generator.task.id} paused: buffer is full")
+            return False
+        generator.num_generated += 1
+        return True
+
+    def tick(self) -> RunningTask | None:
+        self._timeline.append(self._get_timeline_item())
+        if self.running_task is None:
+            return None
+        tid = self.running_task.spec.id
+        generator = self._env.get_generator(self.running_task.spec)
+        work = 1
+        while True:
+            next_progress = generator.get_next_block_progress()
+            if work < next_progress - generator.progress:
+                generator.progress += work
+                break
+            work -= next_progress - generator.progress
+            generator.progress = next_progress
+            if generator.num_generated == generator.task.output_size:
+                self._release_inputs(generator)
+                generator.done = True
+                finished = self._finish_running_task()
+                self._env.update_task_state(tid, TaskStateType.FINISHED)
+                return finished
+            if not self._try_generating_block(generator):
+                if (
+                    generator.progress >= generator.task.duration
+                    and self._env.task_states[tid].state != TaskStateType.PENDING_OUTPUT
+                ):
+                    self._env.update_task_state(tid, TaskStateType.PENDING_OUTPUT)
+                break
+        self.running_task.remaining_ticks = generator.task.duration - generator.progress
+        return None
+
+
+class StreamingExecutionEnvironment(ExecutionEnvironment):
+    """
+    An execution environment that models Ray Data's streaming executor.
+
+    Tasks yield their outputs one block at a time as they run, at the rate set by
+    `OperatorSpec.output_delay`, so consumers can start on partial outputs. A task pauses
+    mid-way when the buffer is full. Generated blocks take up buffer space right away, but only
+    become consumable once the executor reads them into the output queue of their operator.
+
+    On every tick, after the executors run, the executor reads up to
+    `SchedulingPolicy.get_max_blocks_to_read` blocks of each operator, and tasks pause while they
+    have `SchedulingPolicy.get_max_blocks_in_generator_buffer` unread blocks. Tasks keep their
+    executor while paused. Steps one tick at a time.
+    """
+
+    executor_cls = StreamingExecutor
+
+    def __init__(
+        self,
+        *,
+        resources: ResourcesSpec,
+        buffer_size: int,
+        tasks: list[TaskSpec],
+        scheduling_policy: SchedulingPolicy = None,
+        actor_pools: dict[int, ActorPoolSpec] | None = None,
+    ):
+        super().__init__(
+            resources=resources,
+            buffer_size=buffer_size,
+            tasks=tasks,
+            scheduling_policy=scheduling_policy,
+            actor_pools=actor_pools,
+        )
+        # Generators with unread outputs, in the order their tasks started.
+        self._generators: dict[int, dict[str, OutputGenerator]] = {
+            op: {} for op in self.operator_indices
+        }
+
+    def __repr__(self):
+        return f"StreamingExecutionEnvironment@{self._current_tick}"
+
+    def _copy_state_from(self, other: "StreamingExecutionEnvironment"):
+        super()._copy_state_from(other)
+        self._generators = {
+            op: {tid: replace(generator) for tid, generator in generators.items()}
+            for op, generators in other._generators.items()
+        }
+
+    def get_generator(self, task: TaskSpec) -> OutputGenerator:
+        return self._generators[task.operator_idx][task.id]
+
+    def get_num_unread(self, operator_idx: int) -> int:
+        """
+        Returns the number of blocks generated by the operator's tasks that are not read yet.
+        """
+        return sum(generator.num_unread for generator in self._generators[operator_idx].values())
+
+    def start_task(
+        self, task: TaskSpec, executor_id: int, batch: tuple[TaskSpec, ...] = ()
+    ) -> bool:
+        assert not batch, "Batches cannot stream their outputs"
+        if not super().start_task(task, executor_id):
+            return False
+        self._generators[task.operator_idx][task.id] = OutputGenerator(
+            task=task, node=self._executors[executor_id].node
+        )
+        return True
+
+    def cancel_task(self, task: TaskSpec) -> bool:
+        # The outputs that a task already yielded cannot be rolled back.
+        return False
+
+    def start_backup_task(
+        self, task: TaskSpec, executor_id: int, duration: Tick | None = None
+    ) -> bool:
+        # A backup would yield the outputs of the task a second time.
+        return False
+
+    def _read_outputs(self):
+        for op in self.operator_indices:
+            max_blocks = None
+            if self.scheduling_policy is not None:
+                max_blocks = self.scheduling_policy.get_max_blocks_to_read(self, op)
+            generators = self._generators[op]
+            for tid, generator in list(generators.items()):
+                num_blocks = generator.num_unread
+                if max_blocks is not None:
+                    num_blocks = min(num_blocks, max_blocks)
+                    max_blocks -= num_blocks
+                if num_blocks > 0:
+                    self.buffer.push(
+                        at_tick=self._current_tick,
+                        task=generator.task,
+                        size=num_blocks,
+                        node=generator.node,
+                        reserved=True,
+                        first_block_id=generator.num_read,
+                    )
+                    generator.num_read += num_blocks
+                if generator.done and generator.num_unread == 0:
+                    del generators[tid]
+
+    def tick(self):
+        self._update_actors()
+        if self.scheduling_policy is not None:
+            self.scheduling_policy.tick(self)
+        logging.debug(f"[{self}] Tick")
+        self._current_tick += 1
+        for executor in self._get_executors_sorted():
+            executor.tick()
+        self._read_outputs()
+        self.buffer.tick()
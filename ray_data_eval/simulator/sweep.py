@@ -0,0 +1,223 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, astuple, dataclass, field, fields
+
+from ray_data_eval.common.pipeline import SchedulingProblem
+from ray_data_eval.simulator.environment import ExecutionEnvironment, SchedulingPolicy
+from ray_data_eval.simulator.event_environment import EventDrivenExecutionEnvironment
+from ray_data_eval.simulator.streaming_environment import StreamingExecutionEnvironment
+
+# Bump to invalidate cached results when the simulator semantics change.
+CACHE_VERSION = 4
+
+RESULT_COLUMNS = [
+    "key",
+    "problem",
+    "policy",
+    "params",
+    "seed",
+    "streaming",
+    "event_driven",
+    "finished",
+    "makespan",
+    "peak_buffer_size",
+    "utilization",
+    "spilled_items",
+    "actor_ticks_wasted",
+    "time_to_first_output",
+]
+
+
+@dataclass
+class SweepJob:
+    problem: SchedulingProblem
+    policy_cls: type[SchedulingPolicy]
+    params: dict = field(default_factory=dict)
+    # If set, the job simulates `problem.sample(seed)` instead of the nominal problem.
+    seed: int | None = None
+    # If set, tasks stream their outputs (see `StreamingExecutionEnvironment`).
+    streaming: bool = False
+    # If unset, jobs without streaming run on the tick engine (`ExecutionEnvironment`) instead of
+    # `EventDrivenExecutionEnvironment`.
+    event_driven: bool = True
+
+    @property
+    def policy_name(self) -> str:
+        return f"{self.policy_cls.__module__}.{self.policy_cls.__qualname__}"
+
+    def get_key(self) -> str:
+        """
+        Returns a content hash of the problem and policy configuration. The problem name is not
+        part of the key, so renamed problems reuse cached results.
+        """
+        problem = {
+            "resources": asdict(self.problem.resources),
+            "time_limit": self.problem.time_limit,
+            "buffer_size_limit": self.problem.buffer_size_limit,
+            "spill": repr(self.problem.spill),
+            # repr keeps the distribution types apart, which asdict would not.
+            "operators": [
+                {f.name: repr(getattr(op, f.name)) for f in fields(op) if f.name != "tasks"}
+                for op in self.problem.operators
+            ],
+            # Tasks may be edited after the operators are built, e.g. to add a straggler.
+            "tasks": [astuple(task) for task in self.problem.tasks],
+        }
+        config = {
+            "version": CACHE_VERSION,
+            "problem": problem,
+            "policy": self.policy_name,
+            "params": self.params,
+            "seed": self.seed,
+            "streaming": self.streaming,
+            "event_driven": self.event_driven,
+        }
+        content = json.dumps(config, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+def run_job(job: SweepJob) -> dict:
+    """
+    Simulates a single job with the event-driven or tick engine, or the streaming engine for
+    streaming jobs, and returns its metrics.
+    """
+    logging.disable(logging.CRITICAL)
+    problem = job.problem if job.seed is None else job.problem.sample(job.seed)
+    if job.streaming:
+        assert problem.spill is None, "Streaming outputs cannot be spilled"
+        assert not problem.batch_costs, "Batches cannot stream their outputs"
+        env = StreamingExecutionEnvironment(
+            resources=problem.resources,
+            buffer_size=problem.buffer_size_limit,
+            tasks=problem.tasks,
+            scheduling_policy=job.policy_cls(problem, **job.params),
+            actor_pools=problem.actor_pools,
+        )
+    else:
+        env_cls = EventDrivenExecutionEnvironment if job.event_driven else ExecutionEnvironment
+        env = env_cls(
+            resources=problem.resources,
+            buffer_size=problem.buffer_size_limit,
+            tasks=problem.tasks,
+            scheduling_policy=job.policy_cls(problem, **job.params),
+            spill=problem.spill,
+            actor_pools=problem.actor_pools,
+            batch_costs=problem.batch_costs,
+        )
+    finished = env.run(problem.time_limit)
+    return get_metrics(env, finished)
+
+
+def get_metrics(env: ExecutionEnvironment, finished: bool) -> dict:
+    makespan = env._current_tick
+    busy_ticks = sum(
+        item not in ("", "!") for executor in env._executors for item in executor._timeline
+    )
+    return {
+        "finished": finished,
+        "makespan": makespan,
+        "peak_buffer_size": max(env.buffer._timeline),
+        "utilization": busy_ticks / (len(env._executors) * makespan) if makespan > 0 else 0.0,
+        "spilled_items": (
+            env.buffer.spill_tier.num_spilled_items if env.buffer.spill_tier is not None else 0
+        ),
+        "actor_ticks_wasted": env.get_actor_ticks_wasted(),
+        "time_to_first_output": env.get_time_to_first_output(),
+    }
+
+
+class ResultCache:
+    """
+    Stores the metrics of each finished job as a JSON file named after the job key.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> dict | None:
+        path = self._get_path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def put(self, key: str, metrics: dict):
+        # Write to a temporary file first so that interrupted sweeps leave no partial entries.
+        path = self._get_path(key)
+        with open(path + ".tmp", "w") as f:
+            json.dump(metrics, f)
+        os.replace(path + ".tmp", path)
+
+
+def write_results(rows: list[dict], output_path: str):
+    if output_path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.Table.from_pylist(rows), output_path)
+        return
+    with open(output_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_sweep(
+    jobs: list[SweepJob],
+    *,
+    cache_dir: str | None = None,
+    output_path: str | None = None,
+    num_workers: int | None = None,
+) -> list[dict]:
+    """
+    Runs the jobs that are not cached yet on a process pool, and returns one result row per job.
+
+    :param jobs: Jobs to run.
+    :param cache_dir: Directory of cached job results. If None, nothing is cached.
+    :param output_path: If set, the results are written to this CSV or Parquet file.
+    :param num_workers: Number of worker processes. If None, use the number of CPUs.
+    """
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    keys = [job.get_key() for job in jobs]
+    metrics = {}
+    if cache is not None:
+        for key in keys:
+            cached = cache.get(key)
+            if cached is not None:
+                metrics[key] = cached
+    todo = {key: job for key, job in zip(keys, jobs, strict=True) if key not in metrics}
+    logging.info(f"Running {len(todo)} jobs, {len(jobs) - len(todo)} cached")
+    if todo:
+        num_workers = num_workers or os.cpu_count()
+        chunksize = max(1, len(todo) // (num_workers * 4))
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            results = pool.map(run_job, todo.values(), chunksize=chunksize)
+            for key, result in zip(todo, results, strict=True):
+                metrics[key] = result
+                if cache is not None:
+                    cache.put(key, result)
+
+    rows = [
+        {
+            "key": key,
+            "problem": job.problem.name,
+            "policy": job.policy_cls.__name__,
+            "params": json.dumps(job.params, sort_keys=True),
+            "seed": job.seed,
+            "streaming": job.streaming,
+            "event_driven": job.event_driven,
+            **metrics[key],
+        }
+        for key, job in zip(keys, jobs, strict=True)
+    ]
+    if output_path is not None:
+        write_results(rows, output_path)
+    return rows
@@ -1,66 +1,79 @@
+import math
 import os
+from collections.abc import Callable
+from dataclasses import astuple, dataclass, replace
 
 import pulp as pl
 
 from ray_data_eval.common.pipeline import (
-    ResourcesSpec,
-    TaskSpec,
     SchedulingProblem,
+    TaskSpec,
+    get_num_slots,
     training_problem,
 )
+from ray_data_eval.common.schedule import Schedule, ScheduledTask
+from ray_data_eval.simulator.environment import ExecutionEnvironment, SchedulingPolicy
+from ray_data_eval.simulator.policies import (
+    ConcurrencyCapPolicy,
+    DelayPolicy,
+    GreedyOracleConsumerFirstPolicy,
+    GreedyOracleProducerFirstPolicy,
+    GreedyPolicy,
+    GreedyWithBufferPolicy,
+    RatesEqualizingPolicy,
+)
 
 
 def _get_executors_for_task(
-    resources: ResourcesSpec, task: TaskSpec
+    num_cpu_slots: int, num_gpu_slots: int, task: TaskSpec
 ) -> tuple[list[int], list[int]]:
-    cpu_slots = [i for i in range(resources.cpu)]
-    gpu_slots = [i + resources.cpu for i in range(resources.gpu)]
-    if task.resources.cpu > 0:
-        return cpu_slots, gpu_slots
+    cpu_slots = [i for i in range(num_cpu_slots)]
+    gpu_slots = [i + num_cpu_slots for i in range(num_gpu_slots)]
     if task.resources.gpu > 0:
         return gpu_slots, cpu_slots
-    return [], cpu_slots + gpu_slots
-
-
-def solve(cfg: SchedulingProblem, *, solver=None, tidy=False) -> int:
+    if task.resources.cpu > 0:
+        return cpu_slots, gpu_slots
+    return cpu_slots + gpu_slots, []
+
+
+@dataclass
+class _Formulation:
+    # Groups of task indices. Tasks of a group are interchangeable in the model.
+    groups: list[list[int]]
+    # Linear expressions of the number of tasks of group g that start, resp. finish (run their
+    # last tick), at tick t.
+    started_at: Callable[[int, int], pl.LpAffineExpression]
+    finished_at: Callable[[int, int], pl.LpAffineExpression]
+    # Returns the executor and start tick of every task in the solution.
+    get_placements: Callable[[], list[tuple[int, int]]]
+    # Sets the initial values of the variables to a schedule given as `get_placements` returns
+    # it, for solvers that take a MIP start. Variables of other tasks keep their values.
+    set_placements: Callable[[list[tuple[int, int]]], None]
+
+
+def _add_executor_formulation(
+    cfg: SchedulingProblem,
+    model: pl.LpProblem,
+    num_cpu_slots: int,
+    num_gpu_slots: int,
+    *,
+    tidy: bool,
+) -> _Formulation:
     """
-    Solve the scheduling problem using integer linear programming.
-
-    :param cfg: Scheduling problem configuration.
-    :param solver: PuLP solver to use. If None, use CPLEX with the number of threads equal to the
-        number of CPUs.
-    :param tidy: If True, add tidiness constraints. These do not affect the solution but make it
-        easier to read.
-
-    :return: The total time taken to execute all tasks.
+    Schedules every task on an executor with binary variables indexed by (task, executor, tick).
     """
-    if solver is None:
-        solver = pl.CPLEX_CMD(threads=os.cpu_count())
-
-    model = pl.LpProblem(cfg.name, pl.LpMinimize)
+    num_executors = num_cpu_slots + num_gpu_slots
 
     schedule = pl.LpVariable.dicts(
         "x",
         [
             (i, j, t)
             for i in range(cfg.num_total_tasks)
-            for j in range(cfg.resources.num_executors)
+            for j in range(num_executors)
             for t in range(cfg.time_limit)
         ],
         cat="Binary",
     )
-    buffer = pl.LpVariable.dicts(
-        "b",
-        [(op, t) for op in range(cfg.num_operators - 1) for t in range(cfg.time_limit + 1)],
-        lowBound=0,
-        cat="Integer",
-    )
-    buffer_to_consume = pl.LpVariable.dicts(
-        "bc",
-        [(op, t) for op in range(cfg.num_operators - 1) for t in range(cfg.time_limit + 1)],
-        lowBound=0,
-        cat="Integer",
-    )
 
     # start[i, j, t] = 1 if task i starts at time t on slot j
     start = pl.LpVariable.dicts(
@@ -68,13 +81,13 @@ def solve(cfg: SchedulingProblem, *, solver=None, tidy=False) -> int:
         [
             (i, j, t)
             for i in range(cfg.num_total_tasks)
-            for j in range(cfg.resources.num_executors)
+            for j in range(num_executors)
             for t in range(cfg.time_limit)
         ],
         cat="Binary",
     )
     for i in range(cfg.num_total_tasks):
-        for j in range(cfg.resources.num_executors):
+        for j in range(num_executors):
             model += start[(i, j, 0)] == schedule[(i, j, 0)]
             for t in range(1, cfg.time_limit):
                 model += start[(i, j, t)] >= schedule[(i, j, t)] - schedule[(i, j, t - 1)]
@@ -82,11 +95,7 @@ def solve(cfg: SchedulingProblem, *, solver=None, tidy=False) -> int:
         # Ensure that each task starts exactly once
         model += (
             pl.lpSum(
-                [
-                    start[(i, j, t)]
-                    for j in range(cfg.resources.num_executors)
-                    for t in range(cfg.time_limit)
-                ]
+                [start[(i, j, t)] for j in range(num_executors) for t in range(cfg.time_limit)]
             )
             == 1
         )
@@ -97,13 +106,13 @@ def solve(cfg: SchedulingProblem, *, solver=None, tidy=False) -> int:
         [
             (i, j, t)
             for i in range(cfg.num_total_tasks)
-            for j in range(cfg.resources.num_executors)
+            for j in range(num_executors)
             for t in range(cfg.time_limit)
         ],
         cat="Binary",
     )
     for i in range(cfg.num_total_tasks):
-        for j in range(cfg.resources.num_executors):
+        for j in range(num_executors):
             model += finish[(i, j, cfg.time_limit - 1)] == schedule[(i, j, cfg.time_limit - 1)]
             for t in range(cfg.time_limit - 1):
                 model += finish[(i, j, t)] >= schedule[(i, j, t)] - schedule[(i, j, t + 1)]
@@ -111,31 +120,39 @@ def solve(cfg: SchedulingProblem, *, solver=None, tidy=False) -> int:
         # Ensure that each task finishes exactly once
         model += (
             pl.lpSum(
-                [
-                    finish[(i, j, t)]
-                    for j in range(cfg.resources.num_executors)
-                    for t in range(cfg.time_limit)
-                ]
+                [finish[(i, j, t)] for j in range(num_executors) for t in range(cfg.time_limit)]
             )
             == 1
         )
 
     # Constraint: One slot can run only one task at a time
-    for j in range(cfg.resources.num_executors):
+    for j in range(num_executors):
         for t in range(cfg.time_limit):
             model += pl.lpSum([schedule[(i, j, t)] for i in range(cfg.num_total_tasks)]) <= 1
 
     # Tidiness Constraint: Lower-indexed executors should be used first
     if tidy:
         for t in range(cfg.time_limit):
-            for j in range(cfg.resources.cpu - 1):
+            for j in range(num_cpu_slots - 1):
                 model += pl.lpSum(
                     [schedule[(i, j, t)] for i in range(cfg.num_total_tasks)]
                 ) >= pl.lpSum([schedule[(i, j + 1, t)] for i in range(cfg.num_total_tasks)])
 
+    # Constraint: The running tasks fit in the resources of the machine
+    for t in range(cfg.time_limit):
+        for resource in ["cpu", "gpu"]:
+            requests = [
+                getattr(task.resources, resource) * schedule[(i, j, t)]
+                for i, task in enumerate(cfg.tasks)
+                if getattr(task.resources, resource) > 0
+                for j in range(num_executors)
+            ]
+            if requests:
+                model += pl.lpSum(requests) <= getattr(cfg.resources, resource)
+
     # Constraint: All tasks are assigned to exactly one slot and complete
     for i, task in enumerate(cfg.tasks):
-        executors, non_executors = _get_executors_for_task(cfg.resources, task)
+        executors, non_executors = _get_executors_for_task(num_cpu_slots, num_gpu_slots, task)
         model += (
             pl.lpSum([schedule[(i, j, t)] for j in executors for t in range(cfg.time_limit)])
             == task.duration
@@ -147,7 +164,7 @@ def solve(cfg: SchedulingProblem, *, solver=None, tidy=False) -> int:
 
     # Constraint: All tasks must run contiguously for their entire duration
     for i in range(cfg.num_total_tasks):
-        for j in range(cfg.resources.num_executors):
+        for j in range(num_executors):
             # Ensure that the task either starts and runs for its entire duration or doesn't start
             for t in range(cfg.time_limit - cfg.tasks[i].duration + 1):
                 # Task starts at time 't' and runs for 'task_time[i]' time units
@@ -157,28 +174,406 @@ def solve(cfg: SchedulingProblem, *, solver=None, tidy=False) -> int:
                 )
 
     def _task_started_at(tid, tick):
-        return pl.lpSum([start[(tid, j, tick)] for j in range(cfg.resources.num_executors)])
+        return pl.lpSum([start[(tid, j, tick)] for j in range(num_executors)])
 
     def _task_finished_at(tid, tick):
-        return pl.lpSum([finish[(tid, j, tick)] for j in range(cfg.resources.num_executors)])
+        return pl.lpSum([finish[(tid, j, tick)] for j in range(num_executors)])
+
+    def _get_placements():
+        return [
+            next(
+                (j, t)
+                for j in range(num_executors)
+                for t in range(cfg.time_limit)
+                if pl.value(start[(i, j, t)]) > 0.5
+            )
+            for i in range(cfg.num_total_tasks)
+        ]
+
+    def _set_placements(placements):
+        for i, (j, t) in enumerate(placements):
+            start[(i, j, t)].setInitialValue(1)
+            finish[(i, j, t + cfg.tasks[i].duration - 1)].setInitialValue(1)
+            for k in range(cfg.tasks[i].duration):
+                schedule[(i, j, t + k)].setInitialValue(1)
+
+    return _Formulation(
+        [[i] for i in range(cfg.num_total_tasks)],
+        _task_started_at,
+        _task_finished_at,
+        _get_placements,
+        _set_placements,
+    )
+
+
+def _get_task_groups(cfg: SchedulingProblem) -> list[list[int]]:
+    """
+    Groups the tasks that only differ by their ID, e.g. all tasks of an operator unless the
+    problem is sampled.
+    """
+    groups = {}
+    for i, task in enumerate(cfg.tasks):
+        groups.setdefault(astuple(replace(task, id="")), []).append(i)
+    return list(groups.values())
+
+
+def _assign_executors(
+    cfg: SchedulingProblem, pool_starts: list[tuple[list[int], int]]
+) -> list[tuple[int, int]]:
+    """
+    Assigns each task to an executor of its pool, given its pool's executors and its start tick.
+    Taking tasks by start tick and giving each the lowest free executor of its pool never runs
+    out of executors as long as no more tasks run at once than the pool has.
+    """
+    placements = [None] * cfg.num_total_tasks
+    free_at = {}
+    for i in sorted(range(cfg.num_total_tasks), key=lambda i: pool_starts[i][1]):
+        executors, t = pool_starts[i]
+        j = next(j for j in executors if free_at.get(j, 0) <= t)
+        free_at[j] = t + cfg.tasks[i].duration
+        placements[i] = (j, t)
+    return placements
+
+
+def _add_aggregated_formulation(
+    cfg: SchedulingProblem,
+    model: pl.LpProblem,
+    num_cpu_slots: int,
+    num_gpu_slots: int,
+    groups: list[list[int]],
+) -> _Formulation:
+    """
+    Schedules tasks with integer variables indexed by (group, pool, tick) that count the tasks of
+    the group that start at that tick in that pool. With a group per task, these are binary.
+    Executors are interchangeable within a pool, i.e. the CPU or the GPU slots, so the model only
+    bounds how many tasks of each pool run at once, and executors are assigned after solving by
+    `_assign_executors`. Tasks that request neither a CPU nor a GPU choose a pool.
+    """
+    cpu_slots = list(range(num_cpu_slots))
+    gpu_slots = list(range(num_cpu_slots, num_cpu_slots + num_gpu_slots))
+    pools = [cpu_slots, gpu_slots]
+
+    def _get_pools(task: TaskSpec) -> list[int]:
+        if task.resources.gpu > 0:
+            return [1]
+        if task.resources.cpu > 0:
+            return [0]
+        return [p for p in range(len(pools)) if pools[p]]
+
+    group_tasks = [cfg.tasks[group[0]] for group in groups]
+    group_pools = [_get_pools(task) for task in group_tasks]
+
+    # start[g, p, t] = number of tasks of group g that start at time t in pool p
+    start = {
+        (g, p, t): pl.LpVariable(
+            f"s_{g}_{p}_{t}",
+            lowBound=0,
+            upBound=len(group),
+            cat="Binary" if len(group) == 1 else "Integer",
+        )
+        for g, group in enumerate(groups)
+        for p in group_pools[g]
+        for t in range(cfg.time_limit - group_tasks[g].duration + 1)
+    }
+
+    def _started_at(g: int, p: int, t: int):
+        if (g, p, t) in start:
+            return [start[(g, p, t)]]
+        return []
+
+    def _running_at(g: int, p: int, t: int):
+        return [var for k in range(group_tasks[g].duration) for var in _started_at(g, p, t - k)]
+
+    # Constraint: Each task starts exactly once, early enough to complete
+    for g, task in enumerate(group_tasks):
+        model += pl.lpSum(
+            [
+                start[(g, p, t)]
+                for p in group_pools[g]
+                for t in range(cfg.time_limit - task.duration + 1)
+            ]
+        ) == len(groups[g])
+
+    for t in range(cfg.time_limit):
+        # Constraint: Each pool runs at most one task per executor at a time
+        for p, executors in enumerate(pools):
+            running = [
+                var
+                for g in range(len(groups))
+                if p in group_pools[g]
+                for var in _running_at(g, p, t)
+            ]
+            if running:
+                model += pl.lpSum(running) <= len(executors)
+
+        # Constraint: The running tasks fit in the resources of the machine
+        for resource in ["cpu", "gpu"]:
+            requests = [
+                getattr(task.resources, resource) * var
+                for g, task in enumerate(group_tasks)
+                if getattr(task.resources, resource) > 0
+                for p in group_pools[g]
+                for var in _running_at(g, p, t)
+            ]
+            if requests:
+                model += pl.lpSum(requests) <= getattr(cfg.resources, resource)
+
+    def _group_started_at(g, tick):
+        return pl.lpSum([var for p in group_pools[g] for var in _started_at(g, p, tick)])
+
+    def _group_finished_at(g, tick):
+        return _group_started_at(g, tick - group_tasks[g].duration + 1)
+
+    def _get_placements():
+        # Tasks of a group take the group's starts in order.
+        pool_starts = [None] * cfg.num_total_tasks
+        for g, group in enumerate(groups):
+            starts = [
+                (pools[p], t)
+                for t in range(cfg.time_limit - group_tasks[g].duration + 1)
+                for p in group_pools[g]
+                for _ in range(round(pl.value(start[(g, p, t)])))
+            ]
+            for i, pool_start in zip(group, starts, strict=True):
+                pool_starts[i] = pool_start
+        return _assign_executors(cfg, pool_starts)
+
+    def _set_placements(placements):
+        task_groups = {i: g for g, group in enumerate(groups) for i in group}
+        for i, (j, t) in enumerate(placements):
+            var = start[(task_groups[i], 0 if j < num_cpu_slots else 1, t)]
+            var.setInitialValue((var.varValue or 0) + 1)
+
+    return _Formulation(
+        groups, _group_started_at, _group_finished_at, _get_placements, _set_placements
+    )
+
+
+FORMULATIONS = ["executor", "aggregated", "counting"]
+
+# PuLP solvers by backend name, in order of preference. CBC ships with PuLP.
+BACKENDS = {
+    "highs": pl.HiGHS_CMD,
+    "cbc": pl.PULP_CBC_CMD,
+    "cplex": pl.CPLEX_CMD,
+    "gurobi": pl.GUROBI_CMD,
+}
+
+# Simulator policies that `get_incumbent` tries. They are fast, and their schedules follow the
+# same rules as the model.
+INCUMBENT_POLICIES = [
+    GreedyPolicy,
+    GreedyWithBufferPolicy,
+    GreedyOracleProducerFirstPolicy,
+    GreedyOracleConsumerFirstPolicy,
+    RatesEqualizingPolicy,
+    ConcurrencyCapPolicy,
+    DelayPolicy,
+]
+
+
+def get_solver(
+    backend: str | None = None,
+    *,
+    warm_start: bool = False,
+    time_limit: float | None = None,
+    msg: bool = True,
+) -> pl.LpSolver:
+    """
+    Returns a PuLP solver that uses all CPUs.
+
+    :param backend: One of `BACKENDS`. If None, use the first one that is installed.
+    :param warm_start: If True, the solver starts from the initial values of the variables.
+    :param time_limit: Seconds after which the solver returns its best solution so far.
+    :param msg: If False, silence the solver log.
+    """
+    if backend is None:
+        backend = next(name for name, cls in BACKENDS.items() if cls(msg=False).available())
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {list(BACKENDS)}")
+    return BACKENDS[backend](
+        msg=msg, timeLimit=time_limit, threads=os.cpu_count(), warmStart=warm_start
+    )
+
+
+@dataclass
+class Incumbent:
+    policy: str
+    makespan: int
+    # Executor and start tick of every task of the problem.
+    placements: list[tuple[int, int]]
+
+
+def get_incumbent(
+    cfg: SchedulingProblem, policies: list[type[SchedulingPolicy]] = INCUMBENT_POLICIES
+) -> Incumbent | None:
+    """
+    Simulates the problem with each policy and returns the schedule of the fastest run that
+    finishes, or None if none does.
+    """
+    task_indices = {task.id: i for i, task in enumerate(cfg.tasks)}
+    best = None
+    for policy_cls in policies:
+        env = ExecutionEnvironment(
+            resources=cfg.resources,
+            buffer_size=cfg.buffer_size_limit,
+            tasks=cfg.tasks,
+            scheduling_policy=policy_cls(cfg),
+        )
+        if not env.run(cfg.time_limit):
+            continue
+        if best is not None and env._current_tick >= best.makespan:
+            continue
+        # The model has no tasks that wait for buffer space to output, so such tasks start later
+        # in the incumbent, to finish at the same tick.
+        placements = [None] * cfg.num_total_tasks
+        for j, executor in enumerate(env._executors):
+            for t, item in enumerate(executor._timeline):
+                if item in task_indices:
+                    i = task_indices[item]
+                if item != "":
+                    placements[i] = (j, t - cfg.tasks[i].duration + 1)
+        best = Incumbent(repr(env.scheduling_policy), env._current_tick, placements)
+    return best
+
+
+@dataclass
+class _Model:
+    model: pl.LpProblem
+    tasks: _Formulation
+    buffer: dict
+    buffer_to_consume: dict
+    # active[t] = 1 if a task finishes at time t or later.
+    active: dict
+    # Buffer changes of each operator at each tick.
+    buffer_increase: list[list[pl.LpAffineExpression]]
+    buffer_to_consume_decrease: list[list[pl.LpAffineExpression]]
+    buffer_decrease: list[list[pl.LpAffineExpression]]
+
+    def set_initial_values(self, placements: list[tuple[int, int]], makespan: int):
+        """
+        Sets the initial values of all variables to the given schedule.
+        """
+        for var in self.model.variables():
+            var.setInitialValue(0)
+        self.tasks.set_placements(placements)
+        for o, (increase, to_consume_decrease, decrease) in enumerate(
+            zip(
+                self.buffer_increase,
+                self.buffer_to_consume_decrease,
+                self.buffer_decrease,
+                strict=True,
+            )
+        ):
+            for t in range(len(increase)):
+                self.buffer[(o, t + 1)].setInitialValue(
+                    self.buffer[(o, t)].varValue + pl.value(increase[t] - decrease[t])
+                )
+                self.buffer_to_consume[(o, t + 1)].setInitialValue(
+                    self.buffer_to_consume[(o, t)].varValue
+                    + pl.value(increase[t] - to_consume_decrease[t])
+                )
+        for t, var in self.active.items():
+            var.setInitialValue(int(t < makespan))
+
+    def get_buffer_levels(self, max_time: int) -> tuple[list[list[int]], list[list[int]]]:
+        """
+        Returns the buffer and buffer to consume sizes of each operator at ticks 0 to `max_time`
+        in the solution.
+        """
+        return tuple(
+            [
+                [round(pl.value(levels[(o, t)])) for t in range(max_time + 1)]
+                for o in range(len(self.buffer_increase))
+            ]
+            for levels in [self.buffer, self.buffer_to_consume]
+        )
+
+
+def _get_schedule(
+    cfg: SchedulingProblem,
+    placements: list[tuple[int, int]],
+    buffer_levels: tuple[list[list[int]], list[list[int]]],
+    makespan: int,
+    stats: dict,
+) -> Schedule:
+    num_cpu_slots, num_gpu_slots = get_num_slots(
+        cfg.resources, [task.resources for task in cfg.tasks]
+    )
+    return Schedule(
+        problem=cfg.name,
+        executors=[f"CPU{j}" for j in range(num_cpu_slots)]
+        + [f"GPU{j}" for j in range(num_gpu_slots)],
+        operators=[op.name for op in cfg.operators],
+        tasks=[
+            ScheduledTask(task.id, task.operator_idx, j, t, t + task.duration)
+            for task, (j, t) in zip(cfg.tasks, placements, strict=True)
+        ],
+        buffer_levels=buffer_levels[0],
+        buffer_to_consume_levels=buffer_levels[1],
+        makespan=makespan,
+        stats=stats,
+    )
+
+
+def _build_model(
+    cfg: SchedulingProblem,
+    num_cpu_slots: int,
+    num_gpu_slots: int,
+    *,
+    formulation: str,
+    tidy: bool,
+) -> _Model:
+    model = pl.LpProblem(cfg.name, pl.LpMinimize)
+
+    if formulation == "executor":
+        tasks = _add_executor_formulation(cfg, model, num_cpu_slots, num_gpu_slots, tidy=tidy)
+    elif formulation == "aggregated":
+        tasks = _add_aggregated_formulation(
+            cfg, model, num_cpu_slots, num_gpu_slots, [[i] for i in range(cfg.num_total_tasks)]
+        )
+    else:
+        tasks = _add_aggregated_formulation(
+            cfg, model, num_cpu_slots, num_gpu_slots, _get_task_groups(cfg)
+        )
+
+    buffer = pl.LpVariable.dicts(
+        "b",
+        [(op, t) for op in range(cfg.num_operators - 1) for t in range(cfg.time_limit + 1)],
+        lowBound=0,
+        cat="Integer",
+    )
+    buffer_to_consume = pl.LpVariable.dicts(
+        "bc",
+        [(op, t) for op in range(cfg.num_operators - 1) for t in range(cfg.time_limit + 1)],
+        lowBound=0,
+        cat="Integer",
+    )
 
     # Constraint: Buffer size is the total size of data in memory buffer. Buffer to consume size
     # is the total size of producer output not yet consumed.
     # When a producer finishes, it increases both buffer and buffer to consume sizes.
     # When a consumer starts, it decreases the buffer to consume size.
     # When a consumer finishes, it decreases the buffer size.
+    buffer_increase_by_tick = [[] for _ in range(cfg.num_operators - 1)]
+    buffer_to_consume_decrease_by_tick = [[] for _ in range(cfg.num_operators - 1)]
+    buffer_decrease_by_tick = [[] for _ in range(cfg.num_operators - 1)]
     for t in range(cfg.time_limit):
         buffer_increase = [[] for _ in range(cfg.num_operators - 1)]
         buffer_to_consume_decrease = [[] for _ in range(cfg.num_operators - 1)]
         buffer_decrease = [[] for _ in range(cfg.num_operators - 1)]
-        for tid, task in enumerate(cfg.tasks):
+        for g, group in enumerate(tasks.groups):
+            task = cfg.tasks[group[0]]
             o = task.operator_idx
             if task.output_size > 0:
-                buffer_increase[o].append(task.output_size * _task_finished_at(tid, t))
+                buffer_increase[o].append(task.output_size * tasks.finished_at(g, t))
             if task.input_size > 0 and o > 0:
-                buffer_to_consume_decrease[o - 1].append(task.input_size * _task_started_at(tid, t))
-                buffer_decrease[o - 1].append(task.input_size * _task_finished_at(tid, t))
+                buffer_to_consume_decrease[o - 1].append(task.input_size * tasks.started_at(g, t))
+                buffer_decrease[o - 1].append(task.input_size * tasks.finished_at(g, t))
         for o in range(cfg.num_operators - 1):
+            buffer_increase_by_tick[o].append(pl.lpSum(buffer_increase[o]))
+            buffer_to_consume_decrease_by_tick[o].append(pl.lpSum(buffer_to_consume_decrease[o]))
+            buffer_decrease_by_tick[o].append(pl.lpSum(buffer_decrease[o]))
             model += buffer[(o, t)] >= pl.lpSum(buffer_decrease[o])
             model += buffer[(o, t + 1)] == buffer[(o, t)] + pl.lpSum(buffer_increase[o]) - pl.lpSum(
                 buffer_decrease[o]
@@ -206,17 +601,94 @@ def solve(cfg: SchedulingProblem, *, solver=None, tidy=False) -> int:
         model += buffer_to_consume[(op, 0)] == 0
         model += buffer_to_consume[(op, cfg.time_limit)] == 0
 
-    # Objective function: Minimize the latest finish time
-    latest_finish_time = pl.LpVariable("lf", cat="Integer")
-    for i in range(cfg.num_total_tasks):
-        for j in range(cfg.resources.num_executors):
-            for t in range(cfg.time_limit):
-                model += latest_finish_time >= finish[(i, j, t)] * t
+    # Objective function: Minimize the number of ticks until the last task finishes.
+    # active[t] = 1 if a task finishes at time t or later.
+    active = pl.LpVariable.dicts("a", range(cfg.time_limit), cat="Binary")
+    for t in range(cfg.time_limit - 1):
+        model += active[t] >= active[t + 1]
+    for g, group in enumerate(tasks.groups):
+        for t in range(cfg.time_limit):
+            model += len(group) * active[t] >= tasks.finished_at(g, t)
+
+    model += pl.lpSum(active.values())
+
+    return _Model(
+        model,
+        tasks,
+        buffer,
+        buffer_to_consume,
+        active,
+        buffer_increase_by_tick,
+        buffer_to_consume_decrease_by_tick,
+        buffer_decrease_by_tick,
+    )
 
-    model += latest_finish_time
 
-    # Write down the problem
-    model.writeLP(f"{cfg.name}.lp")
+def solve(
+    cfg: SchedulingProblem,
+    *,
+    solver=None,
+    backend: str | None = None,
+    tidy=False,
+    formulation: str = "executor",
+    warm_start: bool = False,
+    lp_path: str | None = None,
+) -> Schedule | None:
+    """
+    Solve the scheduling problem using integer linear programming.
+
+    :param cfg: Scheduling problem configuration.
+    :param solver: PuLP solver to use. If None, use `get_solver(backend)`.
+    :param backend: Solver backend, one of `BACKENDS`. If None, use the first one installed.
+    :param tidy: If True, add tidiness constraints. These do not affect the solution but make it
+        easier to read. Only used by the executor formulation.
+    :param formulation: "executor" to assign tasks to executors in the model, "aggregated" to
+        only bound the number of running tasks per resource and assign executors afterwards, or
+        "counting" to also count identical tasks together instead of scheduling each task. All
+        give the same makespan, but the aggregated model is much smaller than the executor one,
+        and the size of the counting model does not depend on the number of tasks.
+    :param warm_start: If True, simulate the problem with `INCUMBENT_POLICIES` and start the
+        solver from the best schedule found. Its makespan also shortens the time limit, and so
+        the model.
+    :param lp_path: If set, write the model to this LP file.
+
+    :return: The best schedule found, or None if the solver found none, e.g. because no
+        schedule fits in the time limit. Its `stats` has the solver status, which is not
+        optimal if the solver stopped at its time limit, the solve time in seconds and the size
+        of the model.
+    """
+    if formulation not in FORMULATIONS:
+        raise ValueError(f"Unknown formulation {formulation!r}, expected one of {FORMULATIONS}")
+    if solver is None:
+        solver = get_solver(backend, warm_start=warm_start)
+
+    # Executors are task slots, as in the simulator. Slots of the same machine share its
+    # resources, so tasks with fractional requests can oversubscribe the slots of a resource.
+    num_cpu_slots, num_gpu_slots = get_num_slots(
+        cfg.resources, [task.resources for task in cfg.tasks]
+    )
+
+    incumbent = get_incumbent(cfg) if warm_start else None
+    if incumbent is not None:
+        print(f">>> Incumbent: {incumbent.policy} with makespan {incumbent.makespan}")
+        m = _build_model(
+            replace(cfg, time_limit=incumbent.makespan),
+            num_cpu_slots,
+            num_gpu_slots,
+            formulation=formulation,
+            tidy=tidy,
+        )
+        m.set_initial_values(incumbent.placements, incumbent.makespan)
+        if not m.model.valid():
+            # The simulator allows a schedule that the model does not, so it cannot bound it.
+            print(">>> Incumbent is not feasible in the model, ignoring it")
+            incumbent = None
+    if incumbent is None:
+        m = _build_model(cfg, num_cpu_slots, num_gpu_slots, formulation=formulation, tidy=tidy)
+    model = m.model
+
+    if lp_path is not None:
+        model.writeLP(lp_path)
 
     # Solve the problem
     model.solve(solver=solver)
@@ -225,48 +697,181 @@ def solve(cfg: SchedulingProblem, *, solver=None, tidy=False) -> int:
     # for v in model.variables():
     #     print(v.name, "=", v.varValue)
 
-    # Output results
-    print(">>> Status:", pl.LpStatus[model.status])
-
-    max_time = int(pl.value(model.objective)) + 1
-    separator_line = "++" + "-" * (max_time * 6 + 7) + "++"
-    print(separator_line)
-    for j in range(cfg.resources.num_executors):
-        label = f"CPU{j}" if j < cfg.resources.cpu else f"GPU{j - cfg.resources.cpu}"
-        print(f"|| {label} ||", end="")
-        for t in range(max_time):
-            idle = True
-            for i in range(cfg.num_total_tasks):
-                if pl.value(schedule[(i, j, t)]) == 1:
-                    label = cfg.tasks[i].id
-                    print(f" {label:<3} |", end="")
-                    idle = False
-            if idle:
-                print("     |", end="")
-        print("|")
-    print(separator_line)
-    for o in range(cfg.num_operators - 1):
-        op = cfg.operators[o]
-        print(f"|| buf{op.name} ||", end="")
-        for t in range(max_time + 1):
-            print(f" {int(pl.value(buffer[(o, t)])):<3} |", end="")
-        print()
-    print(separator_line)
-    for o in range(cfg.num_operators - 1):
-        op = cfg.operators[o]
-        print(f"|| btc{op.name} ||", end="")
-        for t in range(max_time + 1):
-            print(f" {int(pl.value(buffer_to_consume[(o, t)])):<3} |", end="")
-        print()
-    print(separator_line)
-    print("|| time ||", end="")
-    for t in range(max_time):
-        print(f" {t:<3} |", end="")
-    print("|")
-    print(separator_line)
-    print("Total Run Time =", max_time)
-
-    return max_time
+    # Output results. CBC reports an optimal status even when it stops at its time limit, so
+    # the status of the solution tells whether it is proven optimal.
+    status = pl.LpSolution[model.sol_status]
+    print(">>> Status:", status)
+    if model.sol_status not in (pl.LpSolutionOptimal, pl.LpSolutionIntegerFeasible):
+        return None
+
+    max_time = round(pl.value(model.objective))
+    schedule = _get_schedule(
+        cfg,
+        m.tasks.get_placements(),
+        m.get_buffer_levels(max_time),
+        max_time,
+        {
+            "solver": solver.name,
+            "formulation": formulation,
+            "status": status,
+            "solve_seconds": model.solutionTime,
+            "num_variables": model.numVariables(),
+            "num_constraints": model.numConstraints(),
+            "incumbent": None if incumbent is None else incumbent.policy,
+        },
+    )
+    schedule.print()
+    return schedule
+
+
+def get_makespan_lower_bound(cfg: SchedulingProblem) -> int:
+    """
+    Returns a lower bound of the makespan: the longest chain of one task per operator, since an
+    operator's first task waits for an output of the previous operator, or the work of each
+    resource divided by its capacity, whichever is larger.
+    """
+    bound = 0
+    chain = 0
+    for op in cfg.operators:
+        duration = min(task.duration for task in op.tasks)
+        chain = chain + duration if op.input_size > 0 else duration
+        bound = max(bound, chain)
+
+    num_cpu_slots, num_gpu_slots = get_num_slots(
+        cfg.resources, [task.resources for task in cfg.tasks]
+    )
+    work = [0, 0, 0]
+    for task in cfg.tasks:
+        pool = 1 if task.resources.gpu > 0 else 0 if task.resources.cpu > 0 else 2
+        work[pool] += task.duration
+    for amount, capacity in [
+        (work[0], num_cpu_slots),
+        (work[1], num_gpu_slots),
+        (sum(work), num_cpu_slots + num_gpu_slots),
+    ]:
+        if amount > 0:
+            bound = max(bound, math.ceil(amount / capacity))
+    for resource in ["cpu", "gpu"]:
+        amount = sum(getattr(task.resources, resource) * task.duration for task in cfg.tasks)
+        if amount > 0:
+            bound = max(bound, math.ceil(amount / getattr(cfg.resources, resource) - 1e-9))
+    return bound
+
+
+@dataclass
+class HorizonSearchResult:
+    # Optimal makespan, or None if no schedule fits in the time limit.
+    makespan: int | None
+    lower_bound: int
+    # Makespan of the incumbent, or the time limit if there is none.
+    upper_bound: int
+    # Horizon, solution status and makespan found, if any, of every solve.
+    probes: list[tuple[int, str, int | None]]
+    # The optimal schedule, if any.
+    schedule: Schedule | None = None
+
+
+SEARCHES = ["binary", "deepening"]
+
+
+def solve_by_horizon_search(
+    cfg: SchedulingProblem,
+    *,
+    solver=None,
+    backend: str | None = None,
+    formulation: str = "counting",
+    search: str = "binary",
+) -> HorizonSearchResult:
+    """
+    Solves the scheduling problem with a model whose horizon is the makespan of the best
+    `INCUMBENT_POLICIES` schedule, or the time limit if there is no feasible one.
+    The model is then solved with shorter and shorter horizons, by capping the makespan
+    variables rather than rebuilding it, until the makespan found with some horizon is proven
+    optimal: no schedule fits in a tick less, or that is the lower bound of
+    `get_makespan_lower_bound`.
+
+    :param cfg: Scheduling problem configuration.
+    :param solver: PuLP solver to use. If None, use `get_solver(backend)` with warm starts.
+    :param backend: Solver backend, one of `BACKENDS`. If None, use the first one installed.
+    :param formulation: See `solve`.
+    :param search: "binary" to halve the range of possible makespans with each solve, or
+        "deepening" to grow the horizon from the lower bound one tick at a time, which suits
+        problems whose lower bound is tight.
+    """
+    if formulation not in FORMULATIONS:
+        raise ValueError(f"Unknown formulation {formulation!r}, expected one of {FORMULATIONS}")
+    if search not in SEARCHES:
+        raise ValueError(f"Unknown search {search!r}, expected one of {SEARCHES}")
+    if solver is None:
+        solver = get_solver(backend, warm_start=True, msg=False)
+
+    num_cpu_slots, num_gpu_slots = get_num_slots(
+        cfg.resources, [task.resources for task in cfg.tasks]
+    )
+    lower_bound = get_makespan_lower_bound(cfg)
+    result = HorizonSearchResult(None, lower_bound, cfg.time_limit, [])
+    solution = None
+    solve_seconds = 0
+    incumbent = get_incumbent(cfg)
+    if incumbent is not None:
+        m = _build_model(
+            replace(cfg, time_limit=incumbent.makespan),
+            num_cpu_slots,
+            num_gpu_slots,
+            formulation=formulation,
+            tidy=False,
+        )
+        m.set_initial_values(incumbent.placements, incumbent.makespan)
+        if m.model.valid():
+            result.makespan = result.upper_bound = incumbent.makespan
+            solution = incumbent.placements, m.get_buffer_levels(incumbent.makespan)
+    if result.makespan is None:
+        m = _build_model(cfg, num_cpu_slots, num_gpu_slots, formulation=formulation, tidy=False)
+    print(f">>> Makespan bounds: [{result.lower_bound}, {result.upper_bound}]")
+
+    # Every makespan below `low` is infeasible, and `high` is the best makespan found so far.
+    # Only infeasible probes raise `low`, so the makespan is proven optimal once they meet, even
+    # if the probe that found it stopped at the solver's time limit before proving it.
+    low = lower_bound
+    high = result.makespan if result.makespan is not None else cfg.time_limit + 1
+    while low < high:
+        horizon = (low + high - 1) // 2 if search == "binary" else low
+        for t, var in m.active.items():
+            var.upBound = 1 if t < horizon else 0
+        m.model.solve(solver=solver)
+        solve_seconds += m.model.solutionTime
+        # CBC reports an optimal `status` even when it stops at its time limit, so only the
+        # status of the solution tells an optimal schedule from a feasible one.
+        status = pl.LpSolution[m.model.sol_status]
+        if m.model.sol_status in (pl.LpSolutionOptimal, pl.LpSolutionIntegerFeasible):
+            makespan = round(pl.value(m.model.objective))
+            solution = m.tasks.get_placements(), m.get_buffer_levels(makespan)
+            result.makespan = high = makespan
+        elif m.model.sol_status == pl.LpSolutionInfeasible:
+            makespan = None
+            low = horizon + 1
+        else:
+            raise RuntimeError(f"Solver returned {status} with horizon {horizon}")
+        print(f">>> Horizon {horizon}: {status}")
+        result.probes.append((horizon, status, makespan))
+
+    if solution is not None:
+        result.schedule = _get_schedule(
+            cfg,
+            *solution,
+            result.makespan,
+            {
+                "solver": solver.name,
+                "formulation": formulation,
+                "search": search,
+                "status": pl.LpSolution[pl.LpSolutionOptimal],
+                "solve_seconds": solve_seconds,
+                "num_probes": len(result.probes),
+                "incumbent": None if incumbent is None else incumbent.policy,
+            },
+        )
+        result.schedule.print()
+    return result
 
 
 def main():
@@ -1,14 +1,51 @@
-import pytest  # noqa: F401
-
-from ray_data_eval.solver.solver import solve
-from ray_data_eval.common.pipeline import make_producer_consumer_problem
-
-
-def _solve(**kwargs):
-    tidy_sol = solve(make_producer_consumer_problem(**kwargs), tidy=True)
-    sol = solve(make_producer_consumer_problem(**kwargs), tidy=False)
-    assert tidy_sol == sol
-    return sol
+from dataclasses import replace
+
+import pytest
+
+from ray_data_eval.common.pipeline import (
+    OperatorSpec,
+    ResourcesSpec,
+    SchedulingProblem,
+    e2e_problem2,
+    get_num_slots,
+    make_producer_consumer_problem,
+    multi_stage_problem,
+    producer_consumer_problem,
+    test_problem,
+    training_problem,
+)
+from ray_data_eval.common.schedule import get_buffer_levels
+from ray_data_eval.simulator.environment import ExecutionEnvironment
+from ray_data_eval.simulator.event_environment import EventDrivenExecutionEnvironment
+from ray_data_eval.simulator.policies import (
+    AIMDBackpressurePolicy,
+    PIDBackpressurePolicy,
+    ReplayPolicy,
+)
+from ray_data_eval.solver.solver import (
+    get_incumbent,
+    get_makespan_lower_bound,
+    solve,
+    solve_by_horizon_search,
+)
+
+
+def _solve(*, executor: bool = True, **kwargs):
+    """
+    Returns the makespan of the counting formulation, after checking that the aggregated one
+    agrees, and if `executor`, the executor one with and without tidiness constraints. The
+    executor formulation takes minutes on the larger cases with CBC.
+    """
+    sol = solve(make_producer_consumer_problem(**kwargs), formulation="counting")
+    formulations = [("aggregated", False)]
+    if executor:
+        formulations += [("executor", False), ("executor", True)]
+    for formulation, tidy in formulations:
+        schedule = solve(
+            make_producer_consumer_problem(**kwargs), formulation=formulation, tidy=tidy
+        )
+        assert schedule.makespan == sol.makespan
+    return sol.makespan
 
 
 def test_default():
@@ -118,6 +155,7 @@ def test_long_case_2_cpu():
 
 def test_long_case_3_cpu():
     result = _solve(
+        executor=False,
         num_producers=5,
         num_consumers=5,
         producer_time=1,
@@ -130,6 +168,7 @@ def test_long_case_3_cpu():
 
 def test_long_case_4_cpu():
     result = _solve(
+        executor=False,
         num_producers=5,
         num_consumers=5,
         producer_time=1,
@@ -142,6 +181,7 @@ def test_long_case_4_cpu():
 
 def test_long_case_4_cpu_4_mem():
     result = _solve(
+        executor=False,
         num_producers=5,
         num_consumers=5,
         producer_time=1,
@@ -151,3 +191,160 @@ def test_long_case_4_cpu_4_mem():
         buffer_size_limit=4,
     )
     assert result == 5
+
+
+def test_warm_start():
+    problem = make_producer_consumer_problem(
+        num_producers=5,
+        num_consumers=5,
+        producer_time=1,
+        consumer_time=2,
+        time_limit=15,
+        num_execution_slots=4,
+    )
+    incumbent = get_incumbent(problem)
+    assert incumbent is not None
+    assert incumbent.makespan >= 11
+    for formulation in ["aggregated", "counting"]:
+        assert solve(problem, formulation=formulation, warm_start=True).makespan == 11
+
+
+@pytest.mark.parametrize("search", ["binary", "deepening"])
+def test_horizon_search(search):
+    problem = make_producer_consumer_problem(
+        num_producers=5,
+        num_consumers=5,
+        producer_time=1,
+        consumer_time=2,
+        time_limit=15,
+        num_execution_slots=3,
+    )
+    assert get_makespan_lower_bound(problem) == 5
+    result = solve_by_horizon_search(problem, search=search)
+    assert result.makespan == 11
+    assert result.lower_bound <= result.makespan <= result.upper_bound
+    # The makespan is proven optimal by an infeasible horizon one tick shorter.
+    assert (10, "No Solution Exists", None) in result.probes
+    assert result.schedule.stats["status"] == "Optimal Solution Found"
+
+
+@pytest.mark.parametrize("formulation", ["executor", "counting"])
+def test_replay_schedule(formulation):
+    problem = make_producer_consumer_problem(
+        num_producers=4,
+        num_consumers=4,
+        producer_time=1,
+        consumer_time=2,
+        time_limit=12,
+        num_execution_slots=2,
+        buffer_size_limit=2,
+    )
+    schedule = solve(problem, formulation=formulation)
+    assert schedule.stats["status"] == "Optimal Solution Found"
+    assert (schedule.buffer_levels, schedule.buffer_to_consume_levels) == get_buffer_levels(
+        problem.tasks, schedule.tasks, problem.num_operators, schedule.makespan
+    )
+    env = ExecutionEnvironment(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=ReplayPolicy(problem, schedule),
+    )
+    assert env.run(problem.time_limit)
+    replayed = env.get_schedule(problem)
+    assert replayed.makespan == schedule.makespan
+    assert replayed.diff(schedule) == []
+
+
+@pytest.mark.parametrize("policy_cls", [AIMDBackpressurePolicy, PIDBackpressurePolicy])
+@pytest.mark.parametrize(
+    "problem",
+    [test_problem, multi_stage_problem, producer_consumer_problem, training_problem, e2e_problem2],
+)
+def test_feedback_backpressure_gap(policy_cls, problem):
+    # The feedback policies only see runtime signals. They stay within 50% of the optimal
+    # makespan, the largest gap being 13 vs 9 ticks with AIMD on multi_stage_problem.
+    optimum = solve_by_horizon_search(problem).makespan
+    env = EventDrivenExecutionEnvironment(
+        resources=problem.resources,
+        buffer_size=problem.buffer_size_limit,
+        tasks=problem.tasks,
+        scheduling_policy=policy_cls(problem),
+    )
+    assert env.run(problem.time_limit)
+    assert optimum <= env._current_tick <= 1.5 * optimum
+
+
+@pytest.mark.parametrize("formulation", ["executor", "counting"])
+def test_no_schedule(formulation):
+    problem = make_producer_consumer_problem(
+        num_producers=5,
+        num_consumers=5,
+        producer_time=1,
+        consumer_time=2,
+        time_limit=6,
+        num_execution_slots=2,
+    )
+    assert solve(problem, formulation=formulation) is None
+
+
+def test_libsolver():
+    libsolver = pytest.importorskip("libsolver")
+    problem = make_producer_consumer_problem(
+        num_producers=4,
+        num_consumers=4,
+        producer_time=1,
+        consumer_time=2,
+        time_limit=12,
+        num_execution_slots=2,
+        buffer_size_limit=2,
+    )
+    schedule = libsolver.solve(problem)
+    assert schedule.makespan == solve(problem, formulation="counting").makespan
+    assert len(schedule.tasks) == problem.num_total_tasks
+    assert (schedule.buffer_levels, schedule.buffer_to_consume_levels) == get_buffer_levels(
+        problem.tasks, schedule.tasks, problem.num_operators, schedule.makespan
+    )
+    assert libsolver.solve(replace(problem, time_limit=6)) is None
+
+
+def test_libsolver_fractional_resources():
+    libsolver = pytest.importorskip("libsolver")
+    machine = ResourcesSpec(cpu=8, gpu=4)
+    for requests in [
+        [ResourcesSpec(cpu=0.99), ResourcesSpec(gpu=1)],
+        [ResourcesSpec(cpu=0.5), ResourcesSpec(gpu=0.5)],
+        [ResourcesSpec(cpu=0.1, gpu=1)],
+    ]:
+        assert libsolver.get_num_slots(machine, requests) == get_num_slots(machine, requests)
+
+    # Tasks that request 0.99 CPUs get one slot per CPU, as in the Python solvers.
+    problem = SchedulingProblem(
+        [
+            OperatorSpec(
+                name="P",
+                operator_idx=0,
+                num_tasks=4,
+                duration=1,
+                input_size=0,
+                output_size=1,
+                resources=ResourcesSpec(cpu=0.99),
+            ),
+            OperatorSpec(
+                name="C",
+                operator_idx=1,
+                num_tasks=4,
+                duration=2,
+                input_size=1,
+                output_size=0,
+                resources=ResourcesSpec(cpu=0.99),
+            ),
+        ],
+        name="fractional",
+        resources=ResourcesSpec(cpu=2),
+        time_limit=12,
+        buffer_size_limit=2,
+    )
+    schedule = libsolver.solve(problem)
+    assert schedule.executors == ["CPU0", "CPU1"]
+    assert schedule.makespan == solve(problem, formulation="counting").makespan